@@ -0,0 +1,101 @@
+"""
+Load test the crawler against a local mock store
+
+Usage:
+    uv run python benchmarks/bench_crawl.py [--cassette DIR] [--workers N]
+        [--rate R] [--latency S] [--error-rate P] [--throttle-rate P]
+
+Without `--cassette` a generated corpus is recorded into a temporary cassette. The
+store is replayed by `mock_server` with the given latency and injected failures,
+collection and product pages are downloaded into a temporary htmls directory and
+throughput and served statuses are reported.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import corpus
+from lakocie_dataset.config import config
+from lakocie_dataset.scrap import cassette, client, downloader, journal, paths
+from lakocie_dataset.scrap.mock_server import MockStoreServer
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+STORE = StoreChoice.KF
+
+
+def record_corpus(directory: Path, products: int, collections: int) -> cassette.Cassette:
+    """Record generated store pages into a cassette."""
+    recorded = cassette.Cassette(directory)
+    base_url = STORE.value.base_url.rstrip("/")
+    headers = {"Content-Type": "text/html; charset=utf-8"}
+    per_page = -(-products // collections)
+    for page in range(1, collections + 1):
+        body = corpus.generate_collection_page(page, collections, per_page).encode()
+        recorded.record(f"{base_url}/Karmy-Mokre/pa/{page}", 200, headers, body)
+        if page == 1:
+            recorded.record(STORE.value.scrap_start_url, 200, headers, body)
+    for i in range(per_page * collections):
+        body = corpus.generate_product_page(i).encode()
+        recorded.record(f"{base_url}/{corpus.product_slug(i)}", 200, headers, body)
+    return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cassette", type=Path, default=None)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--collections", type=int, default=25)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=50.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--throttle-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        if args.cassette:
+            recorded = cassette.Cassette(args.cassette)
+        else:
+            recorded = record_corpus(tmp / "cassette", args.products, args.collections)
+
+        # the benchmark owns this process, point the shared config at the mock store
+        config.htmls_dir = tmp / "htmls"
+        config.requests_per_second = args.rate
+        config.burst = args.workers
+        config.host_rate_limits = {}
+        config.pool_size = args.workers
+        config.host_pool_sizes = {}
+        config.backoff, config.max_backoff = 0.05, 1
+        config.cassette_path = None
+
+        with MockStoreServer(
+            recorded,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            throttle_rate=args.throttle_rate,
+            retry_after=0,
+            seed=args.seed,
+        ) as server:
+            config.mock_server = server.url
+            start = time.perf_counter()
+            try:
+                downloader.download_store_files(STORE, workers=args.workers)
+            finally:
+                client.close_sessions()
+            seconds = time.perf_counter() - start
+
+        products_dir = paths.create_products_dir(STORE)
+        counts = journal.Journal(paths.get_journal_path(products_dir)).counts()
+        requests = sum(server.statuses.values())
+        print(f"{len(recorded)} recorded responses, {args.workers} workers")
+        print(f"journal: {dict(counts)}")
+        print(f"served statuses: {dict(server.statuses)}")
+        print(f"{requests} requests in {seconds:.2f}s, {requests / seconds:.1f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
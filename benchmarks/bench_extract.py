@@ -0,0 +1,107 @@
+"""
+Compare the DOM-free product page scan with the DOM extraction
+
+Usage:
+    uv run python benchmarks/bench_extract.py [--products-dir DIR ...] [--show N]
+
+Every Kocie Figle product page of the saved snapshots, or of the given products
+directories, is read by `kf_scan.scan_product` and by `kf.extract_product` on a soup
+built by the configured parser. Pages the scan finds ambiguous, pages whose fields
+differ and throughput of both paths are reported. Without saved snapshots a generated
+corpus is used. Exits with status 1 when a field differs.
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+
+import corpus
+from lakocie_dataset.scrap import io, parsers, paths
+from lakocie_dataset.scrap.stores import kf, kf_scan
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+
+def get_products_dirs() -> list[Path]:
+    """Return products directories of all saved Kocie Figle snapshots."""
+    return [
+        directory
+        for directory in paths.iter_snapshot_dirs()
+        if directory.name == "products"
+        and directory.parent.parent.name == StoreChoice.KF.value.name
+    ]
+
+
+def iter_pages(products_dirs: list[Path], products: int) -> Iterator[tuple[str, bytes]]:
+    if not products_dirs:
+        for i in range(products):
+            yield corpus.product_slug(i), corpus.generate_product_page(i).encode()
+        return
+    for directory in products_dirs:
+        for path, content in io.iter_snapshot(directory):
+            yield str(path), content
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products-dir", type=Path, action="append", default=None)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--show", type=int, default=20)
+    args = parser.parse_args()
+
+    products_dirs = args.products_dir or get_products_dirs()
+    ambiguous = Counter()
+    mismatches = []
+    dom_errors = 0
+    pages = 0
+    scan_seconds = dom_seconds = 0.0
+    for name, content in iter_pages(products_dirs, args.products):
+        pages += 1
+        start = time.perf_counter()
+        try:
+            scanned = kf_scan.scan_product(content)
+        except kf_scan.AmbiguousMarkup as e:
+            scanned = None
+            ambiguous[str(e)] += 1
+        scan_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            soup = io.content_to_soup(content, page_type=parsers.PageType.PRODUCT)
+            parsed = kf.extract_product(soup)
+        except Exception as e:
+            print(f"{name}: DOM extraction failed: {e}")
+            dom_errors += 1
+            continue
+        finally:
+            dom_seconds += time.perf_counter() - start
+
+        if scanned is not None and scanned != parsed:
+            fields = {
+                field: (scanned[field], parsed[field])
+                for field in parsed
+                if scanned[field] != parsed[field]
+            }
+            mismatches.append((name, fields))
+
+    source = ", ".join(map(str, products_dirs)) or "generated corpus"
+    print(f"{pages} product pages from {source}")
+    print(f"ambiguous: {sum(ambiguous.values())} {dict(ambiguous)}")
+    print(f"DOM errors: {dom_errors}")
+    print(f"mismatches: {len(mismatches)}")
+    for name, fields in mismatches[: args.show]:
+        print(f"  {name}")
+        for field, (scanned, parsed) in fields.items():
+            print(f"    {field}: scan {scanned!r} != DOM {parsed!r}")
+    if pages:
+        print(
+            f"scan: {pages / scan_seconds:.0f} pages/s, "
+            f"DOM: {pages / dom_seconds:.0f} pages/s"
+        )
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Benchmark Kocie Figle page parsing and extraction for every parser backend
+
+Usage:
+    uv run python benchmarks/bench_parsers.py [--products-dir DIR]
+        [--collections-dir DIR] [--output FILE] [--compare FILE] [--tolerance 0.2]
+
+Without directories a generated corpus is used, it is the same for the same numbers
+of pages. For every installed parser backend, in a separate process, the suite times:
+- `io.html_file_to_soup` of product and collection pages,
+- every `kf.get_product_*` field getter on product soups with the selector memo
+  cleared, and all `KFScrapper` product getters, which read one extracted record,
+- full record extraction by `KFScrapper.extract`,
+- `KFScrapper` collection getters, links and prices of product tiles.
+
+Each case reports pages/s (best of `--repeat` runs), peak memory allocated by one run
+(tracemalloc) and peak RSS of the backend process. Results are saved as JSON by
+`--output`. With `--compare`, cases slower than in previous results by more than
+`--tolerance` are reported and the exit status is 1.
+"""
+
+import argparse
+import hashlib
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from importlib import metadata
+from multiprocessing import get_context
+from pathlib import Path
+
+import corpus
+from lakocie_dataset.config import config
+from lakocie_dataset.scrap import io, parsers, scrapper
+from lakocie_dataset.scrap.stores import kf
+
+FIELD_GETTERS = [
+    kf.get_product_name,
+    kf.get_product_manufacturer,
+    kf.get_product_price,
+    kf.get_product_weight,
+    kf.get_product_flavour,
+    kf.get_product_type,
+    kf.get_product_age_group,
+    kf.get_product_ean_code,
+    kf.get_product_composition,
+    kf.get_product_analytical_composition,
+    kf.get_product_dietary_supplements,
+]
+COLLECTION_GETTERS = [
+    scrapper.KFScrapper.get_product_links,
+    scrapper.KFScrapper.get_product_prices,
+    scrapper.KFScrapper.get_product_fingerprints,
+    scrapper.KFScrapper.get_page_links,
+    scrapper.KFScrapper.get_next_page_link,
+]
+
+
+def get_fresh_soup(soup):
+    """Return the soup without memoized elements, so getters search it again."""
+    soup.__dict__.pop(kf.MEMO_ATTRIBUTE, None)
+    return soup
+
+
+def measure(run: Callable[[], object], pages: int, repeat: int) -> dict:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": best,
+        "pages_per_second": pages / best if best else None,
+        "allocated_peak_kb": peak / 1024,
+    }
+
+
+def bench_parser(
+    parser: parsers.Parser, products: list[Path], collections: list[Path], repeat: int
+) -> dict:
+    """Return results of all cases of a parser backend."""
+    product_type = parsers.PageType.PRODUCT
+    collection_type = parsers.PageType.COLLECTION
+    results = {}
+
+    def parse_products():
+        return [io.html_file_to_soup(path, parser, product_type) for path in products]
+
+    def parse_collections():
+        return [
+            io.html_file_to_soup(path, parser, collection_type) for path in collections
+        ]
+
+    results["html_file_to_soup/products"] = measure(
+        parse_products, len(products), repeat
+    )
+    results["html_file_to_soup/collections"] = measure(
+        parse_collections, len(collections), repeat
+    )
+
+    product_soups = parse_products()
+    for getter in FIELD_GETTERS:
+        results[f"kf.{getter.__name__}"] = measure(
+            lambda: [getter(get_fresh_soup(soup)) for soup in product_soups],
+            len(products),
+            repeat,
+        )
+    results["KFScrapper.extract"] = measure(
+        lambda: [
+            scrapper.KFScrapper(get_fresh_soup(soup)).extract()
+            for soup in product_soups
+        ],
+        len(products),
+        repeat,
+    )
+    results["KFScrapper.get_product_*"] = measure(
+        lambda: [
+            [getattr(sc, getter.__name__)() for getter in FIELD_GETTERS]
+            for sc in (
+                scrapper.KFScrapper(get_fresh_soup(soup)) for soup in product_soups
+            )
+        ],
+        len(products),
+        repeat,
+    )
+    del product_soups
+
+    collection_soups = parse_collections()
+    for getter in COLLECTION_GETTERS:
+        results[f"KFScrapper.{getter.__name__}"] = measure(
+            lambda: [
+                getter(scrapper.KFScrapper(get_fresh_soup(soup)))
+                for soup in collection_soups
+            ],
+            len(collections),
+            repeat,
+        )
+    return {
+        "cases": results,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def corpus_digest(files: list[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(io.read_bytes(path))
+    return digest.hexdigest()
+
+
+def get_versions() -> dict[str, str | None]:
+    versions = {"python": platform.python_version()}
+    for package in ["beautifulsoup4", *parsers.REQUIRED_PACKAGES.values()]:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, previous: dict, tolerance: float) -> list[str]:
+    """Return cases slower than in previous results by more than the tolerance."""
+    regressions = []
+    for parser, parser_results in results["parsers"].items():
+        previous_cases = previous.get("parsers", {}).get(parser, {}).get("cases", {})
+        for case, result in parser_results["cases"].items():
+            before = previous_cases.get(case, {}).get("pages_per_second")
+            if not before or not result["pages_per_second"]:
+                continue
+            ratio = result["pages_per_second"] / before
+            if ratio < 1 - tolerance:
+                regressions.append(f"{parser} {case}: {ratio:.2f}x pages/s")
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    for parser, parser_results in results["parsers"].items():
+        print(f"\n{parser} (peak RSS {parser_results['peak_rss_mb']:.0f} MB)")
+        print(f"{'case':<48}{'pages/s':>12}{'alloc peak [KB]':>18}")
+        for case, result in parser_results["cases"].items():
+            print(
+                f"{case:<48}{result['pages_per_second']:>12.1f}"
+                f"{result['allocated_peak_kb']:>18.0f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products-dir", type=Path, default=None)
+    parser.add_argument("--collections-dir", type=Path, default=None)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--collections", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--parser", type=parsers.Parser, action="append", default=None
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        products, collections = corpus.write_corpus(
+            Path(tmpdir), products=args.products, collections=args.collections
+        )
+        if args.products_dir:
+            products = list(io.iter_html_files(args.products_dir))
+        if args.collections_dir:
+            collections = list(io.iter_html_files(args.collections_dir))
+
+        results = {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "commit": get_commit(),
+            "versions": get_versions(),
+            "partial_parsing": config.get_partial_parsing(),
+            "corpus": {
+                "products": len(products),
+                "collections": len(collections),
+                "digest": corpus_digest(products + collections),
+            },
+            "parsers": {},
+        }
+        print(f"{len(products)} product pages, {len(collections)} collection pages")
+        # every backend runs in a new process, so its peak RSS is its own
+        context = get_context("spawn")
+        for parser_ in args.parser or parsers.available_parsers():
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results["parsers"][parser_.value] = executor.submit(
+                    bench_parser, parser_, products, collections, args.repeat
+                ).result()
+    print_results(results)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults saved to {args.output}")
+
+    if args.compare:
+        previous = json.loads(args.compare.read_text())
+        if previous.get("corpus", {}).get("digest") != results["corpus"]["digest"]:
+            print(f"\n{args.compare} was measured on a different corpus")
+        regressions = compare(results, previous, args.tolerance)
+        print(f"\n{len(regressions)} regressions against {args.compare}")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
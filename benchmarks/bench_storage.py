@@ -0,0 +1,83 @@
+"""
+Benchmark read+parse time of plain and compressed snapshot storage
+
+Usage:
+    uv run python benchmarks/bench_storage.py [--products-dir DIR] [--repeat N]
+
+Without `--products-dir` a generated corpus is used. Each available compression is
+written to a temporary directory, then every file is read back through
+`io.html_file_to_soup` and the best of `--repeat` runs is reported.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import corpus
+from lakocie_dataset.scrap import compression, io
+
+
+def available_compressions() -> list[compression.Compression]:
+    choices = [compression.Compression.NONE, compression.Compression.GZIP]
+    if compression.zstandard is not None:
+        choices.append(compression.Compression.ZSTD)
+    return choices
+
+
+def write_copy(
+    sources: list[Path], directory: Path, compression_: compression.Compression
+) -> list[Path]:
+    directory.mkdir(parents=True)
+    copies = []
+    for source in sources:
+        path = directory / source.name
+        io.save_content(
+            io.read_content(source), path, deduplicate=False, compression=compression_
+        )
+        copies.append(path)
+    return copies
+
+
+def disk_size(directory: Path) -> int:
+    return sum(p.stat().st_size for p in directory.iterdir())
+
+
+def time_read_parse(files: list[Path], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in files:
+            io.html_file_to_soup(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products-dir", type=Path, default=None)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        if args.products_dir:
+            sources = list(io.iter_html_files(args.products_dir))
+        else:
+            sources, _ = corpus.write_corpus(tmp / "source", products=args.products)
+
+        print(f"{len(sources)} pages")
+        print(f"{'compression':<12}{'size [MB]':>12}{'read+parse [s]':>18}{'pages/s':>10}")
+        for compression_ in available_compressions():
+            directory = tmp / compression_.value
+            files = write_copy(sources, directory, compression_)
+            seconds = time_read_parse(files, args.repeat)
+            print(
+                f"{compression_.value:<12}{disk_size(directory) / 2**20:>12.2f}"
+                f"{seconds:>18.3f}{len(files) / seconds:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
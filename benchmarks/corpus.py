@@ -0,0 +1,217 @@
+"""
+Generated Kocie Figle page corpus for benchmarks
+
+Pages mimic the markup read by `lakocie_dataset.scrap.stores.kf`: product title,
+information section with price, parameter rows, hidden EAN row, description tab and
+collection pages with product tiles and pagination, surrounded by navigation,
+scripts and footer of a realistic size.
+"""
+
+import random
+from pathlib import Path
+
+MANUFACTURERS = ["Almo Nature", "Animonda", "Applaws", "Feringa", "Miamor", "Smilla"]
+LINES = ["HFC Complete", "Carny", "Natural", "Classic", "Pure Meat", "Ragout"]
+FLAVOURS = ["Kurczak i Marchew", "Wołowina", "Tuńczyk", "Indyk", "Łosoś", "Kaczka"]
+WEIGHTS = ["70g", "85g", "100g", "200g", "400g", "6x85g"]
+
+CHROME_HEAD = """<!DOCTYPE html>
+<html lang="pl">
+<head>
+<meta charset="utf-8">
+<title>{title} - Kocie Figle</title>
+{styles}
+{scripts}
+</head>
+<body>
+<header class="header">
+<nav class="navbar">
+<ul class="menu">
+{menu}
+</ul>
+</nav>
+</header>
+"""
+
+CHROME_FOOT = """<footer class="footer">
+<div class="container">
+{footer}
+</div>
+</footer>
+{scripts}
+</body>
+</html>
+"""
+
+
+def _chrome(rng: random.Random, title: str) -> tuple[str, str]:
+    styles = "\n".join(
+        f'<link rel="stylesheet" href="/static/css/style-{i}.css?v={rng.randint(1, 999)}">'
+        for i in range(8)
+    )
+    scripts = "\n".join(
+        f"<script>window.dataLayer = window.dataLayer || []; dataLayer.push({{'event': 'view_{i}', 'value': {rng.random():.5f}}});</script>"
+        for i in range(40)
+    )
+    menu = "\n".join(
+        f'<li class="menu-item"><a href="/Kategoria-{i}">Kategoria {i}</a>'
+        f'<ul class="submenu">{"".join(f"<li><a href=\"/Kategoria-{i}/{j}\">Podkategoria {j}</a></li>" for j in range(12))}</ul></li>'
+        for i in range(40)
+    )
+    footer = "\n".join(
+        f'<div class="col-sm-3"><h4>Sekcja {i}</h4><p>Informacje o sklepie, dostawie i zwrotach {i}.</p></div>'
+        for i in range(12)
+    )
+    head = CHROME_HEAD.format(title=title, styles=styles, scripts=scripts, menu=menu)
+    foot = CHROME_FOOT.format(footer=footer, scripts=scripts)
+    return head, foot
+
+
+def product_name(i: int) -> str:
+    rng = random.Random(i)
+    return " - ".join(
+        [
+            rng.choice(MANUFACTURERS),
+            rng.choice(LINES),
+            rng.choice(FLAVOURS),
+            rng.choice(WEIGHTS),
+        ]
+    )
+
+
+def product_slug(i: int) -> str:
+    return f"{product_name(i).replace(' - ', '-').replace(' ', '-')}-p{1000 + i}"
+
+
+def generate_product_page(i: int) -> str:
+    """Return HTML of a product page."""
+    rng = random.Random(i)
+    name = product_name(i)
+    manufacturer, _, flavour, weight = name.split(" - ")
+    price = f"{rng.randint(2, 60)}.{rng.randint(0, 99):02d}"
+    ean = str(5900000000000 + i)
+    head, foot = _chrome(rng, name)
+
+    parameters = {
+        "Rozmiar opakowania": weight,
+        "Smak": flavour.replace(" i ", ", "),
+        "Typ karmy": rng.choice(["Pełnoporcjowa", "Uzupełniająca"]),
+        "Wiek kota": rng.choice(["Dorosłe koty", "Kocięta", "Seniorzy"]),
+    }
+    parameter_rows = "\n".join(
+        f'<div class="product-parameter-row"><span class="parameter-name">{k}:</span>'
+        f'<span class="text-field">{v}</span></div>'
+        for k, v in parameters.items()
+    )
+    hidden_rows = "\n".join(
+        f'<tr class="hidden" data-parameter-value="{k}" data-parameter-default-value="{v}"><td>{k}</td></tr>'
+        for k, v in [("sku", f"SKU{i}"), ("ean", ean), ("mpn", f"MPN{i}")]
+    )
+    description = "\n".join(
+        [
+            "<p>Kompletna karma pełnoporcjowa.</p>",
+            "<p>"
+            + f"{manufacturer} to karma przygotowana z najwyższej jakości składników. " * 3
+            + "</p>",
+            f"<p>Skład: mięso i produkty pochodzenia zwierzęcego ({rng.randint(40, 90)}%), "
+            "bulion, skrobia z tapioki, oleje i tłuszcze, składniki mineralne.</p>",
+            f"<p>Składniki analityczne: białko surowe {rng.randint(8, 14)}%, tłuszcz surowy "
+            f"{rng.randint(2, 8)}%, włókno surowe 0,5%, popiół surowy 2%, wilgotność 80%.</p>",
+            f"<p>Dodatki dietetyczne na kg: wit.D3 {rng.randint(100, 300)}IU/kg, wit.E 48IU/kg, "
+            "tauryna 500mg/kg, cynk (siarczan cynku) 15mg/kg.</p>",
+            "<p>Podawać w temperaturze pokojowej. Zapewnić stały dostęp do świeżej wody.</p>",
+        ]
+    )
+    reviews = "\n".join(
+        f'<div class="review"><span class="author">Klient {j}</span><p>Opinia numer {j} o produkcie. '
+        "Kot bardzo zadowolony, polecam.</p></div>"
+        for j in range(rng.randint(5, 30))
+    )
+    body = f"""<div class="container product-page">
+<div class="row">
+<div class="col-sm-6 gallery">
+{"".join(f'<img src="/img/{i}/{j}.jpg" alt="{name}">' for j in range(6))}
+</div>
+<div class="col-sm-6">
+<h1 class="title">{name}</h1>
+<section class="product-informations">
+<div class="product-price">{price} zł</div>
+<div class="availability">Dostępny</div>
+<form class="basket"><input type="number" value="1"><button>Do koszyka</button></form>
+</section>
+<div class="product-parameters">
+{parameter_rows}
+</div>
+<table class="parameters">
+{hidden_rows}
+</table>
+</div>
+</div>
+<div class="tabs">
+<div class="tab" data-tab="description">
+{description}
+</div>
+<div class="tab" data-tab="reviews">
+{reviews}
+</div>
+</div>
+</div>
+"""
+    return head + body + foot
+
+
+def generate_collection_page(page: int, pages: int = 30, per_page: int = 18) -> str:
+    """Return HTML of a collection page with product tiles and pagination."""
+    rng = random.Random(-page)
+    head, foot = _chrome(rng, f"Karmy Mokre - strona {page}")
+    tiles = "\n".join(
+        f"""<figure class="product-tile">
+<a href="/{product_slug(i)}"><img src="/img/{i}/0.jpg" alt="{product_name(i)}"></a>
+<figcaption><a href="/{product_slug(i)}" class="name">{product_name(i)}</a>
+<div class="product-price">{rng.randint(2, 60)}.{rng.randint(0, 99):02d} zł</div>
+<div class="availability">Dostępny</div></figcaption>
+</figure>"""
+        for i in range((page - 1) * per_page, page * per_page)
+    )
+    links = "".join(
+        f'<a href="/Karmy-Mokre/pa/{n}">{n}</a>' for n in range(1, pages + 1)
+    )
+    next_link = (
+        f'<a href="/Karmy-Mokre/pa/{page + 1}"><i class="fa fa-chevron-right"></i></a>'
+        if page < pages
+        else ""
+    )
+    body = f"""<div class="container">
+<div class="row">
+<div class="col-sm-3 filters">{"".join(f'<label><input type="checkbox"> Filtr {j}</label>' for j in range(40))}</div>
+<div class="col-sm-9">
+{tiles}
+<div class="pagination">{links}{next_link}</div>
+</div>
+</div>
+</div>
+"""
+    return head + body + foot
+
+
+def write_corpus(
+    directory: Path, products: int = 200, collections: int = 10
+) -> tuple[list[Path], list[Path]]:
+    """Write generated pages to directory. Return product and collection paths."""
+    products_dir = directory / "products"
+    collections_dir = directory / "collections"
+    products_dir.mkdir(parents=True, exist_ok=True)
+    collections_dir.mkdir(parents=True, exist_ok=True)
+
+    product_paths = []
+    for i in range(products):
+        path = products_dir / f"{product_slug(i)}.html"
+        path.write_text(generate_product_page(i))
+        product_paths.append(path)
+
+    collection_paths = []
+    for page in range(1, collections + 1):
+        path = collections_dir / f"collection_{page}.html"
+        path.write_text(generate_collection_page(page, pages=collections))
+        collection_paths.append(path)
+    return product_paths, collection_paths
@@ -1,4 +0,0 @@
-from .main import main
-
-if __name__ == "__main__":
-    main()
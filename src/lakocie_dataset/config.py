@@ -17,6 +17,15 @@ class Config:
         self._set_htmls_dir()
         self._create_structure()
         self._set_sleep_time()
+        self._set_workers()
+        self._set_rate_limits()
+        self._set_retry()
+        self._set_frontier()
+        self._set_conditional_requests()
+        self._set_robots_ttl()
+        self._set_http()
+        self._set_storage()
+        self._set_parsing()
         self._set_database_path()
         self._set_modes()
         self._set_dev()
@@ -42,6 +51,251 @@ class Config:
     def get_sleep_time(self):
         return self.sleep_time
 
+    def _set_workers(self):
+        workers = self.config.get("downloading", {}).get("workers", 1)
+        if workers < 1:
+            raise ValueError("Number of download workers must be at least 1")
+        self.workers = workers
+
+    def get_workers(self):
+        return self.workers
+
+    def _set_rate_limits(self):
+        rate_limit = self.config.get("downloading", {}).get("rate_limit", {}) or {}
+        # without explicit rate limit keep the old politeness budget of sleep_time
+        default_rate = 1 / self.sleep_time if self.sleep_time > 0 else 1.0
+        self.requests_per_second = rate_limit.get("requests_per_second", default_rate)
+        self.burst = rate_limit.get("burst", 1)
+        self.host_rate_limits = rate_limit.get("hosts", {}) or {}
+        adaptive = rate_limit.get("adaptive", {}) or {}
+        self.adaptive_rate = adaptive.get("switch", False)
+        self.min_requests_per_second = adaptive.get(
+            "min_requests_per_second", self.requests_per_second / 10
+        )
+        self.max_requests_per_second = adaptive.get(
+            "max_requests_per_second", self.requests_per_second
+        )
+        self.rate_increase = adaptive.get("increase", 0.05)
+        self.rate_decrease = adaptive.get("decrease", 0.5)
+        self.max_latency = adaptive.get("max_latency", 5)
+
+    def get_rate_limit(self, host: str) -> tuple[float, int]:
+        """
+        Returns (requests per second, burst size) token bucket settings for a host
+        """
+        host_limit = self.host_rate_limits.get(host, {})
+        return (
+            host_limit.get("requests_per_second", self.requests_per_second),
+            host_limit.get("burst", self.burst),
+        )
+
+    def get_adaptive_rate(self):
+        return self.adaptive_rate
+
+    def get_adaptive_rate_bounds(self) -> tuple[float, float]:
+        """
+        Returns (min, max) requests per second the adaptive rate limit moves between
+        """
+        return self.min_requests_per_second, self.max_requests_per_second
+
+    def get_adaptive_rate_steps(self) -> tuple[float, float]:
+        """
+        Returns (additive increase, multiplicative decrease) of the adaptive rate limit
+        """
+        return self.rate_increase, self.rate_decrease
+
+    def get_max_latency(self):
+        return self.max_latency
+
+    def _set_retry(self):
+        downloading = self.config.get("downloading", {})
+        retry = downloading.get("retry", {}) or {}
+        self.max_retries = retry.get("max_retries", 4)
+        self.backoff = retry.get("backoff", 1)
+        self.max_backoff = retry.get("max_backoff", 120)
+        circuit_breaker = downloading.get("circuit_breaker", {}) or {}
+        self.circuit_breaker_failures = circuit_breaker.get("failures", 5)
+        self.circuit_breaker_reset_after = circuit_breaker.get("reset_after", 60)
+
+    def get_max_retries(self):
+        return self.max_retries
+
+    def get_backoff(self) -> tuple[float, float]:
+        """
+        Returns (base, max) seconds of exponential backoff between retries
+        """
+        return self.backoff, self.max_backoff
+
+    def get_circuit_breaker(self) -> tuple[int, float]:
+        """
+        Returns (consecutive failures opening the circuit, seconds it stays open)
+        """
+        return self.circuit_breaker_failures, self.circuit_breaker_reset_after
+
+    def _set_frontier(self):
+        frontier = self.config.get("downloading", {}).get("frontier", {}) or {}
+        self.frontier = frontier.get("switch", False)
+        self.revisit_days = frontier.get("revisit_days", 7)
+        sample_rate = frontier.get("sample_rate", 0.05)
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Frontier sample_rate must be between 0 and 1")
+        self.sample_rate = sample_rate
+        self.budget = frontier.get("budget", None)
+        prior = frontier.get("prior", {}) or {}
+        self.prior_changes = prior.get("changes", 1)
+        self.prior_days = prior.get("days", 30)
+        tiles = frontier.get("tile_fingerprints", {}) or {}
+        self.tile_max_age_days = (
+            tiles.get("max_age_days", 30) if tiles.get("switch", False) else None
+        )
+
+    def get_frontier(self):
+        return self.frontier
+
+    def get_revisit_days(self):
+        return self.revisit_days
+
+    def get_sample_rate(self):
+        return self.sample_rate
+
+    def get_budget(self) -> int | None:
+        """
+        Returns max number of known product urls fetched in a run, None for no limit
+        """
+        return self.budget
+
+    def get_prior_changes(self):
+        return self.prior_changes
+
+    def get_prior_days(self):
+        return self.prior_days
+
+    def get_tile_max_age_days(self) -> float | None:
+        """
+        Returns days after which a product with unchanged collection tile is fetched
+        anyway, None when tile fingerprints are disabled
+        """
+        return self.tile_max_age_days
+
+    def _set_conditional_requests(self):
+        self.conditional_requests = self.config.get("downloading", {}).get(
+            "conditional_requests", True
+        )
+
+    def get_conditional_requests(self):
+        return self.conditional_requests
+
+    def _set_robots_ttl(self):
+        self.robots_ttl = self.config.get("downloading", {}).get("robots_ttl", 3600)
+
+    def get_robots_ttl(self):
+        return self.robots_ttl
+
+    def _set_http(self):
+        http = self.config.get("http", {}) or {}
+        self.http_timeout = http.get("timeout", 30)
+        self.http_headers = http.get("headers", {}) or {}
+        self.pool_size = http.get("pool_size", self.workers)
+        self.host_pool_sizes = {
+            host: host_http.get("pool_size", self.pool_size)
+            for host, host_http in (http.get("hosts", {}) or {}).items()
+        }
+        cassette = http.get("cassette", None)
+        if cassette is not None:
+            cassette = Path(cassette)
+            if not cassette.is_absolute():
+                cassette = self.project_root / cassette
+        self.cassette_path = cassette
+        self.mock_server = http.get("mock_server", None)
+
+    def get_http_timeout(self):
+        return self.http_timeout
+
+    def get_http_headers(self) -> dict[str, str]:
+        return self.http_headers
+
+    def get_pool_size(self, host: str) -> int:
+        """
+        Returns number of keep-alive connections kept open to a host
+        """
+        return self.host_pool_sizes.get(host, self.pool_size)
+
+    def get_cassette_path(self) -> Path | None:
+        """
+        Returns directory recording fetched responses, None when not recording
+        """
+        return self.cassette_path
+
+    def get_mock_server(self) -> str | None:
+        """
+        Returns URL of a local mock server all requests are sent to, None for real hosts
+        """
+        return self.mock_server
+
+    def _set_storage(self):
+        storage = self.config.get("storage", {}) or {}
+        self.deduplicate = storage.get("deduplicate", False)
+        self.compression = storage.get("compression", "none")
+
+    def get_deduplicate(self):
+        return self.deduplicate
+
+    def get_compression(self):
+        return self.compression
+
+    def _set_parsing(self):
+        parsing = self.config.get("parsing", {}) or {}
+        self.parser = parsing.get("parser", "html.parser")
+        self.partial_parsing = parsing.get("partial", False)
+        self.scan_products = parsing.get("scan", False)
+        processes = parsing.get("processes", 1)
+        if processes < 1:
+            raise ValueError("Number of parsing processes must be at least 1")
+        self.parse_processes = processes
+        cache = parsing.get("cache", {}) or {}
+        self.record_cache = cache.get("enabled", False)
+        self.record_cache_max_size_mb = cache.get("max_size_mb", 256)
+        self.record_cache_max_age_days = cache.get("max_age_days", 90)
+
+    def get_parser(self):
+        """
+        Returns name of the HTML parser backend, see `scrap.parsers.Parser`
+        """
+        return self.parser
+
+    def get_partial_parsing(self):
+        """
+        Returns whether only the elements read from a page type are parsed
+        """
+        return self.partial_parsing
+
+    def get_scan_products(self):
+        """
+        Returns whether product pages are scanned without building a DOM, see
+        `scrap.stores.kf_scan`
+        """
+        return self.scan_products
+
+    def get_parse_processes(self):
+        """
+        Returns number of processes parsing saved product pages while they are saved
+        in the database, 1 parses them in the main process
+        """
+        return self.parse_processes
+
+    def get_record_cache(self):
+        """
+        Returns whether product records extracted from saved pages are cached, see
+        `scrap.record_cache`
+        """
+        return self.record_cache
+
+    def get_record_cache_max_size_mb(self):
+        return self.record_cache_max_size_mb
+
+    def get_record_cache_max_age_days(self):
+        return self.record_cache_max_age_days
+
     def _set_database_path(self):
         db_path = Path(self.config.get("paths", {}).get("database", "data/database.db"))
         if not db_path.is_absolute():
@@ -78,6 +332,15 @@ class Config:
         gpt_extract_data = modes.get("gpt_extract_data", {})
         self.gpt_extract_data_mode = gpt_extract_data.get("switch", False)
 
+        migrate_storage = modes.get("migrate_storage", {})
+        self.migrate_storage_mode = migrate_storage.get("switch", False)
+
+        prices_only = modes.get("prices_only", {})
+        self.prices_only_mode = prices_only.get("switch", False)
+
+        pack_snapshots = modes.get("pack_snapshots", {})
+        self.pack_snapshots_mode = pack_snapshots.get("switch", False)
+
     def _set_dev(self):
         dev_dict = self.config.get("dev", {})
         self.debug = dev_dict.get("debug", True)
@@ -100,6 +363,15 @@ class Config:
     def get_gpt_extract_data_mode(self):
         return self.gpt_extract_data_mode
 
+    def get_migrate_storage_mode(self):
+        return self.migrate_storage_mode
+
+    def get_prices_only_mode(self):
+        return self.prices_only_mode
+
+    def get_pack_snapshots_mode(self):
+        return self.pack_snapshots_mode
+
     def get_debug(self):
         return self.debug
 
@@ -3,6 +3,7 @@ from typing import Sequence
 from sqlmodel import Session, select
 from sqlalchemy import Engine
 from .models import (
+    CrawlUrl,
     DietaryComponent,
     AnalyticalComponent,
     Price,
@@ -134,6 +135,33 @@ def read_price_by_product_store_and_date(
         return price
 
 
+def create_prices(engine: Engine, prices: Sequence[Price]) -> None:
+    """Insert many prices in one transaction"""
+    with Session(engine) as session:
+        session.add_all(prices)
+        session.commit()
+
+
+def read_prices_by_store_and_date(
+    engine: Engine, store: Store, date: datetime
+) -> Sequence[Price]:
+    with Session(engine) as session:
+        prices = session.exec(
+            select(Price).where(Price.store_id == store.id).where(Price.date == date)
+        ).all()
+        return prices
+
+
+def read_prices_by_store(engine: Engine, store: Store) -> Sequence[Price]:
+    with Session(engine) as session:
+        prices = session.exec(
+            select(Price)
+            .where(Price.store_id == store.id)
+            .order_by(Price.product_ean, Price.date)  # type: ignore
+        ).all()
+        return prices
+
+
 def create_scrap_data(
     engine: Engine,
     product_name: str,
@@ -184,6 +212,16 @@ def read_valid_scrap_data_by_product_and_store(
         return valid_scrap_data
 
 
+def read_scrap_data_by_store(engine: Engine, store: Store) -> Sequence[ScrapData]:
+    with Session(engine) as session:
+        scrap_data = session.exec(
+            select(ScrapData)
+            .where(ScrapData.store_id == store.id)
+            .order_by(ScrapData.ean, ScrapData.valid_from)  # type: ignore
+        ).all()
+        return scrap_data
+
+
 def read_all_valid_scrap_data(engine: Engine) -> Sequence[ScrapData]:
     with Session(engine) as session:
         valid_scrap_data = session.exec(
@@ -322,3 +360,37 @@ def create_dietary_component(
         session.commit()
         session.refresh(dietary_component)
         return dietary_component
+
+
+def read_crawl_urls(engine: Engine, store: Store) -> Sequence[CrawlUrl]:
+    with Session(engine) as session:
+        crawl_urls = session.exec(
+            select(CrawlUrl).where(CrawlUrl.store_id == store.id)
+        ).all()
+        return crawl_urls
+
+
+def save_crawl_urls(engine: Engine, crawl_urls: Sequence[CrawlUrl]) -> None:
+    """Insert new and update existing crawl urls in one transaction"""
+    with Session(engine) as session:
+        for crawl_url in crawl_urls:
+            session.merge(crawl_url)
+        session.commit()
+
+
+def link_crawl_url_to_product(
+    engine: Engine, store: Store, name: str, product: Product
+) -> CrawlUrl | None:
+    with Session(engine) as session:
+        crawl_url = session.exec(
+            select(CrawlUrl)
+            .where(CrawlUrl.store_id == store.id)
+            .where(CrawlUrl.name == name)
+        ).first()
+        if crawl_url is None:
+            return None
+        if crawl_url.product_ean != product.ean:
+            crawl_url.product_ean = product.ean
+            session.commit()
+            session.refresh(crawl_url)
+        return crawl_url
@@ -14,6 +14,7 @@ class Product(SQLModel, table=True):
 
     prices: list["Price"] = Relationship(back_populates="product")
     data_scraps: list["ScrapData"] = Relationship(back_populates="product")
+    crawl_urls: list["CrawlUrl"] = Relationship(back_populates="product")
 
 
 class Manufacturer(SQLModel, table=True):
@@ -46,6 +47,7 @@ class Store(SQLModel, table=True):
 
     prices: list["Price"] = Relationship(back_populates="store")
     data_scraps: list["ScrapData"] = Relationship(back_populates="store")
+    crawl_urls: list["CrawlUrl"] = Relationship(back_populates="store")
 
 
 class ScrapData(SQLModel, table=True):
@@ -104,3 +106,25 @@ class DietaryComponent(SQLModel, table=True):
 
     data_scrap_id: uuid.UUID | None = Field(default=None, foreign_key="scrapdata.id")
     data_scrap: "ScrapData" = Relationship(back_populates="dietary_components")
+
+
+class CrawlUrl(SQLModel, table=True):
+    url: str = Field(primary_key=True)
+    name: str = Field(index=True, description="saved file name without .html")
+
+    store_id: uuid.UUID | None = Field(default=None, foreign_key="store.id", index=True)
+    store: "Store" = Relationship(back_populates="crawl_urls")
+
+    product_ean: int | None = Field(default=None, foreign_key="product.ean", index=True)
+    product: "Product" = Relationship(back_populates="crawl_urls")
+
+    first_seen: datetime = Field(default_factory=datetime.now)
+    last_seen: datetime = Field(default_factory=datetime.now)
+    last_fetched: datetime | None = Field(default=None)
+    last_changed: datetime | None = Field(default=None)
+    content_hash: str | None = Field(default=None, description="sha256")
+    tile_fingerprint: str | None = Field(
+        default=None, description="sha256 of the collection tile when last fetched"
+    )
+    fetch_count: int = Field(default=0)
+    change_count: int = Field(default=0)
@@ -9,6 +9,7 @@ from .models import (
     ScrapData,
     AnalyticalComponent,
     DietaryComponent,
+    CrawlUrl,
 )
 
 
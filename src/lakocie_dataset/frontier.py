@@ -0,0 +1,244 @@
+"""
+Crawl frontier deciding which product urls are fetched in a run
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import Engine
+
+from .config import config
+from . import scheduler
+from .database import crud, models
+from .scrap import journal
+from .scrap.stores import store_definitions, string_utils
+
+
+class Frontier:
+    """Product urls of a store known from previous runs.
+
+    New urls are always fetched, followed products when `revisit_days` passed since
+    they were fetched and a random `sample_rate` fraction of the rest, including
+    products unfollowed by `cohere_database`. With a `budget` the known urls are
+    instead ranked by `scheduler` and only the `budget` most likely changed ones
+    are fetched. When a collection tile fingerprint of a fetched url is known, the
+    url is fetched only if its tile changed or `tile_max_age_days` passed since it
+    was fetched, also with a `budget`. There an unchanged tile frees the slot of its
+    url and a changed or aged tile schedules its url in a free slot or in place of
+    the least likely changed scheduled url not fetched yet, so the budget still
+    bounds the fetches. Urls seen in collections and results of
+    fetches are written back by `save`.
+
+    Args:
+        engine (Engine): Database engine.
+        store (StoreChoice): Store the urls belong to.
+        now (datetime): Time of the run.
+        revisit_days (float): Days after which followed products are due.
+        sample_rate (float): Fraction of not due products fetched anyway.
+        rng (random.Random): Source of randomness of the sample.
+        budget (int | None): Number of known urls fetched in a run.
+        tile_max_age_days (float | None): Days after which urls with unchanged tiles
+            are fetched, tile fingerprints are ignored when None.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        store: store_definitions.StoreChoice,
+        now: datetime | None = None,
+        revisit_days: float = config.get_revisit_days(),
+        sample_rate: float = config.get_sample_rate(),
+        rng: random.Random | None = None,
+        budget: int | None = config.get_budget(),
+        tile_max_age_days: float | None = config.get_tile_max_age_days(),
+    ) -> None:
+        self.engine = engine
+        self.store = store
+        self.now = now if now is not None else datetime.now()
+        self.revisit_after = timedelta(days=revisit_days)
+        self.sample_rate = sample_rate
+        self.rng = rng if rng is not None else random.Random()
+        self.tile_max_age = (
+            timedelta(days=tile_max_age_days) if tile_max_age_days is not None else None
+        )
+
+        self.store_db = crud.get_or_create_store_by_name(engine, store.value.name)
+        self.crawl_urls = {
+            crawl_url.url: crawl_url
+            for crawl_url in crud.read_crawl_urls(engine, self.store_db)
+        }
+        self.unfollowed = {
+            product.ean
+            for product in crud.read_products(engine)
+            if not product.is_followed
+        }
+        self.seen: set[str] = set()
+        self.tiles: dict[str, str] = {}
+        self._changed: set[str] = set()
+        self.budget = budget
+        # expected gain of the scheduled urls
+        self.gains = self.schedule(budget) if budget is not None else {}
+        self.scheduled = set(self.gains) if budget is not None else None
+        # known urls chosen to fetch in this run
+        self.selected: set[str] = set()
+        # known urls found in collections and not fetched in this run
+        self.skipped: set[str] = set()
+
+    def schedule(self, budget: int) -> dict[str, float]:
+        """Return known urls with the highest expected gain, at most `budget` of them"""
+        if not self.crawl_urls:
+            return {}
+        # skip products which disappeared from the store
+        last_seen = max(crawl_url.last_seen for crawl_url in self.crawl_urls.values())
+        candidates = [
+            crawl_url
+            for crawl_url in self.crawl_urls.values()
+            if last_seen - crawl_url.last_seen <= timedelta(days=1)
+        ]
+        return scheduler.schedule(
+            self.engine, self.store_db, candidates, self.now, budget, self.unfollowed
+        )
+
+    def is_due(self, crawl_url: models.CrawlUrl) -> bool:
+        """Check whether a known url has to be fetched in this run"""
+        if crawl_url.last_fetched is None:
+            return True
+        if self.scheduled is not None:
+            return crawl_url.url in self.scheduled
+        if crawl_url.product_ean in self.unfollowed:
+            return False
+        return self.now - crawl_url.last_fetched >= self.revisit_after
+
+    def is_tile_changed(
+        self, crawl_url: models.CrawlUrl, fingerprint: str | None
+    ) -> bool | None:
+        """Check whether a tile changed or aged since the url was fetched.
+
+        Returns None when the tile cannot tell, i.e. fingerprints are disabled or
+        unknown.
+        """
+        if (
+            self.tile_max_age is None
+            or fingerprint is None
+            or crawl_url.tile_fingerprint is None
+            or crawl_url.last_fetched is None
+        ):
+            return None
+        if fingerprint != crawl_url.tile_fingerprint:
+            return True
+        return self.now - crawl_url.last_fetched >= self.tile_max_age
+
+    def prioritize(self, url: str) -> None:
+        """Schedule a known url in place of the scheduled url with the lowest expected
+        gain which was not chosen to fetch yet, when the budget is used up
+        """
+        if self.scheduled is None or self.budget is None or url in self.scheduled:
+            return
+        if len(self.scheduled) >= self.budget:
+            pending = [u for u in self.scheduled if u not in self.selected]
+            if not pending:
+                return
+            self.scheduled.remove(min(pending, key=lambda u: (self.gains[u], u)))
+        self.scheduled.add(url)
+        self.gains[url] = 1.0
+
+    def should_fetch(self, url: str, fingerprint: str | None = None) -> bool:
+        """Record url and tile fingerprint found in a collection page, return whether to fetch it"""
+        self.seen.add(url)
+        if fingerprint is not None:
+            self.tiles[url] = fingerprint
+        crawl_url = self.crawl_urls.get(url)
+        if crawl_url is None:
+            return True
+        fetch = self.decide(crawl_url, fingerprint)
+        if fetch:
+            self.skipped.discard(url)
+        else:
+            self.skipped.add(url)
+        return fetch
+
+    def decide(self, crawl_url: models.CrawlUrl, fingerprint: str | None) -> bool:
+        """Return whether to fetch a known url"""
+        url = crawl_url.url
+        tile_changed = self.is_tile_changed(crawl_url, fingerprint)
+        if self.scheduled is not None:
+            if tile_changed is False:
+                # unchanged tile, its slot of the budget goes to a changed tile
+                if url not in self.selected:
+                    self.scheduled.discard(url)
+                return False
+            if tile_changed:
+                self.prioritize(url)
+            if not self.is_due(crawl_url):
+                return False
+            self.selected.add(url)
+            return True
+        if tile_changed is not None:
+            return tile_changed
+        if self.is_due(crawl_url):
+            return True
+        return self.rng.random() < self.sample_rate
+
+    def record_fetch(self, url: str, checksum: str) -> None:
+        """Record fetched content hash of a url, counting changes of the content"""
+        crawl_url = self.get_or_create(url)
+        self._changed.add(url)
+        if crawl_url.content_hash is not None and crawl_url.content_hash != checksum:
+            crawl_url.change_count += 1
+            crawl_url.last_changed = self.now
+        elif crawl_url.content_hash is None:
+            crawl_url.last_changed = self.now
+        crawl_url.content_hash = checksum
+        crawl_url.last_fetched = self.now
+        crawl_url.fetch_count += 1
+
+    def get_or_create(self, url: str) -> models.CrawlUrl:
+        crawl_url = self.crawl_urls.get(url)
+        if crawl_url is None:
+            crawl_url = models.CrawlUrl(
+                url=url,
+                name=string_utils.product_name_from_url(url, self.store),
+                store_id=self.store_db.id,
+                first_seen=self.now,
+                last_seen=self.now,
+            )
+            self.crawl_urls[url] = crawl_url
+            self._changed.add(url)
+        return crawl_url
+
+    def save(self, journal_: journal.Journal | None = None) -> None:
+        """Write seen urls and finished downloads of the journal to the database"""
+        for url in self.seen:
+            self.get_or_create(url).last_seen = self.now
+            self._changed.add(url)
+        if journal_ is not None:
+            for url in journal_.urls():
+                entry = journal_.get_entry(url)
+                if entry is None or entry["state"] != journal.State.DONE:
+                    continue
+                crawl_url = self.crawl_urls.get(url)
+                if (
+                    crawl_url is not None
+                    and crawl_url.last_fetched is not None
+                    and crawl_url.last_fetched.date() == self.now.date()
+                    and crawl_url.content_hash == entry["checksum"]
+                ):
+                    # already recorded by an earlier run of the same day
+                    continue
+                self.record_fetch(url, entry["checksum"])
+        for url, fingerprint in self.tiles.items():
+            # a tile is compared with the tile of the last fetched page, so a changed
+            # tile of a page that was not fetched is still seen as changed next run
+            crawl_url = self.crawl_urls.get(url)
+            if (
+                crawl_url is not None
+                and crawl_url.last_fetched is not None
+                and crawl_url.last_fetched.date() == self.now.date()
+                and crawl_url.tile_fingerprint != fingerprint
+            ):
+                crawl_url.tile_fingerprint = fingerprint
+                self._changed.add(url)
+        crud.save_crawl_urls(
+            self.engine, [self.crawl_urls[url] for url in sorted(self._changed)]
+        )
+        self._changed.clear()
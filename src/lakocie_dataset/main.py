@@ -4,11 +4,17 @@ from .config import config
 
 
 def main():
+    if config.get_migrate_storage_mode():
+        operations.migrate_storage()
+
     if config.get_latest_info_mode():
         operations.download_latest_html_files()
         if config.get_save_to_db():
             operations.save_scrapped_data_in_db(get_today_date_string())
 
+    if config.get_prices_only_mode():
+        operations.save_collection_prices_in_db()
+
     if config.get_save_history_info_to_db_mode():
         date = config.get_save_history_info_to_db_date_choice()
         if date:
@@ -19,3 +25,6 @@ def main():
 
     if config.get_gpt_extract_data_mode():
         operations.gpt_extract_data()
+
+    if config.get_pack_snapshots_mode():
+        operations.pack_snapshots()
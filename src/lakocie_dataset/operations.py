@@ -1,38 +1,84 @@
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
+from sqlalchemy import Engine
 from sqlmodel import Session, select
 
-from .scrap import downloader, scrapper, paths, io
+from .scrap import blobs, client, compression, downloader, journal, scrapper, paths, io
+from .scrap import ingest, record_cache
 from .scrap.stores import store_definitions
 from .database import sessions, models, crud
+from . import frontier
+from .config import config
 from .openai_api import communication, output_models
 
 
+# created on first use, so importing the module does not touch the database
+_engine: Engine | None = None
+
+
+def get_engine() -> Engine:
+    """Return the database engine, the database and its tables are created on the
+    first call.
+    """
+    global _engine
+    if _engine is None:
+        _engine = sessions.create_db_and_tables()
+    return _engine
+
+
 def download_latest_html_files():
     print("Download latest information:")
 
-    downloader.download_collection_files()
-    downloader.download_product_files()
+    frontiers = {}
+    if config.get_frontier():
+        frontiers = {
+            store: frontier.Frontier(get_engine(), store)
+            for store in store_definitions.StoreChoice
+        }
+        for store, store_frontier in frontiers.items():
+            if store_frontier.scheduled is not None:
+                print(f"{store}: {len(store_frontier.scheduled)} known urls scheduled")
+    try:
+        downloader.download_files(
+            link_filters={store: f.should_fetch for store, f in frontiers.items()}
+        )
+    finally:
+        client.close_sessions()
+        for store, store_frontier in frontiers.items():
+            products_dir = paths.create_products_dir(store)
+            store_frontier.save(journal.Journal(paths.get_journal_path(products_dir)))
+            print(
+                f"{store} frontier: {len(store_frontier.seen)} urls seen, "
+                f"{len(store_frontier.skipped)} known urls not fetched"
+            )
+
 
+def migrate_storage():
+    """Rewrite all saved snapshots with the configured storage compression"""
+    print("Migrate storage:")
 
-engine = sessions.create_db_and_tables()
+    compression_ = compression.Compression(config.get_compression())
+    snapshot_dirs = list(paths.iter_snapshot_dirs())
+    blob_dirs = list(blobs.get_blob_store().iter_dirs())
+    count = io.migrate_files(snapshot_dirs + blob_dirs, compression_)
+    print(f"Rewritten {count} files with {compression_.value} compression")
 
 
 def save_scrap_data_in_db(
-    scrapper_: scrapper.Scrapper,
+    record: scrapper.ProductRecord,
     store: models.Store,
     product: models.Product,
     manufacturer: models.Manufacturer,
     date: datetime = datetime.now(),
 ):
     valid_scrap_data = crud.read_valid_scrap_data_by_product_and_store(
-        engine, product, store
+        get_engine(), product, store
     )
 
-    scrap_compostion = scrapper_.get_product_composition()
-    scrap_analytical_composition = scrapper_.get_product_analytical_composition()
-    scrap_dietary_supplements = scrapper_.get_product_dietary_supplements()
+    scrap_compostion = record.composition
+    scrap_analytical_composition = record.analytical_composition
+    scrap_dietary_supplements = record.dietary_supplements
 
     if valid_scrap_data:
         conditions = [
@@ -43,20 +89,23 @@ def save_scrap_data_in_db(
         if all(conditions):
             if valid_scrap_data.valid_from > date:
                 _ = crud.update_scrap_data(
-                    engine, valid_scrap_data, is_valid=True, valid_from=date
+                    get_engine(), valid_scrap_data, is_valid=True, valid_from=date
                 )
             return
         else:
             _ = crud.update_scrap_data(
-                engine, valid_scrap_data, is_valid=False, valid_to=datetime.now()
+                get_engine(),
+                valid_scrap_data,
+                is_valid=False,
+                valid_to=datetime.now(),
             )
     scrap_data_dict = {
-        "product_name": scrapper_.get_product_name(),
+        "product_name": record.name,
         "manyfacturer": manufacturer,
-        "weight": scrapper_.get_product_weight(),
-        "flavour": scrapper_.get_product_flavour(),
-        "type": scrapper_.get_product_type(),
-        "age_group": scrapper_.get_product_age_group(),
+        "weight": record.weight,
+        "flavour": record.flavour,
+        "type": record.type,
+        "age_group": record.age_group,
         "product": product,
         "composition": scrap_compostion,
         "analytical_composition": scrap_analytical_composition,
@@ -65,24 +114,30 @@ def save_scrap_data_in_db(
         "date": date,
     }
 
-    _ = crud.create_scrap_data(engine, **scrap_data_dict)
+    _ = crud.create_scrap_data(get_engine(), **scrap_data_dict)
 
 
 def save_product_price_in_db(
-    scrapper_: scrapper.Scrapper,
+    record: scrapper.ProductRecord,
     product_db: models.Product,
     store_db: models.Store,
     date: datetime,
 ):
     same_price_in_db = crud.read_price_by_product_store_and_date(
-        engine, product_db, store_db, date
+        get_engine(), product_db, store_db, date
     )
     if same_price_in_db:
         return
-    price = scrapper_.get_product_price()
+    price = record.price
     if price == "not found":
         return
-    _ = crud.create_price(engine, price, product_db, store_db, date)
+    _ = crud.create_price(get_engine(), price, product_db, store_db, date)
+
+
+def report_skipped_file(prod_path: Path, error: ValueError):
+    print(
+        f"An error occurred while saving {prod_path} in db: {error}, \nskipping and proceeding to the next file"
+    )
 
 
 def create_product_data_saver_with_register():
@@ -90,18 +145,23 @@ def create_product_data_saver_with_register():
     ean_register = set()
 
     def save_product_data(
-        store_choice: store_definitions.StoreChoice, prod_path: Path, date: datetime
+        store_choice: store_definitions.StoreChoice,
+        prod_path: Path,
+        date: datetime,
+        record: scrapper.ProductRecord | ValueError,
     ):
+        if isinstance(record, ValueError):
+            report_skipped_file(prod_path, record)
+            return
         try:
-            soup = io.html_file_to_soup(prod_path)
-            scrapper_ = scrapper.get_scrapper(store_choice, soup)
-
-            store_db = crud.get_or_create_store_by_name(engine, store_choice.value.name)
+            store_db = crud.get_or_create_store_by_name(
+                get_engine(), store_choice.value.name
+            )
             manufacturer_db = crud.get_or_create_manufacturer(
-                engine, scrapper_.get_product_manufacturer()
+                get_engine(), record.manufacturer
             )
 
-            ean = scrapper_.get_product_ean_code()
+            ean = record.ean_code
             if ean == "not found":
                 return
             if ean in ean_register:
@@ -109,23 +169,33 @@ def create_product_data_saver_with_register():
             ean_register.add(ean)
 
             product_db = crud.get_or_create_product(
-                engine, int(scrapper_.get_product_ean_code()), manufacturer_db
+                get_engine(), int(ean), manufacturer_db
             )
 
-            save_product_price_in_db(scrapper_, product_db, store_db, date)
-            save_scrap_data_in_db(
-                scrapper_, store_db, product_db, manufacturer_db, date
+            crud.link_crawl_url_to_product(
+                get_engine(),
+                store_db,
+                prod_path.name.removesuffix(".html"),
+                product_db,
             )
+            save_product_price_in_db(record, product_db, store_db, date)
+            save_scrap_data_in_db(record, store_db, product_db, manufacturer_db, date)
         except ValueError as e:
-            print(
-                f"An error occurred while saving {prod_path} in db: {e}, \nskipping and proceeding to the next file"
-            )
+            report_skipped_file(prod_path, e)
             return
 
     return save_product_data
 
 
-def save_scrapped_data_in_db(products_download_date: str):
+def save_scrapped_data_in_db(
+    products_download_date: str, processes: int = config.get_parse_processes()
+):
+    """Save products of a snapshot day in the database.
+
+    Pages are parsed by `processes` processes, records are written by this process in
+    the order of the pages, so the first page of an EAN is saved with any number of
+    processes.
+    """
     print("Save scrapped data in db:")
 
     date: datetime
@@ -136,23 +206,119 @@ def save_scrapped_data_in_db(products_download_date: str):
             f"Invalid date format for products_download_date: {products_download_date}. Expected format: YYYY-MM-DD"
         )
 
+    cache = record_cache.open_record_cache()
     stores = list(store_definitions.StoreChoice)
-    for store in stores:
-        data_saver = create_product_data_saver_with_register()
-        products_dir = paths.get_products_dir(store, date=products_download_date)
+    try:
+        for store in stores:
+            data_saver = create_product_data_saver_with_register()
+            products_dir = paths.get_products_dir(store, date=products_download_date)
+
+            pages = io.iter_snapshot(products_dir)
+            records = ingest.iter_product_records(store, pages, processes, cache)
+            for prod_path, record in records:
+                data_saver(store, prod_path, date, record)
+    finally:
+        if cache is not None:
+            print(f"Evicted {cache.evict()} cached records")
+            cache.close()
+
+
+def save_prices_by_link(
+    store_db: models.Store, prices_by_link: dict[str, float], date: datetime
+) -> tuple[int, int]:
+    """Bulk save prices of product links with EANs known to the crawl frontier.
+
+    Return number of saved prices and number of links without a known EAN.
+    """
+    eans = {
+        crawl_url.url: crawl_url.product_ean
+        for crawl_url in crud.read_crawl_urls(get_engine(), store_db)
+        if crawl_url.product_ean is not None
+    }
+    saved_eans = {
+        price.product_ean
+        for price in crud.read_prices_by_store_and_date(
+            get_engine(), store_db, date
+        )
+    }
+    prices = []
+    for link, value in prices_by_link.items():
+        ean = eans.get(link)
+        if ean is None or ean in saved_eans:
+            continue
+        saved_eans.add(ean)
+        prices.append(
+            models.Price(value=value, product_ean=ean, store_id=store_db.id, date=date)
+        )
+    crud.create_prices(get_engine(), prices)
+    unknown = sum(1 for link in prices_by_link if link not in eans)
+    return len(prices), unknown
 
-        for prod_path in products_dir.iterdir():
-            if not prod_path.is_file():
-                continue
 
-            data_saver(store, prod_path, date)
+def save_collection_prices_in_db():
+    """Save today's prices listed in collection pages without downloading products.
+
+    Product links are matched to EANs through the crawl frontier, products not
+    ingested from a product page yet are skipped.
+    """
+    print("Save collection prices in db:")
+
+    date = datetime.strptime(paths.get_today_date_string(), "%Y-%m-%d")
+    validators = downloader.open_validators()
+    try:
+        for store in store_definitions.StoreChoice:
+            collection_prices = {}
+            collection_dir = paths.create_collections_dir(store)
+            try:
+                for sc in downloader.crawl_collection(store, collection_dir, validators):
+                    collection_prices.update(sc.get_product_prices())
+            except Exception as e:
+                print(f"A problem occurred while downloading {store} collection files: {e}")
+            finally:
+                if validators is not None:
+                    validators.save()
+
+            store_db = crud.get_or_create_store_by_name(
+                get_engine(), store.value.name
+            )
+            saved, unknown = save_prices_by_link(store_db, collection_prices, date)
+            print(f"{store}: saved {saved} prices, {unknown} products without known EAN")
+    finally:
+        client.close_sessions()
+
+
+def pack_snapshots():
+    """Pack every finished (not today's) date directory into a single archive"""
+    print("Pack snapshots:")
+
+    today = paths.get_today_date_string()
+    for date_dir in paths.iter_date_dirs():
+        if date_dir.name == today:
+            continue
+        if not any(
+            (date_dir / name).exists() or paths.get_manifest_path(date_dir / name).exists()
+            for name in ("collections", "products")
+        ):
+            continue
+        if paths.get_archive_path(date_dir / "products").exists():
+            print(f"{date_dir} is already packed")
+            continue
+        archive_path = io.pack_date_dir(date_dir)
+        print(f"packed:\t{archive_path}")
+
+    # blobs are no longer needed when no manifest points to them
+    referenced = set()
+    for manifest_path in paths.iter_manifest_paths():
+        referenced.update(blobs.Manifest(manifest_path).digests())
+    count = blobs.get_blob_store().prune(referenced)
+    print(f"Removed {count} unreferenced blobs")
 
 
 def cohere_database():
     print("Cohere database:")
 
-    all_valid_scrap_data = crud.read_all_valid_scrap_data(engine)
-    products = crud.read_products(engine)
+    all_valid_scrap_data = crud.read_all_valid_scrap_data(get_engine())
+    products = crud.read_products(get_engine())
     followed_products = filter(lambda p: p.is_followed, products)
     products_to_unfollow = []
 
@@ -166,7 +332,7 @@ def cohere_database():
             products_to_unfollow.append(p)
 
         kf_store = crud.get_or_create_store_by_name(
-            engine, store_definitions.StoreChoice.KF.value.name
+            get_engine(), store_definitions.StoreChoice.KF.value.name
         )
         kf_scraps = [s for s in scraps if s.store_id == kf_store.id]
         if "x" in kf_scraps[0].product_name.split("-")[-1]:
@@ -175,7 +341,7 @@ def cohere_database():
     if products_to_unfollow != []:
         # unfollow products
         for p in products_to_unfollow:
-            _ = crud.update_product(engine, p, is_followed=False)
+            _ = crud.update_product(get_engine(), p, is_followed=False)
 
         print("Unfollowed all products with weight problems:")
         for p in products_to_unfollow:
@@ -191,8 +357,8 @@ class ExtractionChoice(str, Enum):
 
 def get_data_to_describe(extraction_choice: ExtractionChoice):
     unique_data = set()
-    print("All products:\n\t\t\t\t", len(crud.read_products(engine)))
-    with Session(engine) as session:
+    print("All products:\n\t\t\t\t", len(crud.read_products(get_engine())))
+    with Session(get_engine()) as session:
         followed_products = session.exec(
             select(models.Product).where(models.Product.is_followed == True)
         ).all()
@@ -235,9 +401,13 @@ def describe_data_and_save_in_db(text: str, extraction_choice: ExtractionChoice)
     data_scraps = []
     match extraction_choice:
         case ExtractionChoice.ANALYTICAL_COMPONENTS:
-            data_scraps = crud.read_scrap_data_by_analytical_comosition(engine, text)
+            data_scraps = crud.read_scrap_data_by_analytical_comosition(
+                get_engine(), text
+            )
         case ExtractionChoice.DIETARY_COMPONENTS:
-            data_scraps = crud.read_scrap_data_by_dietary_supplements(engine, text)
+            data_scraps = crud.read_scrap_data_by_dietary_supplements(
+                get_engine(), text
+            )
     if data_scraps == []:
         return
 
@@ -269,7 +439,7 @@ def describe_data_and_save_in_db(text: str, extraction_choice: ExtractionChoice)
                 if component["type"] == output_models.AnalyticalComponentType.OTHER:
                     for ds in data_scraps:
                         crud.create_analytical_component(
-                            engine,
+                            get_engine(),
                             component["value"],
                             component["name"],
                             ds,
@@ -277,7 +447,7 @@ def describe_data_and_save_in_db(text: str, extraction_choice: ExtractionChoice)
                 else:
                     for ds in data_scraps:
                         crud.create_analytical_component(
-                            engine,
+                            get_engine(),
                             component["value"],
                             component["type"].name.lower(),
                             ds,
@@ -287,7 +457,7 @@ def describe_data_and_save_in_db(text: str, extraction_choice: ExtractionChoice)
             for component in data:
                 for ds in data_scraps:
                     crud.create_dietary_component(
-                        engine,
+                        get_engine(),
                         component["value"],
                         component["unit"],
                         component["name"],
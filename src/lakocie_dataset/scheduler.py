@@ -0,0 +1,134 @@
+"""
+Revisit scheduling of product urls learned from their change history
+"""
+
+import math
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import groupby
+
+from sqlalchemy import Engine
+
+from .config import config
+from .database import crud, models
+
+# unfollowed products are still revisited, but much less often than followed ones
+UNFOLLOWED_WEIGHT = 0.1
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+@dataclass
+class ChangeHistory:
+    """Number of changes observed during a number of days"""
+
+    changes: int = 0
+    days: float = 0.0
+
+
+def count_changes(values: Iterable) -> int:
+    """Return number of times consecutive values differ"""
+    values = list(values)
+    return sum(1 for a, b in zip(values, values[1:]) if a != b)
+
+
+def get_days(start: datetime, end: datetime) -> float:
+    return max(0.0, (end - start).total_seconds() / SECONDS_PER_DAY)
+
+
+def get_change_histories(
+    engine: Engine, store: models.Store, now: datetime
+) -> dict[int, ChangeHistory]:
+    """Return change history of every product of a store keyed by EAN.
+
+    Changes are price changes in `Price` rows and new `ScrapData` versions,
+    observed from the first row of a product until now.
+    """
+    histories: dict[int, ChangeHistory] = {}
+    prices = crud.read_prices_by_store(engine, store)
+    for ean, group in groupby(prices, key=lambda price: price.product_ean):
+        if ean is None:
+            continue
+        group = list(group)
+        history = histories.setdefault(ean, ChangeHistory())
+        history.changes += count_changes(price.value for price in group)
+        history.days = max(history.days, get_days(group[0].date, now))
+
+    scrap_data = crud.read_scrap_data_by_store(engine, store)
+    for ean, group in groupby(scrap_data, key=lambda scrap: scrap.ean):
+        if ean is None:
+            continue
+        group = list(group)
+        history = histories.setdefault(ean, ChangeHistory())
+        history.changes += len(group) - 1
+        history.days = max(history.days, get_days(group[0].valid_from, now))
+    return histories
+
+
+def get_change_rate(
+    history: ChangeHistory,
+    prior_changes: float = config.get_prior_changes(),
+    prior_days: float = config.get_prior_days(),
+) -> float:
+    """Return expected number of changes per day, inverse of the revisit interval.
+
+    The prior of `prior_changes` per `prior_days` dominates for products with short
+    history, so new products are neither ignored nor revisited every day.
+    """
+    return (history.changes + prior_changes) / (history.days + prior_days)
+
+
+def get_expected_gain(rate: float, days_since_fetch: float) -> float:
+    """Return probability that a page changed since it was fetched.
+
+    Changes are modelled as a Poisson process with the given rate per day.
+    """
+    return 1 - math.exp(-rate * days_since_fetch)
+
+
+def rank_urls(
+    crawl_urls: Iterable[models.CrawlUrl],
+    histories: dict[int, ChangeHistory],
+    now: datetime,
+    unfollowed: Collection[int] = frozenset(),
+    prior_changes: float = config.get_prior_changes(),
+    prior_days: float = config.get_prior_days(),
+) -> list[tuple[float, str]]:
+    """Return (expected gain, url) of fetched urls, most informative first.
+
+    Urls not linked to a product yet learn their change rate from the content hash
+    changes recorded in the frontier.
+    """
+    ranked = []
+    for crawl_url in crawl_urls:
+        if crawl_url.last_fetched is None:
+            continue
+        history = histories.get(crawl_url.product_ean)  # type: ignore
+        if history is None:
+            history = ChangeHistory(
+                crawl_url.change_count,
+                get_days(crawl_url.first_seen, crawl_url.last_fetched),
+            )
+        rate = get_change_rate(history, prior_changes, prior_days)
+        gain = get_expected_gain(rate, get_days(crawl_url.last_fetched, now))
+        if crawl_url.product_ean in unfollowed:
+            gain *= UNFOLLOWED_WEIGHT
+        ranked.append((gain, crawl_url.url))
+    ranked.sort(key=lambda item: (-item[0], item[1]))
+    return ranked
+
+
+def schedule(
+    engine: Engine,
+    store: models.Store,
+    crawl_urls: Iterable[models.CrawlUrl],
+    now: datetime,
+    budget: int,
+    unfollowed: Collection[int] = frozenset(),
+) -> dict[str, float]:
+    """Return at most `budget` known urls worth fetching in this run with their
+    expected gain
+    """
+    histories = get_change_histories(engine, store, now)
+    ranked = rank_urls(crawl_urls, histories, now, unfollowed)
+    return {url: gain for gain, url in ranked[:budget] if gain > 0}
@@ -0,0 +1,128 @@
+"""
+Single-file SQLite archives of finished daily snapshots
+"""
+
+import sqlite3
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+from . import paths
+
+
+class SnapshotArchive:
+    """Files of one `<store>/<date>` snapshot packed into a SQLite database.
+
+    Every file is a row keyed by its snapshot directory (`products`, `collections`)
+    and name, content is stored as it was on disk (possibly compressed). Rows are
+    accessed by primary key, so single files are read without scanning the archive.
+
+    Args:
+        path (Path): Archive file path.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "directory TEXT NOT NULL, name TEXT NOT NULL, content BLOB NOT NULL, "
+            "PRIMARY KEY (directory, name)) WITHOUT ROWID"
+        )
+
+    def __enter__(self) -> "SnapshotArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def add(self, directory: str, name: str, content: bytes) -> None:
+        """Add file to the archive, replacing file with the same name."""
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                (directory, name, content),
+            )
+
+    def commit(self) -> None:
+        with self._lock:
+            self._connection.commit()
+
+    def read(self, directory: str, name: str) -> bytes | None:
+        """Return stored content of a file, None if it is not archived."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content FROM files WHERE directory = ? AND name = ?",
+                (directory, name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM files WHERE directory = ? AND name = ?", key
+            ).fetchone()
+        return row is not None
+
+    def names(self, directory: str) -> list[str]:
+        """Return sorted names of files archived from a snapshot directory."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT name FROM files WHERE directory = ? ORDER BY name",
+                (directory,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_files(self, directory: str) -> Iterator[tuple[str, bytes]]:
+        """Yield (name, stored content) of files in a snapshot directory in name order.
+
+        Rows are streamed from a separate connection, so content of the whole
+        snapshot is never held in memory.
+        """
+        connection = sqlite3.connect(self.path)
+        try:
+            cursor = connection.execute(
+                "SELECT name, content FROM files WHERE directory = ? ORDER BY name",
+                (directory,),
+            )
+            yield from cursor
+        finally:
+            connection.close()
+
+
+_archives: dict[Path, SnapshotArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def get_archive(snapshot_dir: Path) -> SnapshotArchive | None:
+    """Return archive a snapshot directory was packed into, None if it is not packed."""
+    archive_path = paths.get_archive_path(snapshot_dir)
+    if not archive_path.exists():
+        return None
+    with _archives_lock:
+        archive = _archives.get(archive_path)
+        if archive is None:
+            archive = SnapshotArchive(archive_path)
+            _archives[archive_path] = archive
+        return archive
+
+
+def read(path: Path) -> bytes | None:
+    """Return stored content archived under a snapshot file path."""
+    archive = get_archive(path.parent)
+    if archive is None:
+        return None
+    return archive.read(path.parent.name, path.name)
+
+
+def close_archives() -> None:
+    """Close all opened archives."""
+    with _archives_lock:
+        for archive in _archives.values():
+            archive.close()
+        _archives.clear()
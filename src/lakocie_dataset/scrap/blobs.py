@@ -0,0 +1,178 @@
+"""
+Content-addressed store of downloaded files with per-directory manifests
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from . import paths
+from .compression import Compression, COMPRESSION_SUFFIXES, compress
+
+
+def get_digest(content: bytes) -> str:
+    """Return SHA-256 hex digest used as a blob key."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class BlobStore:
+    """Files stored once under the SHA-256 digest of their content.
+
+    Blobs are kept in `root/<first two digest characters>/<digest>.html`, identical
+    pages downloaded on different days share one blob. Digest is computed from the
+    uncompressed content, compressed blobs have an additional `.gz`/`.zst` suffix.
+
+    Args:
+        root (Path): Directory the blobs are stored in.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def get_path(self, digest: str) -> Path:
+        """Return path of the blob with the given digest.
+
+        Path of the stored variant is returned, uncompressed path if the blob is missing.
+        """
+        plain_path = self.root / digest[:2] / f"{digest}.html"
+        for suffix in COMPRESSION_SUFFIXES.values():
+            blob_path = plain_path.with_name(plain_path.name + suffix)
+            if blob_path.exists():
+                return blob_path
+        return plain_path
+
+    def __contains__(self, digest: str) -> bool:
+        return self.get_path(digest).exists()
+
+    def put(self, content: bytes, compression: Compression = Compression.NONE) -> str:
+        """Store content unless an identical blob exists. Return its digest."""
+        digest = get_digest(content)
+        if digest in self:
+            return digest
+
+        blob_path = self.root / digest[:2] / f"{digest}.html{compression.suffix}"
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=blob_path.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            file.write(compress(content, compression))
+        os.replace(tmp_path, blob_path)
+        return digest
+
+    def put_file(
+        self, tmp_path: Path, digest: str, compression: Compression = Compression.NONE
+    ) -> str:
+        """Move a written temporary file into the store unless an identical blob exists.
+
+        `tmp_path` must be on the same filesystem, e.g. created in the store root.
+        Return the digest.
+        """
+        if digest in self:
+            os.unlink(tmp_path)
+            return digest
+
+        blob_path = self.root / digest[:2] / f"{digest}.html{compression.suffix}"
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, blob_path)
+        return digest
+
+    def iter_dirs(self):
+        """Yield directories holding blobs."""
+        if self.root.exists():
+            yield from (d for d in sorted(self.root.iterdir()) if d.is_dir())
+
+    def prune(self, referenced: set[str]) -> int:
+        """Remove blobs with digests not in `referenced`. Return number of removed blobs.
+
+        Temporary files of blobs being written are kept.
+        """
+        count = 0
+        for blob_dir in self.iter_dirs():
+            for blob_path in blob_dir.iterdir():
+                if blob_path.suffix == ".tmp":
+                    continue
+                if blob_path.name.split(".", 1)[0] not in referenced:
+                    blob_path.unlink()
+                    count += 1
+        return count
+
+
+class Manifest:
+    """Mapping of file names in a snapshot directory to blob digests.
+
+    Manifest is an append-only JSON lines file, so entries added by concurrent
+    downloads are never lost when a run is interrupted.
+
+    Args:
+        path (Path): Manifest file path.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, str] = {}
+        if path.exists():
+            with open(path) as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    self._entries[entry["name"]] = entry["digest"]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, name: str) -> str | None:
+        """Return digest of the file name, None if it is not in the manifest."""
+        return self._entries.get(name)
+
+    def names(self) -> list[str]:
+        """Return sorted file names in the manifest."""
+        return sorted(self._entries)
+
+    def digests(self) -> set[str]:
+        """Return digests of all blobs the manifest points to."""
+        return set(self._entries.values())
+
+    def add(self, name: str, digest: str) -> None:
+        """Add file name pointing to a blob."""
+        with self._lock:
+            with open(self.path, "a") as file:
+                file.write(json.dumps({"name": name, "digest": digest}) + "\n")
+            self._entries[name] = digest
+
+
+_manifests: dict[Path, Manifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_blob_store(config=paths.config) -> BlobStore:
+    """Return blob store located in the htmls directory."""
+    return BlobStore(paths.get_blobs_dir(config=config))
+
+
+def get_manifest(directory: Path) -> Manifest:
+    """Return manifest of a snapshot directory, shared by all threads."""
+    manifest_path = paths.get_manifest_path(directory)
+    with _manifests_lock:
+        manifest = _manifests.get(manifest_path)
+        if manifest is None:
+            manifest = Manifest(manifest_path)
+            _manifests[manifest_path] = manifest
+        return manifest
+
+
+def resolve(path: Path, config=paths.config) -> Path | None:
+    """Return blob path stored under a snapshot file path, None if there is none."""
+    if not paths.get_manifest_path(path.parent).exists():
+        return None
+    digest = get_manifest(path.parent).get(path.name)
+    if digest is None:
+        return None
+    blob_path = get_blob_store(config=config).get_path(digest)
+    return blob_path if blob_path.exists() else None
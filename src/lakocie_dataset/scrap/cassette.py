@@ -0,0 +1,108 @@
+"""
+Cassettes of recorded HTTP responses replayed by `mock_server`
+"""
+
+import hashlib
+import json
+import threading
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import requests
+
+from ..config import config
+
+INDEX_NAME = "index.jsonl"
+BODIES_DIR = "bodies"
+# recorded bodies are already decoded, their encoding and length headers no longer apply
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def get_key(url: str) -> str:
+    """Return unquoted path and query of a URL, recorded responses are looked up by it."""
+    parts = urlsplit(url)
+    path = unquote(parts.path) or "/"
+    return f"{path}?{unquote(parts.query)}" if parts.query else path
+
+
+class Cassette:
+    """Directory of recorded responses.
+
+    Every response is a line of an append-only `index.jsonl` with the URL, status and
+    headers, bodies are stored once per sha256 in `bodies`. The last response
+    recorded for a URL wins.
+
+    Args:
+        path (Path): Directory of the cassette, created when recording.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.index_path = self.path / INDEX_NAME
+        self.bodies_dir = self.path / BODIES_DIR
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if self.index_path.exists():
+            with self.index_path.open(encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[get_key(entry["url"])] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def urls(self) -> list[str]:
+        return [entry["url"] for entry in self._entries.values()]
+
+    def get(self, url: str) -> dict | None:
+        """Return recorded entry of a URL or of a path, None if it was not recorded."""
+        return self._entries.get(get_key(url))
+
+    def read_body(self, entry: dict) -> bytes:
+        return (self.bodies_dir / entry["body"]).read_bytes()
+
+    def record(
+        self, url: str, status: int, headers: dict[str, str], body: bytes
+    ) -> None:
+        """Append a response to the cassette."""
+        digest = hashlib.sha256(body).hexdigest()
+        entry = {
+            "url": url,
+            "status": status,
+            "headers": {
+                name: value
+                for name, value in headers.items()
+                if name.lower() not in SKIPPED_HEADERS
+            },
+            "body": digest,
+        }
+        with self._lock:
+            self.bodies_dir.mkdir(parents=True, exist_ok=True)
+            body_path = self.bodies_dir / digest
+            if not body_path.exists():
+                body_path.write_bytes(body)
+            with self.index_path.open("a", encoding="utf-8") as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._entries[get_key(url)] = entry
+
+    def record_response(self, url: str, response: requests.Response) -> None:
+        """Record a response, its body is read and stays readable by the caller."""
+        self.record(url, response.status_code, dict(response.headers), response.content)
+
+
+_recorders: dict[Path, Cassette] = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder(config=config) -> Cassette | None:
+    """Return cassette recording fetched responses, None when recording is disabled."""
+    path = config.get_cassette_path()
+    if path is None:
+        return None
+    with _recorders_lock:
+        recorder = _recorders.get(path)
+        if recorder is None:
+            recorder = Cassette(path)
+            _recorders[path] = recorder
+        return recorder
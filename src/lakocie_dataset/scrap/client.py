@@ -0,0 +1,68 @@
+"""
+Shared keep-alive HTTP sessions used by all requests made during a run
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+from ..config import config
+from .rate_limit import get_host
+
+# gzip/deflate always, brotli and zstd when their optional packages are installed,
+# responses are decoded transparently by urllib3
+DEFAULT_HEADERS = make_headers(accept_encoding=True)
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def create_session(host: str, config=config) -> requests.Session:
+    """Create session with a connection pool sized for the host."""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.headers.update(config.get_http_headers())
+
+    pool_size = config.get_pool_size(host)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """Return session shared by all requests to the URL's host."""
+    host = get_host(url)
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = create_session(host)
+            _sessions[host] = session
+        return session
+
+
+def get_target_url(url: str, config=config) -> str:
+    """Return URL a request is sent to, the same URL on the mock server if it is set."""
+    mock_server = config.get_mock_server()
+    if mock_server is None:
+        return url
+    parts = urlsplit(url)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    return mock_server.rstrip("/") + (path or "/")
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Send GET request through the host's session with the configured timeout."""
+    kwargs.setdefault("timeout", config.get_http_timeout())
+    return get_session(url).get(get_target_url(url), **kwargs)
+
+
+def close_sessions() -> None:
+    """Close all open sessions and their connections."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
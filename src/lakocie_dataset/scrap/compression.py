@@ -0,0 +1,114 @@
+"""
+Compression of stored HTML snapshots
+"""
+
+import gzip
+from collections.abc import Iterator
+from contextlib import contextmanager
+from enum import Enum
+from typing import BinaryIO
+
+try:
+    import zstandard
+except ImportError:  # optional dependency, install with `lakocie-dataset[zstd]`
+    zstandard = None
+
+
+class Compression(str, Enum):
+    """Compression formats of stored files with their file name suffixes"""
+
+    NONE = "none"
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+    @property
+    def suffix(self) -> str:
+        return COMPRESSION_SUFFIXES[self]
+
+
+COMPRESSION_SUFFIXES = {
+    Compression.NONE: "",
+    Compression.GZIP: ".gz",
+    Compression.ZSTD: ".zst",
+}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ImportError(
+            "zstd compression requires the zstandard package, install lakocie-dataset[zstd]"
+        )
+    return zstandard
+
+
+def compress(data: bytes, compression: Compression) -> bytes:
+    """Compress data with the chosen format."""
+    match compression:
+        case Compression.NONE:
+            return data
+        case Compression.GZIP:
+            return gzip.compress(data, compresslevel=6, mtime=0)
+        case Compression.ZSTD:
+            return _require_zstandard().ZstdCompressor(level=10).compress(data)
+        case _:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+
+@contextmanager
+def compressing_writer(file: BinaryIO, compression: Compression) -> Iterator[BinaryIO]:
+    """Wrap a binary file, data written to the wrapper is compressed incrementally.
+
+    The file itself is left open when the wrapper is closed.
+    """
+    match compression:
+        case Compression.NONE:
+            yield file
+        case Compression.GZIP:
+            with gzip.GzipFile(
+                filename="", mode="wb", compresslevel=6, fileobj=file, mtime=0
+            ) as writer:
+                yield writer  # type: ignore
+        case Compression.ZSTD:
+            compressor = _require_zstandard().ZstdCompressor(level=10)
+            with compressor.stream_writer(file, closefd=False) as writer:
+                yield writer
+        case _:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+
+def detect(data: bytes) -> Compression:
+    """Detect compression format from the data magic number."""
+    if data.startswith(GZIP_MAGIC):
+        return Compression.GZIP
+    if data.startswith(ZSTD_MAGIC):
+        return Compression.ZSTD
+    return Compression.NONE
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompress data in any supported format, plain data is returned unchanged."""
+    match detect(data):
+        case Compression.GZIP:
+            return gzip.decompress(data)
+        case Compression.ZSTD:
+            # streamed frames have no content size in their header
+            decompressor = _require_zstandard().ZstdDecompressor().decompressobj()
+            return decompressor.decompress(data)
+        case _:
+            return data
+
+
+def get_suffix(name: str) -> str:
+    """Return compression suffix of the file name, empty string if there is none."""
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if suffix and name.endswith(suffix):
+            return suffix
+    return ""
+
+
+def strip_suffix(name: str) -> str:
+    """Return file name without the compression suffix."""
+    return name.removesuffix(get_suffix(name))
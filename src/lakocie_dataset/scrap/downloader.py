@@ -1,68 +1,274 @@
-from . import io, fetch, paths, permissions, scrapper
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from . import http_cache, io, fetch, journal, paths, permissions, scrapper
+from .parsers import PageType
 from .stores import store_definitions, string_utils
+from ..config import config
 
+# product pages waiting for a worker, per worker
+QUEUE_SIZE_PER_WORKER = 4
 
-def download_collection_files():
-    """Download all files that contain products links"""
-    stores = list(store_definitions.StoreChoice)
-    for store in stores:
+
+def open_validators() -> http_cache.ValidatorStore | None:
+    """Return store of HTTP validators if conditional requests are enabled"""
+    if not config.get_conditional_requests():
+        return None
+    return http_cache.ValidatorStore(
+        paths.get_validators_path(), config.get_htmls_dir()
+    )
+
+
+def download_file(
+    link: str,
+    save_path: paths.Path,
+    validators: http_cache.ValidatorStore | None = None,
+) -> str:
+    """Download single file unless it was already downloaded. Return its content"""
+    if io.content_exists(save_path):
+        print(f"File {save_path} already exists")
+        return io.read_content(save_path)
+    content = fetch.download_html(link, save_path, validators)
+    print(f"downloaded file:\t{save_path}")
+    return content
+
+
+def stream_file(
+    link: str,
+    save_path: paths.Path,
+    validators: http_cache.ValidatorStore | None = None,
+) -> io.SavedFile:
+    """Stream single file to disk unless it was already downloaded"""
+    if io.content_exists(save_path):
+        print(f"File {save_path} already exists")
+        return io.get_saved_file(save_path)
+    saved = fetch.stream_html(link, save_path, validators)
+    print(f"downloaded file:\t{save_path}")
+    return saved
+
+
+def download_journaled_file(
+    link: str,
+    save_path: paths.Path,
+    journal_: journal.Journal,
+    validators: http_cache.ValidatorStore | None = None,
+) -> None:
+    """Download single file recording its state, size and checksum in the journal"""
+    journal_.start(link)
+    try:
+        saved = stream_file(link, save_path, validators)
+    except Exception as e:
+        journal_.fail(link, e)
+        raise
+    journal_.done(link, saved.size, saved.checksum)
+
+
+class ProductQueue:
+    """Bounded queue of product pages downloaded by a pool of workers.
+
+    `put` blocks while the queue is full, so links are produced only as fast as
+    the workers download them. Every queued link is recorded in the journal.
+
+    Args:
+        store (StoreChoice): Store the products belong to.
+        journal_ (Journal): Journal of the products directory.
+        validators (ValidatorStore | None): HTTP validators for conditional requests.
+        workers (int): Number of concurrent downloads.
+        select_link (Callable[[str, str | None], bool] | None): Filter of new links
+            given the link and its tile fingerprint, e.g. `Frontier.should_fetch`,
+            all links are downloaded without it.
+    """
+
+    def __init__(
+        self,
+        store: store_definitions.StoreChoice,
+        journal_: journal.Journal,
+        validators: http_cache.ValidatorStore | None = None,
+        workers: int = config.get_workers(),
+        select_link: Callable[[str, str | None], bool] | None = None,
+    ) -> None:
+        self.store = store
+        self.select_link = select_link
+        self.journal = journal_
+        self.validators = validators
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers * QUEUE_SIZE_PER_WORKER)
+        self._queued_paths = {journal_.get_path(url) for url in journal_.urls()}
+
+    def __enter__(self) -> "ProductQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.join()
+
+    def _on_done(self, link: str, future: Future) -> None:
+        self._slots.release()
         try:
-            if not permissions.webscrapping_allowed(store.value.base_url):
-                print(f"Web scrapping not allowed for {store}")
-                continue
-            collection_dir = paths.create_collections_dir(store)
-            count = 1
-            save_path = collection_dir / f"collection_{count}.html"
-            if save_path.exists():
-                print(f"File {save_path} already exists")
-            else:
-                fetch.save_html(store.value.scrap_start_url, save_path)
-                print(f"downloaded file:\t{save_path}")
-            soup = io.html_file_to_soup(save_path)
-            sc = scrapper.get_scrapper(store, soup)
-            next_page_link = sc.get_next_page_link()
-            while next_page_link:
-                count += 1
-                save_path = collection_dir / f"collection_{count}.html"
-                if save_path.exists():
-                    print(f"File {save_path} already exists")
-                else:
-                    fetch.save_html(next_page_link, save_path)
-                    print(f"downloaded file:\t{save_path}")
-                soup = io.html_file_to_soup(save_path)
-                sc.change_soup(soup)
-                next_page_link = sc.get_next_page_link()
+            future.result()
         except Exception as e:
-            print(f"A problem occurred while downloading {store} collection files: {e}")
-            continue
+            print(
+                f"A problem occurred while downloading {self.store} product {link}: {e}"
+            )
 
+    def submit(self, link: str, save_path: paths.Path) -> None:
+        """Download a link already recorded in the journal"""
+        self._slots.acquire()
+        future = self._executor.submit(
+            download_journaled_file, link, save_path, self.journal, self.validators
+        )
+        future.add_done_callback(lambda f: self._on_done(link, f))
 
-def download_product_files():
-    """Download all files that contain product information"""
-    stores = list(store_definitions.StoreChoice)
-    for store in stores:
-        if not permissions.webscrapping_allowed(store.value.base_url):
-            print(f"Web scrapping not allowed for {store}")
-            continue
-        collections_dir = paths.get_latest_collections_dir(store)
-        products_dir = paths.create_products_dir(store)
-        for coll in collections_dir.iterdir():
+    def put(
+        self, link: str, products_dir: paths.Path, fingerprint: str | None = None
+    ) -> None:
+        """Queue a product link unless it was already queued or is not selected"""
+        save_path = (
+            products_dir / f"{string_utils.product_name_from_url(link, self.store)}.html"
+        )
+        if link in self.journal or save_path in self._queued_paths:
+            return
+        if self.select_link is not None and not self.select_link(link, fingerprint):
+            return
+        self._queued_paths.add(save_path)
+        self.journal.add(link, save_path)
+        self.submit(link, save_path)
+
+    def join(self) -> None:
+        """Wait until all queued products are downloaded"""
+        self._executor.shutdown(wait=True)
+
+
+def crawl_collection(
+    store: store_definitions.StoreChoice,
+    collection_dir: paths.Path,
+    validators: http_cache.ValidatorStore | None = None,
+    workers: int = config.get_workers(),
+) -> Iterator[scrapper.Scrapper]:
+    """Download collection pages of a store, yield scrapper of each page.
+
+    Number of pages is read from pagination of the first page and the remaining pages
+    are downloaded concurrently, as fast as the host's rate limit allows. When the
+    page count cannot be read, next page links are followed one page after another.
+    Pages are parsed from the downloaded content, saved files are only an archive.
+    """
+    save_path = collection_dir / "collection_1.html"
+    first_page = download_file(store.value.scrap_start_url, save_path, validators)
+    sc = scrapper.get_scrapper(store, io.content_to_soup(first_page, page_type=PageType.COLLECTION))
+    yield sc
+
+    page_links = sc.get_page_links()
+    if not page_links:
+        yield from follow_next_pages(sc, store, collection_dir, validators)
+        return
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                download_file,
+                link,
+                collection_dir / f"collection_{count}.html",
+                validators,
+            ): link
+            for count, link in enumerate(page_links, start=2)
+        }
+        for future in as_completed(futures):
             try:
-                soup = io.html_file_to_soup(coll)
-                sc = scrapper.get_scrapper(store, soup)
-                product_links = sc.get_product_links()
-                for link in product_links:
-                    save_path = (
-                        products_dir
-                        / f"{string_utils.product_name_from_url(link, store)}.html"
-                    )
-                    if save_path.exists():
-                        print(f"File {save_path} already exists")
-                    else:
-                        fetch.save_html(link, save_path)
-                        print(f"downloaded file:\t{save_path}")
+                soup = io.content_to_soup(future.result(), page_type=PageType.COLLECTION)
+                yield scrapper.get_scrapper(store, soup)
             except Exception as e:
+                failed += 1
                 print(
-                    f"A problem occurred while downloading {store} product files: {e}"
+                    f"A problem occurred while downloading {store} collection {futures[future]}: {e}"
                 )
+    if failed:
+        raise RuntimeError(f"{failed} of {len(page_links) + 1} collection pages failed")
+
+
+def follow_next_pages(
+    sc: scrapper.Scrapper,
+    store: store_definitions.StoreChoice,
+    collection_dir: paths.Path,
+    validators: http_cache.ValidatorStore | None = None,
+) -> Iterator[scrapper.Scrapper]:
+    """Download collection pages one by one following next page links.
+
+    The same scrapper is yielded for every page with its soup changed.
+    """
+    count = 2
+    link = sc.get_next_page_link()
+    while link:
+        save_path = collection_dir / f"collection_{count}.html"
+        content = download_file(link, save_path, validators)
+        sc.change_soup(io.content_to_soup(content, page_type=PageType.COLLECTION))
+        yield sc
+        link = sc.get_next_page_link()
+        count += 1
+
+
+def download_store_files(
+    store: store_definitions.StoreChoice,
+    validators: http_cache.ValidatorStore | None = None,
+    workers: int = config.get_workers(),
+    select_link: Callable[[str, str | None], bool] | None = None,
+) -> None:
+    """Download collection and product pages of a store.
+
+    Product links of each collection page go straight to the product queue, so
+    products are downloaded while the next collection page is fetched. When today's
+    journal says all links were already collected, only the remaining products are
+    downloaded.
+    """
+    products_dir = paths.create_products_dir(store)
+    journal_ = journal.Journal(paths.get_journal_path(products_dir))
+    remaining = journal_.remaining()
+    if journal_.planned:
+        print(f"Resuming {store} download: {len(remaining)} of {len(journal_)} left")
+
+    with ProductQueue(store, journal_, validators, workers, select_link) as queue:
+        for link, save_path in remaining:
+            queue.submit(link, save_path)
+        if journal_.planned:
+            return
+
+        collection_dir = paths.create_collections_dir(store)
+        try:
+            for sc in crawl_collection(store, collection_dir, validators, workers):
+                fingerprints = sc.get_product_fingerprints()
+                for link in sc.get_product_links():
+                    queue.put(link, products_dir, fingerprints.get(link))
+        except Exception as e:
+            print(f"A problem occurred while downloading {store} collection files: {e}")
+            return
+        journal_.mark_planned()
+
+
+def download_files(
+    workers: int = config.get_workers(),
+    link_filters: dict[
+        store_definitions.StoreChoice, Callable[[str, str | None], bool]
+    ]
+    | None = None,
+):
+    """Download all files that contain products links and product information.
+
+    Up to `workers` product pages are fetched concurrently, request rate is limited
+    per host by `rate_limit` token buckets. Progress is kept in a journal next to
+    the products directory, so a restarted run downloads only the pages that are
+    not done yet. `link_filters` select product links to download per store.
+    """
+    validators = open_validators()
+    link_filters = link_filters or {}
+    stores = list(store_definitions.StoreChoice)
+    for store in stores:
+        try:
+            if not permissions.webscrapping_allowed(store.value.base_url):
+                print(f"Web scrapping not allowed for {store}")
                 continue
+            download_store_files(store, validators, workers, link_filters.get(store))
+        except Exception as e:
+            print(f"A problem occurred while downloading {store} files: {e}")
+        finally:
+            if validators is not None:
+                validators.save()
@@ -1,20 +1,162 @@
+import time
+
 import requests
-from . import io, paths
+from . import cassette, client, http_cache, io, paths, permissions, rate_limit, retry
 from ..config import config
-import time
 
-sleep_time = config.get_sleep_time()
+
+# size of response body pieces written to disk while streaming
+CHUNK_SIZE = 64 * 1024
+
+
+def get_response(
+    url: str, headers: dict[str, str] | None = None, stream: bool = False
+) -> requests.Response:
+    """Send GET request to a URL.
+
+    URL is checked against the cached robots.txt policy of its host and requests are
+    throttled by the host's token bucket, never faster than robots.txt crawl delay.
+    Timeouts, connection errors and 429/5xx responses are retried with exponential
+    backoff, honouring Retry-After. Every response adapts the host's request rate
+    and feeds its circuit breaker. The last response is returned when retries run out.
+    With `stream` the body is not downloaded until it is read, unless responses are
+    recorded into the configured cassette.
+    """
+    if not permissions.webscrapping_allowed(url):
+        raise PermissionError(f"Fetching {url} is disallowed by robots.txt")
+    breaker = retry.get_breaker(url)
+    max_retries = config.get_max_retries()
+    attempt = 0
+    while True:
+        breaker.check()
+        rate_limit.acquire(url)
+        start = time.monotonic()
+        try:
+            response = client.get(url, headers=headers, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            breaker.record_failure()
+            rate_limit.record_response(url, overloaded=True)
+            if attempt == max_retries:
+                raise
+            error = f"{type(e).__name__}: {e}"
+        except requests.RequestException:
+            # not retried, but a failed trial request has to open the circuit again
+            breaker.record_failure()
+            raise
+        else:
+            latency = time.monotonic() - start
+            if response.status_code not in retry.RETRY_STATUSES:
+                breaker.record_success()
+                rate_limit.record_response(url, latency)
+                record(url, response)
+                return response
+            breaker.record_failure()
+            rate_limit.record_response(url, latency, overloaded=True)
+            retry_after = retry.parse_retry_after(response.headers.get("Retry-After"))
+            if attempt == max_retries or (
+                retry_after is not None and retry_after > config.get_backoff()[1]
+            ):
+                return response
+            if retry_after is not None:
+                # hold other workers sending requests to the host as well
+                rate_limit.pause(url, retry_after)
+            error = f"status {response.status_code}"
+            response.close()
+
+        delay = retry.get_backoff(attempt)
+        print(
+            f"Retrying {url} on {rate_limit.get_host(url)} in {delay:.1f}s "
+            f"after {error}"
+        )
+        time.sleep(delay)
+        attempt += 1
+
+
+def record(url: str, response: requests.Response) -> None:
+    """Record a response into the cassette when recording is enabled."""
+    recorder = cassette.get_recorder()
+    # not modified responses have no body to replay
+    if recorder is not None and response.status_code != 304:
+        recorder.record_response(url, response)
 
 
 def get_content(url: str) -> str:
     """Fetch content from a URL."""
-    response = requests.get(url)
+    response = get_response(url)
     response.raise_for_status()
-    time.sleep(sleep_time)
     return response.text
 
 
-def save_html(url: str, path: paths.Path) -> paths.Path:
+def download_html(
+    url: str,
+    path: paths.Path,
+    validators: http_cache.ValidatorStore | None = None,
+) -> str:
+    """Stream HTML content from a URL to a file like `stream_html`. Return the content.
+
+    With `validators` the request is conditional, when the page has not changed since
+    it was last saved the previous file is linked to `path` instead of downloaded.
+    """
+    return io.read_content(stream_html(url, path, validators).path)
+
+
+def stream_html(
+    url: str,
+    path: paths.Path,
+    validators: http_cache.ValidatorStore | None = None,
+) -> io.SavedFile:
+    """Stream HTML content from a URL to a file. Return saved file with size and checksum.
+
+    Response body is written to disk in chunks of CHUNK_SIZE through a temporary
+    file, so memory used by a download does not depend on the page size. A connection
+    dropped while the body is read is retried like a failed request, the whole page is
+    downloaded again. With `validators` the request is conditional, when the page has
+    not changed since it was last saved the previous file is linked to `path`.
+    """
+    max_retries = config.get_max_retries()
+    attempt = 0
+    while True:
+        headers = validators.request_headers(url) if validators is not None else {}
+        response = get_response(url, headers=headers, stream=True)
+        if response.status_code == 304 and validators is not None:
+            response.close()
+            cached_path = validators.get_cached_path(url)
+            if cached_path is not None:
+                io.link_content(cached_path, path)
+                validators.move(url, path)
+                return io.get_saved_file(path)
+            # cached file disappeared in the meantime, download the page again
+            response = get_response(url, stream=True)
+
+        try:
+            with response:
+                response.raise_for_status()
+                saved = io.save_stream(response.iter_content(CHUNK_SIZE), path)
+        except (
+            requests.exceptions.ChunkedEncodingError,
+            requests.ConnectionError,
+            requests.Timeout,
+        ) as e:
+            retry.get_breaker(url).record_failure()
+            if attempt == max_retries:
+                raise
+            delay = retry.get_backoff(attempt)
+            print(
+                f"Retrying {url} on {rate_limit.get_host(url)} in {delay:.1f}s "
+                f"after {type(e).__name__} while reading the body: {e}"
+            )
+            time.sleep(delay)
+            attempt += 1
+            continue
+        if validators is not None:
+            validators.update(url, response.headers, path)
+        return saved
+
+
+def save_html(
+    url: str,
+    path: paths.Path,
+    validators: http_cache.ValidatorStore | None = None,
+) -> paths.Path:
     """Save HTML content from a URL to a file. Return path to the file."""
-    content = get_content(url)
-    return io.save_content(content, path)
+    return stream_html(url, path, validators).path
@@ -0,0 +1,91 @@
+"""
+Persistent store of HTTP validators (ETag / Last-Modified) used for conditional requests
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from . import io
+
+
+class ValidatorStore:
+    """Validators of downloaded pages keyed by URL.
+
+    For every URL the store keeps `ETag` and `Last-Modified` response headers together
+    with the path of the file the response was saved to (relative to `root_dir`).
+    When the server answers a conditional request with 304 Not Modified, that file is
+    reused instead of downloading the page again.
+
+    Args:
+        path (Path): JSON file the validators are persisted in.
+        root_dir (Path): Directory saved file paths are relative to.
+    """
+
+    def __init__(self, path: Path, root_dir: Path) -> None:
+        self.path = path
+        self.root_dir = root_dir
+        self._lock = threading.Lock()
+        self._validators: dict[str, dict[str, str]] = {}
+        if path.exists():
+            with open(path) as file:
+                self._validators = json.load(file)
+
+    def __len__(self) -> int:
+        return len(self._validators)
+
+    def get_cached_path(self, url: str) -> Path | None:
+        """Return path of the file saved for the URL if it still exists."""
+        with self._lock:
+            entry = self._validators.get(url)
+        if entry is None:
+            return None
+        cached_path = self.root_dir / entry["path"]
+        return cached_path if io.content_exists(cached_path) else None
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        """Return conditional request headers for the URL.
+
+        Headers are returned only when the previously saved file can be reused.
+        """
+        if self.get_cached_path(url) is None:
+            return {}
+        with self._lock:
+            entry = self._validators[url]
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, response_headers, path: Path) -> None:
+        """Remember validators of a response saved to `path`."""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        with self._lock:
+            if not etag and not last_modified:
+                self._validators.pop(url, None)
+                return
+            self._validators[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "path": path.relative_to(self.root_dir).as_posix(),
+            }
+
+    def move(self, url: str, path: Path) -> None:
+        """Point URL validators at a new copy of the saved file."""
+        with self._lock:
+            if url in self._validators:
+                self._validators[url]["path"] = path.relative_to(
+                    self.root_dir
+                ).as_posix()
+
+    def save(self) -> None:
+        """Write validators to the JSON file."""
+        with self._lock:
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as file:
+                json.dump(self._validators, file)
+            os.replace(tmp_path, self.path)
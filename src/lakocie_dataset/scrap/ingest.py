@@ -0,0 +1,173 @@
+"""
+Parsing saved product pages into product records, optionally in a process pool
+
+Records are yielded in the order of the pages with any number of processes, so the
+database writer consuming them applies the same sequence of records every time. Pages
+with a record in the record cache are not parsed.
+"""
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from . import blobs, io, parsers, record_cache, scrapper
+from .stores import kf_scan, store_definitions
+from ..config import config
+
+# pages parsed by a process per task, larger tasks amortize sending them to the process
+PAGES_PER_TASK = 16
+# tasks submitted to the pool and not consumed yet, per process
+QUEUE_SIZE_PER_PROCESS = 4
+
+ParsedPage = tuple[Path, scrapper.ProductRecord | ValueError]
+
+
+def get_product_record(
+    store_choice: store_definitions.StoreChoice,
+    prod_path: Path,
+    content: bytes | None = None,
+) -> scrapper.ProductRecord:
+    """Return product record of a saved product page.
+
+    With `parsing.scan` Kocie Figle pages are read straight from their markup, pages
+    with markup the scan finds ambiguous are parsed.
+    """
+    if config.get_scan_products() and store_choice == store_definitions.StoreChoice.KF:
+        try:
+            data = kf_scan.scan_product(
+                content if content is not None else io.read_bytes(prod_path)
+            )
+            return scrapper.KFScrapper.to_record(data)
+        except kf_scan.AmbiguousMarkup:
+            pass
+    page_type = parsers.PageType.PRODUCT
+    soup = (
+        io.content_to_soup(content, page_type=page_type)
+        if content is not None
+        else io.html_file_to_soup(prod_path, page_type=page_type)
+    )
+    return scrapper.get_scrapper(store_choice, soup).extract()
+
+
+def parse_product_page(
+    store_choice: store_definitions.StoreChoice, prod_path: Path, content: bytes
+) -> scrapper.ProductRecord | ValueError:
+    """Return product record of a saved product page or the error reading it"""
+    try:
+        return get_product_record(store_choice, prod_path, content)
+    except ValueError as e:
+        return e
+
+
+def parse_product_pages(
+    store_choice: store_definitions.StoreChoice, pages: list[tuple[Path, bytes]]
+) -> list[ParsedPage]:
+    return [
+        (path, parse_product_page(store_choice, path, content))
+        for path, content in pages
+    ]
+
+
+def iter_batches(
+    pages: Iterable[tuple[Path, bytes]], size: int
+) -> Iterator[list[tuple[Path, bytes]]]:
+    batch = []
+    for page in pages:
+        batch.append(page)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class PageBatch:
+    """Pages parsed by one task, pages with a cached record are left out of the task
+
+    Args:
+        store_choice (StoreChoice): Store of the pages.
+        pages (list): (path, content) of the pages.
+        cache (RecordCache | None): Cache of records, None to parse all pages.
+    """
+
+    def __init__(
+        self,
+        store_choice: store_definitions.StoreChoice,
+        pages: list[tuple[Path, bytes]],
+        cache: record_cache.RecordCache | None = None,
+    ) -> None:
+        self.store_choice = store_choice
+        self.cache = cache
+        self.paths = [path for path, _ in pages]
+        self.digests = (
+            [blobs.get_digest(content) for _, content in pages]
+            if cache is not None
+            else [None] * len(pages)
+        )
+        self.cached = (
+            cache.get_many(store_choice, self.digests) if cache is not None else {}
+        )
+        self.pages = [
+            page
+            for page, digest in zip(pages, self.digests)
+            if digest not in self.cached
+        ]
+
+    def complete(self, parsed: list[ParsedPage]) -> list[ParsedPage]:
+        """Return records of all pages in order given records of the parsed pages.
+
+        Parsed records are added to the cache.
+        """
+        parsed_records = iter(record for _, record in parsed)
+        records = []
+        new_records = {}
+        for path, digest in zip(self.paths, self.digests):
+            record = self.cached.get(digest)  # type: ignore
+            if record is None:
+                record = next(parsed_records)
+                if digest is not None and isinstance(record, scrapper.ProductRecord):
+                    new_records[digest] = record
+            records.append((path, record))
+        if self.cache is not None and new_records:
+            self.cache.put_many(self.store_choice, new_records)
+        return records
+
+
+def iter_product_records(
+    store_choice: store_definitions.StoreChoice,
+    pages: Iterable[tuple[Path, bytes]],
+    processes: int = config.get_parse_processes(),
+    cache: record_cache.RecordCache | None = None,
+) -> Iterator[ParsedPage]:
+    """Yield (path, product record or error) of saved pages in the order of the pages.
+
+    Pages are parsed in batches, with more than one process by a process pool holding
+    at most `processes * QUEUE_SIZE_PER_PROCESS` batches at a time. With a cache,
+    records of pages parsed before are read from it and new records are added to it.
+    """
+    if processes == 1:
+        for pages_batch in iter_batches(pages, PAGES_PER_TASK):
+            batch = PageBatch(store_choice, pages_batch, cache)
+            yield from batch.complete(parse_product_pages(store_choice, batch.pages))
+        return
+
+    executor = ProcessPoolExecutor(max_workers=processes)
+    pending: deque[tuple[PageBatch, Future[list[ParsedPage]] | None]] = deque()
+    try:
+        for pages_batch in iter_batches(pages, PAGES_PER_TASK):
+            batch = PageBatch(store_choice, pages_batch, cache)
+            future = (
+                executor.submit(parse_product_pages, store_choice, batch.pages)
+                if batch.pages
+                else None
+            )
+            pending.append((batch, future))
+            if len(pending) >= processes * QUEUE_SIZE_PER_PROCESS:
+                batch, future = pending.popleft()
+                yield from batch.complete(future.result() if future else [])
+        while pending:
+            batch, future = pending.popleft()
+            yield from batch.complete(future.result() if future else [])
+    finally:
+        executor.shutdown(cancel_futures=True)
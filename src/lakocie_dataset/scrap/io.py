@@ -1,30 +1,314 @@
+import hashlib
 import os
-from . import paths
+import shutil
+import tempfile
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from . import archive, blobs, parsers, paths
+from .compression import Compression, COMPRESSION_SUFFIXES, compress, decompress
+from .compression import compressing_writer, get_suffix, strip_suffix
+from ..config import config
 from bs4 import BeautifulSoup
 
 
-def save_content(content: str, path: paths.Path) -> paths.Path:
-    """Save content to a file. Return path to the saved file."""
+@dataclass(frozen=True)
+class SavedFile:
+    """Content saved under a path with its size and SHA-256 checksum (uncompressed)"""
+
+    path: paths.Path
+    size: int
+    checksum: str
+
+
+def get_stored_paths(path: paths.Path) -> list[paths.Path]:
+    """Return paths content saved under path can be stored at, one per compression."""
+    return [path.with_name(path.name + s) for s in COMPRESSION_SUFFIXES.values()]
+
+
+def resolve_path(path: paths.Path) -> paths.Path | None:
+    """Return file holding content saved under path, None if nothing was saved.
+
+    Content is either a regular (possibly compressed) file or a blob referenced by the
+    directory manifest.
+    """
+    for stored_path in get_stored_paths(path):
+        if os.path.exists(stored_path):
+            return stored_path
+    return blobs.resolve(path)
+
+
+def content_exists(path: paths.Path) -> bool:
+    """Check whether content was saved under path, in a file or in a packed archive."""
+    if resolve_path(path) is not None:
+        return True
+    snapshot_archive = archive.get_archive(path.parent)
+    return snapshot_archive is not None and (
+        (path.parent.name, path.name) in snapshot_archive
+    )
+
+
+def iter_html_files(directory: paths.Path) -> Iterator[paths.Path]:
+    """Yield sorted paths of html files saved in a snapshot directory."""
+    names = set()
+    if directory.exists():
+        names.update(strip_suffix(p.name) for p in directory.iterdir() if p.is_file())
+    if paths.get_manifest_path(directory).exists():
+        names.update(blobs.get_manifest(directory).names())
+    snapshot_archive = archive.get_archive(directory)
+    if snapshot_archive is not None:
+        names.update(snapshot_archive.names(directory.name))
+    for name in sorted(names):
+        if name.endswith(".html"):
+            yield directory / name
+
+
+def iter_snapshot(directory: paths.Path) -> Iterator[tuple[paths.Path, bytes]]:
+    """Yield (path, decompressed content) of html files in a snapshot directory.
+
+    Packed snapshots are streamed straight from the archive.
+    """
+    snapshot_archive = archive.get_archive(directory)
+    if snapshot_archive is not None and not directory.exists():
+        for name, content in snapshot_archive.iter_files(directory.name):
+            if name.endswith(".html"):
+                yield directory / name, decompress(content)
+        return
+
+    for path in iter_html_files(directory):
+        yield path, read_bytes(path)
+
+
+def write_atomic(data: bytes, path: paths.Path) -> paths.Path:
+    """Write data to a temporary file and rename it to path."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def save_stream(
+    chunks: Iterable[bytes],
+    path: paths.Path,
+    deduplicate: bool = config.get_deduplicate(),
+    compression: Compression = Compression(config.get_compression()),
+) -> SavedFile:
+    """Save content streamed in chunks to a file. Return saved file with size and checksum.
+
+    Chunks are written to a temporary file and renamed into place only when the
+    whole content was written, an interrupted write never leaves a partial file
+    under `path`. With `deduplicate` content is stored in the blob store and path is
+    only recorded in the directory manifest. With `compression` file is stored
+    compressed with a `.gz`/`.zst` suffix added to its name, it is still read back
+    through `path`.
+    """
+    if not isinstance(path, paths.Path):
+        raise TypeError(f"Expected Path object, got {type(path)}")
+    elif not path.parent.exists():
+        raise FileNotFoundError(f"Directory {path.parent} not found.")
+    elif content_exists(path):
+        raise FileExistsError(f"File {path} already exists.")
+
+    blob_store = blobs.get_blob_store() if deduplicate else None
+    if blob_store is not None:
+        blob_store.root.mkdir(parents=True, exist_ok=True)
+        tmp_dir = blob_store.root
+    else:
+        tmp_dir = path.parent
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".tmp")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as file:
+            with compressing_writer(file, compression) as writer:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    writer.write(chunk)
+        checksum = digest.hexdigest()
+        if blob_store is not None:
+            blob_store.put_file(paths.Path(tmp_path), checksum, compression)
+            blobs.get_manifest(path.parent).add(path.name, checksum)
+        else:
+            os.replace(tmp_path, path.with_name(path.name + compression.suffix))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return SavedFile(path, size, checksum)
+
+
+def save_content(
+    content: str,
+    path: paths.Path,
+    deduplicate: bool = config.get_deduplicate(),
+    compression: Compression = Compression(config.get_compression()),
+) -> paths.Path:
+    """Save content to a file. Return path to the saved file.
+
+    File is written atomically, see `save_stream`.
+    """
+    return save_stream([content.encode()], path, deduplicate, compression).path
+
+
+def get_saved_file(path: paths.Path) -> SavedFile:
+    """Return already saved content with its size and checksum."""
+    content = read_bytes(path)
+    return SavedFile(path, len(content), blobs.get_digest(content))
+
+
+def link_content(
+    source: paths.Path, path: paths.Path, deduplicate: bool = config.get_deduplicate()
+) -> paths.Path:
+    """Reuse already saved file under a new path. Return path to the new file.
+
+    With `deduplicate` the new path points to the same blob in the directory
+    manifest. Otherwise file is hardlinked so both paths share the same data on disk,
+    when hardlinks are not supported it is copied.
+    """
     if not isinstance(path, paths.Path):
         raise TypeError(f"Expected Path object, got {type(path)}")
     elif not path.parent.exists():
         raise FileNotFoundError(f"Directory {path.parent} not found.")
-    elif path.exists():
+    elif content_exists(path):
         raise FileExistsError(f"File {path} already exists.")
+    source_file = resolve_path(source)
+    if source_file is None:
+        # source was packed into an archive, there is no file to link
+        return save_content(read_content(source), path, deduplicate=deduplicate)
 
-    with open(path, "w") as file:
-        file.write(content)
+    if deduplicate:
+        digest = blobs.get_manifest(source.parent).get(source.name)
+        if digest is None:
+            digest = blobs.get_blob_store().put(read_bytes(source))
+        blobs.get_manifest(path.parent).add(path.name, digest)
+        return path
+
+    # keep compression of the source file
+    target = path.with_name(path.name + get_suffix(source_file.name))
+    try:
+        os.link(source_file, target)
+    except OSError:
+        shutil.copyfile(source_file, target)
     return path
 
 
-def html_file_to_soup(path: paths.Path) -> BeautifulSoup:
+def read_stored_bytes(path: paths.Path) -> bytes:
+    """Return content saved under path as it is stored, possibly compressed."""
+    file_path = resolve_path(path)
+    if file_path is not None:
+        with open(file_path, "rb") as file:
+            return file.read()
+    content = archive.read(path)
+    if content is None:
+        raise FileNotFoundError(f"File {path} not found.")
+    return content
+
+
+def read_bytes(path: paths.Path) -> bytes:
+    """Return decompressed content saved under path."""
+    return decompress(read_stored_bytes(path))
+
+
+def read_content(path: paths.Path) -> str:
+    """Return decompressed text content saved under path."""
+    return read_bytes(path).decode()
+
+
+def html_file_to_soup(
+    path: paths.Path,
+    parser: parsers.Parser | None = None,
+    page_type: parsers.PageType | None = None,
+) -> BeautifulSoup:
     """Return BeautifulSoup object from html file path."""
     if not isinstance(path, paths.Path):
         raise TypeError(f"Expected Path object, got {type(path)}")
-    elif not os.path.exists(path):
+    elif not content_exists(path):
         raise FileNotFoundError(f"File {path} not found.")
     elif not path.name.endswith(".html"):
         raise ValueError(f"File {path} is not an html file.")
 
-    with open(path) as file:
-        return BeautifulSoup(file, "html.parser")
+    return content_to_soup(read_content(path), parser, page_type)
+
+
+def content_to_soup(
+    content: str | bytes,
+    parser: parsers.Parser | None = None,
+    page_type: parsers.PageType | None = None,
+) -> BeautifulSoup:
+    """Return BeautifulSoup object from html content.
+
+    Content is parsed by the `parser` backend, the configured one by default. When
+    partial parsing is enabled only the elements read from `page_type` are built.
+    """
+    if isinstance(content, bytes):
+        content = content.decode()
+    if parser is None:
+        parser = parsers.Parser(config.get_parser())
+    if not config.get_partial_parsing():
+        page_type = None
+    return parsers.parse(content, parser, page_type)
+
+
+def migrate_files(
+    directories: Iterable[paths.Path], compression: Compression
+) -> int:
+    """Rewrite files stored in directories with a different compression.
+
+    Files hardlinked to each other (reused by conditional requests) stay hardlinked
+    after migration. Return number of rewritten files.
+    """
+    migrated = {}
+    count = 0
+    for directory in directories:
+        for file_path in sorted(directory.iterdir()):
+            name = strip_suffix(file_path.name)
+            if not file_path.is_file() or not name.endswith(".html"):
+                continue
+            target = file_path.with_name(name + compression.suffix)
+            if target == file_path:
+                continue
+
+            stat = file_path.stat()
+            inode = (stat.st_dev, stat.st_ino)
+            if inode in migrated:
+                os.link(migrated[inode], target)
+            else:
+                with open(file_path, "rb") as file:
+                    data = compress(decompress(file.read()), compression)
+                write_atomic(data, target)
+                if stat.st_nlink > 1:
+                    migrated[inode] = target
+            file_path.unlink()
+            count += 1
+    return count
+
+
+def pack_date_dir(date_dir: paths.Path) -> paths.Path:
+    """Pack products and collections of a date directory into a single archive.
+
+    Files are copied into the archive as they are stored (compressed or not), then
+    directories with their manifests and journals are removed. Return path to the archive.
+    """
+    archive_path = paths.get_archive_path(date_dir / "products")
+    if archive_path.exists():
+        raise FileExistsError(f"Archive {archive_path} already exists.")
+
+    tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    snapshot_dirs = [date_dir / "collections", date_dir / "products"]
+    with archive.SnapshotArchive(tmp_path) as snapshot_archive:
+        for snapshot_dir in snapshot_dirs:
+            for path in iter_html_files(snapshot_dir):
+                snapshot_archive.add(
+                    snapshot_dir.name, path.name, read_stored_bytes(path)
+                )
+        snapshot_archive.commit()
+    os.replace(tmp_path, archive_path)
+
+    for snapshot_dir in snapshot_dirs:
+        if snapshot_dir.exists():
+            shutil.rmtree(snapshot_dir)
+        paths.get_manifest_path(snapshot_dir).unlink(missing_ok=True)
+        paths.get_journal_path(snapshot_dir).unlink(missing_ok=True)
+    return archive_path
@@ -0,0 +1,131 @@
+"""
+Persistent journal of downloads, used to resume interrupted crawls
+"""
+
+import json
+import threading
+from enum import Enum
+from pathlib import Path
+
+from . import io
+
+
+class State(str, Enum):
+    PENDING = "pending"
+    IN_FLIGHT = "in_flight"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class Journal:
+    """State of every URL downloaded into a snapshot directory.
+
+    Journal is an append-only JSON lines file kept next to the directory, the last
+    entry of a URL wins. Once all URLs of a run are recorded the journal is marked as
+    planned, so a restarted run takes the remaining work from the journal instead of
+    parsing collection pages again. Entries of finished downloads hold size and
+    SHA-256 checksum of the saved content.
+
+    Args:
+        path (Path): Journal file path.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.planned = False
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict] = {}
+        self._needs_newline = False
+        if path.exists():
+            with open(path) as file:
+                for line in file:
+                    self._needs_newline = not line.endswith("\n")
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # line cut off when the previous run was killed
+                        continue
+                    if entry.get("planned"):
+                        self.planned = True
+                    else:
+                        self._entries[entry["url"]] = entry
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _append(self, entry: dict) -> None:
+        with open(self.path, "a") as file:
+            if self._needs_newline:
+                file.write("\n")
+                self._needs_newline = False
+            file.write(json.dumps(entry) + "\n")
+
+    def get_state(self, url: str) -> State | None:
+        """Return state of the URL, None if it is not in the journal."""
+        entry = self._entries.get(url)
+        return State(entry["state"]) if entry is not None else None
+
+    def get_entry(self, url: str) -> dict | None:
+        """Return the last journal entry of the URL."""
+        return self._entries.get(url)
+
+    def set_state(self, url: str, state: State, **fields) -> None:
+        """Record new state of the URL, path of the URL is kept from its last entry."""
+        with self._lock:
+            previous = self._entries.get(url, {})
+            entry = {"url": url, "path": previous.get("path"), "state": state.value}
+            entry.update(fields)
+            self._append(entry)
+            self._entries[url] = entry
+
+    def add(self, url: str, path: Path) -> None:
+        """Record URL to be downloaded to `path`, relative to the journal directory."""
+        self.set_state(url, State.PENDING, path=str(path.relative_to(self.path.parent)))
+
+    def start(self, url: str) -> None:
+        self.set_state(url, State.IN_FLIGHT)
+
+    def done(self, url: str, size: int, checksum: str) -> None:
+        self.set_state(url, State.DONE, size=size, checksum=checksum)
+
+    def fail(self, url: str, error: Exception) -> None:
+        self.set_state(url, State.FAILED, error=str(error))
+
+    def mark_planned(self) -> None:
+        """Record that all URLs of the run are in the journal."""
+        with self._lock:
+            self._append({"planned": True})
+            self.planned = True
+
+    def urls(self) -> list[str]:
+        """Return URLs in the order they were added to the journal."""
+        return list(self._entries)
+
+    def get_path(self, url: str) -> Path:
+        """Return path the URL is downloaded to."""
+        return self.path.parent / self._entries[url]["path"]
+
+    def remaining(self) -> list[tuple[str, Path]]:
+        """Return (URL, path) of downloads that are not done.
+
+        Pending, failed and in-flight downloads of an interrupted run are returned, as
+        well as done downloads whose content is no longer saved. Size and checksum of
+        saved content are not checked again, files are renamed into place only when
+        their whole content was written.
+        """
+        return [
+            (url, self.get_path(url))
+            for url, entry in self._entries.items()
+            if entry["state"] != State.DONE.value
+            or not io.content_exists(self.get_path(url))
+        ]
+
+    def counts(self) -> dict[State, int]:
+        """Return number of URLs in each state."""
+        counts = {state: 0 for state in State}
+        for entry in self._entries.values():
+            counts[State(entry["state"])] += 1
+        return counts
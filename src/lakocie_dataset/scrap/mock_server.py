@@ -0,0 +1,163 @@
+"""
+Local HTTP server replaying a recorded store for offline load testing
+
+Usage:
+    uv run python -m lakocie_dataset.scrap.mock_server CASSETTE [--port 8000]
+        [--latency 0.2] [--error-rate 0.05] [--throttle-rate 0.02]
+
+Point the crawler at it with `http.mock_server` in config.yaml.
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .cassette import Cassette
+
+# statuses of injected failures, throttling and an overloaded host
+THROTTLE_STATUS = 429
+ERROR_STATUS = 503
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockStoreServer"
+
+    def do_GET(self):
+        server = self.server
+        status, headers, body = server.get_reply(self.path)
+        if server.latency:
+            time.sleep(server.rng_uniform(0, 2 * server.latency))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockStoreServer(ThreadingHTTPServer):
+    """Replays responses of a cassette, injecting latency and failures.
+
+    Paths missing from the cassette, robots.txt included, are answered with 404.
+    Served statuses are counted in `statuses`.
+
+    Args:
+        cassette (Cassette): Recorded responses.
+        port (int): Port to listen on, a free one is chosen with 0.
+        latency (float): Mean delay of a response in seconds, uniformly distributed.
+        error_rate (float): Fraction of requests answered with 503.
+        throttle_rate (float): Fraction of requests answered with 429.
+        retry_after (int): Retry-After seconds sent with injected failures.
+        seed (int | None): Seed of the injected failures.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: int | None = None,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), ReplayHandler)
+        self.cassette = cassette
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.statuses: Counter[int] = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def rng_uniform(self, a: float, b: float) -> float:
+        with self._lock:
+            return self._rng.uniform(a, b)
+
+    def get_reply(self, path: str) -> tuple[int, dict[str, str], bytes]:
+        """Return status, headers and body of the response to a path."""
+        draw = self.rng_uniform(0, 1)
+        if draw < self.throttle_rate:
+            reply = THROTTLE_STATUS, {"Retry-After": str(self.retry_after)}, b""
+        elif draw < self.throttle_rate + self.error_rate:
+            reply = ERROR_STATUS, {"Retry-After": str(self.retry_after)}, b""
+        else:
+            entry = self.cassette.get(path)
+            if entry is None:
+                reply = 404, {}, b""
+            else:
+                reply = (
+                    entry["status"],
+                    entry["headers"],
+                    self.cassette.read_body(entry),
+                )
+        with self._lock:
+            self.statuses[reply[0]] += 1
+        return reply
+
+    def start(self) -> "MockStoreServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "MockStoreServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("cassette", type=Path)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    cassette = Cassette(args.cassette)
+    server = MockStoreServer(
+        cassette,
+        args.port,
+        args.latency,
+        args.error_rate,
+        args.throttle_rate,
+        args.retry_after,
+        args.seed,
+    )
+    print(f"Replaying {len(cassette)} responses on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served statuses: {dict(server.statuses)}")
+
+
+if __name__ == "__main__":
+    main()
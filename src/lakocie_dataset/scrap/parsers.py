@@ -0,0 +1,171 @@
+"""
+HTML parser backends building BeautifulSoup objects from saved pages
+"""
+
+from enum import Enum
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .stores import kf
+
+try:
+    import lxml
+except ImportError:  # optional dependency, install with `lakocie-dataset[lxml]`
+    lxml = None
+
+try:
+    import html5lib
+except ImportError:  # optional dependency, install with `lakocie-dataset[html5lib]`
+    html5lib = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # optional dependency, install with `lakocie-dataset[selectolax]`
+    LexborHTMLParser = None
+
+
+class Parser(str, Enum):
+    """Parser backends, values are BeautifulSoup tree builder names.
+
+    SELECTOLAX is a fast path, the page is parsed by selectolax and only the elements
+    read by the store scrappers are handed over to BeautifulSoup.
+    """
+
+    HTML_PARSER = "html.parser"
+    LXML = "lxml"
+    HTML5LIB = "html5lib"
+    SELECTOLAX = "selectolax"
+
+
+class PageType(str, Enum):
+    """Types of store pages, each is read from a few elements only"""
+
+    PRODUCT = "product"
+    COLLECTION = "collection"
+
+
+PAGE_ELEMENTS = {
+    PageType.PRODUCT: kf.PRODUCT_PAGE_ELEMENTS,
+    PageType.COLLECTION: kf.COLLECTION_PAGE_ELEMENTS,
+}
+
+REQUIRED_PACKAGES = {
+    Parser.LXML: "lxml",
+    Parser.HTML5LIB: "html5lib",
+    Parser.SELECTOLAX: "selectolax",
+}
+
+
+def is_available(parser: Parser) -> bool:
+    match parser:
+        case Parser.HTML_PARSER:
+            return True
+        case Parser.LXML:
+            return lxml is not None
+        case Parser.HTML5LIB:
+            return html5lib is not None
+        case Parser.SELECTOLAX:
+            return LexborHTMLParser is not None
+
+
+def available_parsers() -> list[Parser]:
+    return [parser for parser in Parser if is_available(parser)]
+
+
+def _require(parser: Parser) -> None:
+    if not is_available(parser):
+        package = REQUIRED_PACKAGES[parser]
+        raise ImportError(
+            f"{parser.value} parser requires the {package} package, "
+            f"install lakocie-dataset[{package}]"
+        )
+
+
+def get_tree_builder() -> str:
+    """Return the fastest installed BeautifulSoup tree builder."""
+    return Parser.LXML.value if lxml is not None else Parser.HTML_PARSER.value
+
+
+def get_elements(page_type: PageType | None = None) -> list[dict]:
+    """Return elements read from a page type, from any page when it is None."""
+    if page_type is not None:
+        return PAGE_ELEMENTS[page_type]
+    return [element for elements in PAGE_ELEMENTS.values() for element in elements]
+
+
+def to_css(element: dict) -> str:
+    """Return CSS selector of an element given as tag, class and attributes."""
+    attrs = "".join(
+        f'[{name}="{value}"]' for name, value in element.get("attrs", {}).items()
+    )
+    return f"{element['tag']}.{element['class']}{attrs}"
+
+
+def _has_class(name: str):
+    return lambda value: value is not None and name in value.split()
+
+
+class ElementStrainer(SoupStrainer):
+    """Strainer building only the subtrees of the given elements.
+
+    Text and tags outside of them are skipped while the page is parsed.
+    """
+
+    def __init__(self, elements: list[dict]) -> None:
+        super().__init__()
+        self.strainers = []
+        for element in elements:
+            attrs = {**element.get("attrs", {}), "class": _has_class(element["class"])}
+            self.strainers.append(SoupStrainer(element["tag"], attrs=attrs))
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return any(
+            strainer.allow_tag_creation(nsprefix, name, attrs)
+            for strainer in self.strainers
+        )
+
+    def allow_string_creation(self, string) -> bool:
+        return False
+
+
+def prefilter(content: str, elements: list[dict] | None = None) -> str:
+    """Return HTML of the elements read by the scrappers, in document order.
+
+    Elements nested in an already kept element are not repeated. Table rows are
+    wrapped in a table, so every tree builder keeps them.
+    """
+    tree = LexborHTMLParser(content)  # type: ignore
+    selectors = [to_css(element) for element in (elements or get_elements())]
+    kept_ids = set()
+    parts = []
+    for node in tree.css(", ".join(selectors)):
+        parent = node.parent
+        while parent is not None and parent.mem_id not in kept_ids:
+            parent = parent.parent
+        if parent is not None:
+            continue
+        kept_ids.add(node.mem_id)
+        html = node.html or ""
+        parts.append(f"<table>{html}</table>" if node.tag == "tr" else html)
+    return "<html><body>" + "\n".join(parts) + "</body></html>"
+
+
+def parse(
+    content: str,
+    parser: Parser = Parser.HTML_PARSER,
+    page_type: PageType | None = None,
+) -> BeautifulSoup:
+    """Return BeautifulSoup object of HTML content built by the parser backend.
+
+    With `page_type` only the elements read from that page type are built.
+    html5lib does not support partial parsing and always builds the whole page.
+    """
+    _require(parser)
+    if parser == Parser.SELECTOLAX:
+        return BeautifulSoup(
+            prefilter(content, get_elements(page_type)), get_tree_builder()
+        )
+    if page_type is None or parser == Parser.HTML5LIB:
+        return BeautifulSoup(content, parser.value)
+    strainer = ElementStrainer(get_elements(page_type))
+    return BeautifulSoup(content, parser.value, parse_only=strainer)
@@ -11,6 +11,59 @@ def get_today_date_string() -> str:
     return datetime.now().strftime("%Y-%m-%d")
 
 
+def get_validators_path(config=config) -> Path:
+    """
+    Returns the path to the file with HTTP validators of downloaded pages
+    """
+    return config.get_htmls_dir() / "validators.json"
+
+
+def get_record_cache_path(config=config) -> Path:
+    """
+    Returns the path to the cache of product records extracted from saved pages
+    """
+    return config.get_htmls_dir() / "records.sqlite"
+
+
+def get_blobs_dir(config=config) -> Path:
+    """
+    Returns the path to the content-addressed store of downloaded files
+    """
+    return config.get_htmls_dir() / ".blobs"
+
+
+def get_manifest_path(directory: Path) -> Path:
+    """
+    Returns the path to the manifest mapping files of a snapshot directory to blobs
+    """
+    return directory.parent / f"{directory.name}.manifest.jsonl"
+
+
+def get_journal_path(directory: Path) -> Path:
+    """
+    Returns the path to the journal of downloads into a snapshot directory
+    """
+    return directory.parent / f"{directory.name}.journal.jsonl"
+
+
+def get_archive_path(directory: Path) -> Path:
+    """
+    Returns the path to the archive a snapshot directory is packed into
+    """
+    return directory.parent / "snapshot.sqlite"
+
+
+def snapshot_dir_exists(directory: Path) -> bool:
+    """
+    Checks whether snapshot directory exists on disk, in a manifest or in an archive
+    """
+    return (
+        directory.exists()
+        or get_manifest_path(directory).exists()
+        or get_archive_path(directory).exists()
+    )
+
+
 def create_date_dir(
     store: StoreChoice, date: str = get_today_date_string(), config=config
 ) -> Path:
@@ -55,7 +108,7 @@ def get_products_dir(
     """
     date_dir = config.get_htmls_dir() / store.value.name / date
     products_dir = date_dir / "products"
-    if not products_dir.exists():
+    if not snapshot_dir_exists(products_dir):
         raise FileNotFoundError(f"Products directory not found for {store} on {date}")
     return products_dir
 
@@ -68,7 +121,7 @@ def get_collections_dir(
     """
     date_dir = config.get_htmls_dir() / store.value.name / date
     collections_dir = date_dir / "collections"
-    if not collections_dir.exists():
+    if not snapshot_dir_exists(collections_dir):
         raise FileNotFoundError(
             f"Collections directory not found for {store} on {date}"
         )
@@ -83,7 +136,7 @@ def get_latest_products_dir(store: StoreChoice, config=config) -> Path:
     date_dirs = sorted(store_dir.glob("*"), reverse=True)
     for date_dir in date_dirs:
         products_dir = date_dir / "products"
-        if products_dir.exists():
+        if snapshot_dir_exists(products_dir):
             return products_dir
     raise FileNotFoundError(f"Products directory not found for {store}")
 
@@ -96,6 +149,36 @@ def get_latest_collections_dir(store: StoreChoice, config=config) -> Path:
     date_dirs = sorted(store_dir.glob("*"), reverse=True)
     for date_dir in date_dirs:
         collections_dir = date_dir / "collections"
-        if collections_dir.exists():
+        if snapshot_dir_exists(collections_dir):
             return collections_dir
     raise FileNotFoundError(f"Collections directory not found for {store}")
+
+
+def iter_date_dirs(config=config):
+    """
+    Yields date directories of all stores
+    """
+    for store in StoreChoice:
+        store_dir = config.get_htmls_dir() / store.value.name
+        if not store_dir.exists():
+            continue
+        yield from (d for d in sorted(store_dir.iterdir()) if d.is_dir())
+
+
+def iter_snapshot_dirs(config=config):
+    """
+    Yields all existing products and collections directories of all stores and dates
+    """
+    for date_dir in iter_date_dirs(config=config):
+        for name in ("collections", "products"):
+            snapshot_dir = date_dir / name
+            if snapshot_dir.is_dir():
+                yield snapshot_dir
+
+
+def iter_manifest_paths(config=config):
+    """
+    Yields manifests of all snapshot directories of all stores and dates
+    """
+    for date_dir in iter_date_dirs(config=config):
+        yield from sorted(date_dir.glob("*.manifest.jsonl"))
@@ -1,16 +1,102 @@
+import threading
+import time
 from urllib.robotparser import RobotFileParser
 from urllib.parse import urlparse
 
+import requests
+from . import client, rate_limit
+from ..config import config
 
-def webscrapping_allowed(url: str) -> bool:
-    """function checks robots.txt file for webscrapping permissions"""
+USER_AGENT = "*"
+
+# robots.txt parsers cached per host with the time they were downloaded
+_policies: dict[str, tuple[RobotFileParser, float]] = {}
+# downloads of robots.txt are serialized per host, other hosts do not wait for them
+_host_locks: dict[str, threading.Lock] = {}
+_policies_lock = threading.Lock()
+
+
+def download_robots_policy(url: str) -> RobotFileParser:
+    """Download and parse robots.txt file of the URL's host."""
     # get the base url and the robots.txt file url
     parsed_url = urlparse(url)
     base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
     robots_url = f"{base_url}/robots.txt"
 
-    # initialize and run the RobotFileParser object
+    # download robots.txt through the shared session, status codes are handled
+    # the same way as in RobotFileParser.read, a failed download disallows all
     rp = RobotFileParser()
     rp.set_url(robots_url)
-    rp.read()
-    return rp.can_fetch("*", url)
+    rate_limit.acquire(robots_url)
+    try:
+        response = client.get(robots_url)
+    except requests.RequestException as e:
+        print(f"Downloading {robots_url} failed, host is disallowed: {e}")
+        rp.disallow_all = True
+        return rp
+    if response.status_code in (401, 403):
+        rp.disallow_all = True
+    elif 400 <= response.status_code < 500:
+        rp.allow_all = True
+    elif response.status_code >= 500:
+        print(f"{robots_url} returned {response.status_code}, host is disallowed")
+        rp.disallow_all = True
+    else:
+        rp.parse(response.text.splitlines())
+    return rp
+
+
+def get_host_lock(host: str) -> threading.Lock:
+    with _policies_lock:
+        return _host_locks.setdefault(host, threading.Lock())
+
+
+def get_robots_policy(url: str, ttl: float = config.get_robots_ttl()) -> RobotFileParser:
+    """Return robots.txt policy of the URL's host.
+
+    Policy is downloaded once per host and reused for `ttl` seconds, so checking
+    permissions for every fetched URL costs no extra requests. When the download
+    fails the host is disallowed until it is retried after `ttl`. Crawl delay of the
+    downloaded policy is passed to the host's rate limiter.
+    """
+    host = rate_limit.get_host(url)
+    # downloading under the host's lock makes its concurrent workers wait for one
+    # request
+    with get_host_lock(host):
+        with _policies_lock:
+            cached = _policies.get(host)
+        if cached is not None and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+        rp = download_robots_policy(url)
+        with _policies_lock:
+            _policies[host] = (rp, time.monotonic())
+    rate_limit.set_crawl_delay(url, get_crawl_delay(rp))
+    return rp
+
+
+def webscrapping_allowed(url: str) -> bool:
+    """function checks robots.txt file for webscrapping permissions"""
+    return get_robots_policy(url).can_fetch(USER_AGENT, url)
+
+
+def get_crawl_delay(rp: RobotFileParser) -> float | None:
+    """Return seconds between requests required by robots.txt policy.
+
+    Both `Crawl-delay` and `Request-rate` directives are taken into account, the
+    stricter one wins. Return None when robots.txt has neither.
+    """
+    delays = []
+    crawl_delay = rp.crawl_delay(USER_AGENT)
+    if crawl_delay:
+        delays.append(float(crawl_delay))
+    request_rate = rp.request_rate(USER_AGENT)
+    if request_rate and request_rate.requests:
+        delays.append(request_rate.seconds / request_rate.requests)
+    return max(delays) if delays else None
+
+
+def clear_robots_policies() -> None:
+    """Forget cached robots.txt policies."""
+    with _policies_lock:
+        _policies.clear()
+        _host_locks.clear()
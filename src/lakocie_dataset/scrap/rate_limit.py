@@ -0,0 +1,167 @@
+"""
+Per-host token bucket rate limiting for concurrent downloads
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+from ..config import config
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens are refilled continuously at `rate` tokens per second up to `capacity`.
+    Every request takes one token. When the bucket is empty the caller reserves the
+    next token and waits only for the time left until it is refilled, so concurrent
+    workers are spaced out evenly instead of sleeping a fixed time after each request.
+
+    Args:
+        rate (float): Number of tokens added per second.
+        capacity (int): Maximum number of tokens (allowed burst size).
+    """
+
+    def __init__(self, rate: float, capacity: int = 1) -> None:
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        if capacity < 1:
+            raise ValueError("Token bucket capacity must be at least 1")
+
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def set_limits(self, rate: float, capacity: int) -> None:
+        """Change refill rate and capacity, tokens above new capacity are dropped."""
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        if capacity < 1:
+            raise ValueError("Token bucket capacity must be at least 1")
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+
+    def pause(self, seconds: float) -> None:
+        """Make the next token available no sooner than in `seconds`."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available. Return True on success."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def reserve(self) -> float:
+        """Reserve a token. Return number of seconds to wait before using it."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """Block until a token is available. Return time spent waiting."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+_buckets: dict[str, TokenBucket] = {}
+_crawl_delays: dict[str, float] = {}
+_adaptive_rates: dict[str, float] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_host(url: str) -> str:
+    """Return host part of the URL, used as a rate limiting key."""
+    return urlparse(url).netloc
+
+
+def get_limits(host: str, config=config) -> tuple[float, int]:
+    """Return (rate, burst) for a host, never faster than its robots.txt crawl delay."""
+    rate, burst = config.get_rate_limit(host)
+    rate = _adaptive_rates.get(host, rate)
+    crawl_delay = _crawl_delays.get(host)
+    if crawl_delay:
+        rate = min(rate, 1 / crawl_delay)
+        burst = 1
+    return rate, burst
+
+
+def set_crawl_delay(url: str, crawl_delay: float | None) -> None:
+    """Set seconds between requests required by robots.txt of the URL's host."""
+    host = get_host(url)
+    with _buckets_lock:
+        if crawl_delay:
+            _crawl_delays[host] = crawl_delay
+        else:
+            _crawl_delays.pop(host, None)
+        bucket = _buckets.get(host)
+        if bucket is not None:
+            bucket.set_limits(*get_limits(host))
+
+
+def get_bucket(url: str, config=config) -> TokenBucket:
+    """Return token bucket shared by all requests to the URL's host."""
+    host = get_host(url)
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(*get_limits(host, config=config))
+            _buckets[host] = bucket
+        return bucket
+
+
+def acquire(url: str) -> float:
+    """Wait for permission to send a request to the URL's host."""
+    return get_bucket(url).acquire()
+
+
+def pause(url: str, seconds: float) -> None:
+    """Hold all requests to the URL's host for `seconds`, e.g. after Retry-After."""
+    get_bucket(url).pause(seconds)
+
+
+def record_response(
+    url: str, latency: float | None = None, overloaded: bool = False, config=config
+) -> None:
+    """Adapt request rate of the URL's host to its responses (AIMD).
+
+    Rate grows by a constant step after every fast response and is multiplied by a
+    factor below one after an error or a response slower than `max_latency`, so it
+    settles just below what the host tolerates.
+    """
+    if not config.get_adaptive_rate():
+        return
+    host = get_host(url)
+    min_rate, max_rate = config.get_adaptive_rate_bounds()
+    increase, decrease = config.get_adaptive_rate_steps()
+    overloaded = overloaded or (latency is not None and latency > config.get_max_latency())
+    with _buckets_lock:
+        configured_rate = config.get_rate_limit(host)[0]
+        max_rate = max(max_rate, configured_rate)
+        rate = _adaptive_rates.get(host, configured_rate)
+        if overloaded:
+            rate = max(min_rate, rate * decrease)
+        else:
+            rate = min(max_rate, rate + increase)
+        _adaptive_rates[host] = rate
+        bucket = _buckets.get(host)
+        if bucket is not None:
+            bucket.set_limits(*get_limits(host, config=config))
@@ -0,0 +1,190 @@
+"""
+Persistent cache of product records extracted from saved pages
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from importlib import metadata
+from pathlib import Path
+
+import bs4
+
+from . import io, parsers, paths, scrapper
+from .stores import kf, kf_scan, store_definitions, string_utils
+from ..config import config
+
+# scrapper extracting records of a store and modules of its extraction logic
+EXTRACTORS = {
+    store_definitions.StoreChoice.KF: (
+        scrapper.KFScrapper,
+        [scrapper, parsers, io, kf, kf_scan, string_utils],
+    ),
+}
+
+
+def get_parser_version() -> str:
+    """Return configured parser backend with versions of the packages it runs on
+    and the parsing modes.
+    """
+    parser = parsers.Parser(config.get_parser())
+    versions = [parser.value, f"beautifulsoup4 {bs4.__version__}"]
+    package = parsers.REQUIRED_PACKAGES.get(parser)
+    if package is not None:
+        versions.append(f"{package} {metadata.version(package)}")
+    if config.get_partial_parsing():
+        versions.append("partial")
+    if config.get_scan_products():
+        versions.append("scan")
+    return ", ".join(versions)
+
+
+def get_extraction_version(store_choice: store_definitions.StoreChoice) -> str:
+    """Return digest of the extraction logic of a store and of the parser version.
+
+    Any change of the source of the extraction modules or of the parser changes it.
+    """
+    digest = hashlib.sha256(get_parser_version().encode())
+    for module in EXTRACTORS[store_choice][1]:
+        digest.update(Path(module.__file__).read_bytes())  # type: ignore
+    return digest.hexdigest()
+
+
+class RecordCache:
+    """Product records keyed by page content digest, scrapper and extraction version.
+
+    Records are stored as JSON in a SQLite database. Records of another extraction
+    version are never read, they are removed by `evict` together with records unused
+    for `max_age_days` and least recently used records over `max_size_mb`.
+
+    Args:
+        path (Path): Cache database path.
+        max_size_mb (float): Size of stored records kept by `evict`.
+        max_age_days (float): Days records are kept after they were last used.
+    """
+
+    def __init__(self, path: Path, max_size_mb: float, max_age_days: float) -> None:
+        self.path = path
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.max_age = max_age_days * 24 * 60 * 60
+        self._versions: dict[store_definitions.StoreChoice, str] = {}
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "digest TEXT NOT NULL, scrapper TEXT NOT NULL, version TEXT NOT NULL, "
+            "record TEXT NOT NULL, used REAL NOT NULL, "
+            "PRIMARY KEY (digest, scrapper, version)) WITHOUT ROWID"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS records_used ON records (used)"
+        )
+
+    def __enter__(self) -> "RecordCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def get_key(self, store_choice: store_definitions.StoreChoice) -> tuple[str, str]:
+        """Return scrapper name and extraction version of records of a store."""
+        version = self._versions.get(store_choice)
+        if version is None:
+            version = get_extraction_version(store_choice)
+            self._versions[store_choice] = version
+        return EXTRACTORS[store_choice][0].__name__, version
+
+    def get_many(
+        self, store_choice: store_definitions.StoreChoice, digests: list[str]
+    ) -> dict[str, scrapper.ProductRecord]:
+        """Return cached records of pages with the given content digests."""
+        scrapper_name, version = self.get_key(store_choice)
+        placeholders = ", ".join("?" * len(digests))
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT digest, record FROM records WHERE scrapper = ? AND version = ? "
+                f"AND digest IN ({placeholders})",
+                (scrapper_name, version, *digests),
+            ).fetchall()
+            if rows:
+                self._connection.execute(
+                    "UPDATE records SET used = ? WHERE scrapper = ? AND version = ? "
+                    f"AND digest IN ({', '.join('?' * len(rows))})",
+                    (time.time(), scrapper_name, version, *(row[0] for row in rows)),
+                )
+        return {
+            digest: scrapper.ProductRecord(**json.loads(record))
+            for digest, record in rows
+        }
+
+    def put_many(
+        self,
+        store_choice: store_definitions.StoreChoice,
+        records: dict[str, scrapper.ProductRecord],
+    ) -> None:
+        """Add records of pages keyed by their content digests and commit them."""
+        scrapper_name, version = self.get_key(store_choice)
+        used = time.time()
+        rows = [
+            (digest, scrapper_name, version, json.dumps(asdict(record)), used)
+            for digest, record in records.items()
+        ]
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._connection.execute("SELECT COUNT(*) FROM records").fetchone()
+        return row[0]
+
+    def evict(self) -> int:
+        """Remove records of other extraction versions, records unused for longer than
+        the age limit and least recently used records over the size limit.
+
+        Return number of removed records.
+        """
+        current = [self.get_key(store_choice) for store_choice in EXTRACTORS]
+        with self._lock:
+            removed = 0
+            for scrapper_name, version in current:
+                removed += self._connection.execute(
+                    "DELETE FROM records WHERE scrapper = ? AND version != ?",
+                    (scrapper_name, version),
+                ).rowcount
+            removed += self._connection.execute(
+                "DELETE FROM records WHERE used < ?", (time.time() - self.max_age,)
+            ).rowcount
+            removed += self._connection.execute(
+                "DELETE FROM records WHERE (digest, scrapper, version) IN ("
+                "SELECT digest, scrapper, version FROM (SELECT digest, scrapper, "
+                "version, SUM(LENGTH(record)) OVER (ORDER BY used DESC, digest) "
+                "AS size FROM records) WHERE size > ?)",
+                (self.max_size,),
+            ).rowcount
+            self._connection.commit()
+        return removed
+
+
+def open_record_cache() -> RecordCache | None:
+    """Return the record cache if it is enabled"""
+    if not config.get_record_cache():
+        return None
+    return RecordCache(
+        paths.get_record_cache_path(),
+        config.get_record_cache_max_size_mb(),
+        config.get_record_cache_max_age_days(),
+    )
@@ -0,0 +1,112 @@
+"""
+Retry backoff and per-host circuit breakers for failing requests
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from ..config import config
+from .rate_limit import get_host
+
+# responses worth retrying, the host is overloaded or temporarily unavailable
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(ConnectionError):
+    """Requests to a host are stopped after too many consecutive failures."""
+
+
+class CircuitBreaker:
+    """Stops requests to a host that keeps failing.
+
+    After `failures` consecutive failed requests the circuit opens and requests fail
+    immediately for `reset_after` seconds. Then a single trial request is let through,
+    its success closes the circuit, its failure opens it again.
+
+    Args:
+        failures (int): Consecutive failures that open the circuit.
+        reset_after (float): Seconds the circuit stays open.
+    """
+
+    def __init__(self, failures: int = 5, reset_after: float = 60) -> None:
+        self.failures = failures
+        self.reset_after = reset_after
+        self._consecutive_failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self._opened_at + self.reset_after - time.monotonic()
+            if remaining > 0 or self._trial:
+                raise CircuitOpenError(
+                    f"Circuit open after {self._consecutive_failures} failures, "
+                    f"retry in {max(remaining, 0):.0f}s"
+                )
+            self._trial = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._trial or self._consecutive_failures >= self.failures:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url: str, config=config) -> CircuitBreaker:
+    """Return circuit breaker shared by all requests to the URL's host."""
+    host = get_host(url)
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(*config.get_circuit_breaker())
+            _breakers[host] = breaker
+        return breaker
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return seconds to wait from a Retry-After header, None if it is missing or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        # HTTP dates are in GMT, a date without a zone is read as UTC
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+def get_backoff(attempt: int, config=config) -> float:
+    """Return random delay before retry number `attempt` (0-based).
+
+    Exponential backoff with full jitter, concurrent workers retrying after the same
+    error do not hit the host at the same moment.
+    """
+    base, max_backoff = config.get_backoff()
+    return random.uniform(0, min(max_backoff, base * 2**attempt))
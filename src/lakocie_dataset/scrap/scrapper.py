@@ -1,9 +1,27 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 
 from bs4 import BeautifulSoup
 from .stores import kf, store_definitions
 
 
+@dataclass(frozen=True, slots=True)
+class ProductRecord:
+    """Product information extracted from a product page"""
+
+    name: str
+    manufacturer: str
+    price: float
+    weight: str | int
+    flavour: str
+    type: str
+    age_group: str
+    ean_code: str | int
+    composition: str
+    analytical_composition: str
+    dietary_supplements: str
+
+
 class Scrapper(ABC):
     def __init__(self, soup: BeautifulSoup) -> None:
         """Initialize Scrapper object."""
@@ -13,6 +31,7 @@ class Scrapper(ABC):
             raise ValueError("BeautifulSoup object cannot be empty")
 
         self.soup = soup
+        self._record: ProductRecord | None = None
 
     def change_soup(self, soup: BeautifulSoup) -> None:
         """Change soup attribute."""
@@ -21,6 +40,19 @@ class Scrapper(ABC):
         elif not soup or not soup.find():
             raise ValueError("BeautifulSoup object cannot be empty")
         self.soup = soup
+        self._record = None
+
+    @property
+    def record(self) -> ProductRecord:
+        """Product record of self.soup, extracted once and reused by the product getters."""
+        if self._record is None:
+            self._record = self.extract()
+        return self._record
+
+    @abstractmethod
+    def extract(self) -> ProductRecord:
+        """Extract all product information in a single pass. Extract from self.soup: BeautifulSoup object."""
+        raise NotImplementedError
 
     @abstractmethod
     def get_product_name(self) -> str:
@@ -82,6 +114,21 @@ class Scrapper(ABC):
         """Extract next page URL, return None if no next page. Extract from self.soup: BeautifulSoup object."""
         raise NotImplementedError
 
+    @abstractmethod
+    def get_product_prices(self) -> dict[str, float]:
+        """Extract product prices listed on a collection page keyed by product URL. Extract from self.soup: BeautifulSoup object."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_product_fingerprints(self) -> dict[str, str]:
+        """Extract fingerprints of product tiles listed on a collection page keyed by product URL. Extract from self.soup: BeautifulSoup object."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_page_links(self) -> list[str]:
+        """Extract URLs of all collection pages after the first one, return empty list if page count is unknown. Extract from self.soup: BeautifulSoup object."""
+        raise NotImplementedError
+
     @abstractmethod
     def get_product_links(self) -> list[str]:
         """Extract list of product URLs from page. Extract from self.soup: BeautifulSoup object."""
@@ -95,64 +142,86 @@ class KFScrapper(Scrapper):
     def change_soup(self, soup: BeautifulSoup) -> None:
         super().change_soup(soup)
 
-    def get_product_name(self) -> str:
-        name = kf.get_product_name(self.soup)
-        return name if name else "not found"
+    def extract(self) -> ProductRecord:
+        return self.to_record(kf.extract_product(self.soup))
 
-    def get_product_manufacturer(self) -> str:
-        manufacturer = kf.get_product_manufacturer(self.soup)
+    @staticmethod
+    def to_record(data: dict) -> ProductRecord:
+        """Normalise product information returned by `kf.extract_product` into a record."""
+        manufacturer = data["manufacturer"]
         if manufacturer:
             manufacturer = manufacturer.lower().strip().capitalize()
-        return manufacturer if manufacturer else "not found"
+
+        size = data["weight"]
+        weight = -1
+        if size is not None and "x" not in size:
+            size = size.replace("g", "")
+            weight = int(size) if size.isdigit() else -1
+
+        ean_code = data["ean_code"]
+        if isinstance(ean_code, str):
+            ean_code = int(ean_code) if ean_code.isdigit() else ean_code
+
+        return ProductRecord(
+            name=data["name"] or "not found",
+            manufacturer=manufacturer or "not found",
+            price=data["price"] or float("nan"),
+            weight=weight,
+            flavour=data["flavour"],
+            type=data["type"],
+            age_group=data["age_group"],
+            ean_code=ean_code or "not found",
+            composition=data["composition"] or "not found",
+            analytical_composition=data["analytical_composition"] or "not found",
+            dietary_supplements=data["dietary_supplements"] or "not found",
+        )
+
+    def get_product_name(self) -> str:
+        return self.record.name
+
+    def get_product_manufacturer(self) -> str:
+        return self.record.manufacturer
 
     def get_product_price(self) -> float:
-        price = kf.get_product_price(self.soup)
-        return price if price else float("nan")
+        return self.record.price
 
     def get_product_weight(self) -> int:
-        size = kf.get_product_weight(self.soup)
-        if size is None:
-            return -1
-        if "x" in size:
-            return -1
-
-        size = size.replace("g", "")
-        return int(size) if size.isdigit() else -1
+        return self.record.weight  # type: ignore
 
     def get_product_flavour(self) -> str:
-        flavour = kf.get_product_flavour(self.soup)
-        return flavour
+        return self.record.flavour
 
     def get_product_age_group(self) -> str:
-        age_group = kf.get_product_age_group(self.soup)
-        return age_group
+        return self.record.age_group
 
     def get_product_type(self) -> str:
-        product_type = kf.get_product_type(self.soup)
-        return product_type
+        return self.record.type
 
     def get_product_ean_code(self) -> str | int:
-        ean_code = kf.get_product_ean_code(self.soup)
-        if isinstance(ean_code, str):
-            ean_code = int(ean_code) if ean_code.isdigit() else ean_code
-        return ean_code if ean_code else "not found"
+        return self.record.ean_code
 
     def get_product_composition(self) -> str:
-        composition = kf.get_product_composition(self.soup)
-        return composition if composition else "not found"
+        return self.record.composition
 
     def get_product_analytical_composition(self) -> str:
-        analytical_composition = kf.get_product_analytical_composition(self.soup)
-        return analytical_composition if analytical_composition else "not found"
+        return self.record.analytical_composition
 
     def get_product_dietary_supplements(self) -> str:
-        dietary_supplements = kf.get_product_dietary_supplements(self.soup)
-        return dietary_supplements if dietary_supplements else "not found"
+        return self.record.dietary_supplements
 
     def get_next_page_link(self) -> str | None:
         next_page_link = kf.get_next_page_link(self.soup)
         return next_page_link if next_page_link else None
 
+    def get_product_prices(self) -> dict[str, float]:
+        return kf.get_product_prices(self.soup)
+
+    def get_product_fingerprints(self) -> dict[str, str]:
+        return kf.get_product_fingerprints(self.soup)
+
+    def get_page_links(self) -> list[str]:
+        return kf.get_page_links(self.soup)
+
     def get_product_links(self) -> list[str]:
         product_links = kf.get_product_links(self.soup)
         return product_links if product_links else []
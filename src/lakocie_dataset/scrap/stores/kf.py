@@ -2,14 +2,30 @@
 Scrapping functions for Kocie Figle web shop
 """
 
+import functools
+import hashlib
+import re
+from collections.abc import Callable
 from enum import Enum
 from typing import Any
+from urllib.parse import urljoin
 from bs4 import BeautifulSoup, ResultSet
 
 from . import store_definitions
 from . import string_utils
 
 BASE_URL = store_definitions.StoreChoice.KF.value.base_url
+# collection pages are numbered in the URL path, e.g. /Karmy-Mokre/pa/4
+PAGE_NUMBER_PATTERN = re.compile(r"/pa/(\d+)")
+# price of product pages and tiles, e.g. <div class="product-price">12,99 zł</div>
+PRICE_CLASS = "product-price"
+UNAVAILABLE_PRICE = "brak towaru"
+# lazily loaded tile images keep their URL in data-src
+TILE_IMAGE_ATTRS = ("data-src", "src")
+# description paragraphs are told apart by their leading words
+COMPOSITION_MARKERS = ("Skład:", "Skład")
+ANALYTICAL_COMPOSITION_MARKER = "Składniki analityczne"
+DIETARY_SUPPLEMENTS_MARKER = "Dodatki dietetyczne na kg"
 
 
 class HtmlElement(Enum):
@@ -27,6 +43,7 @@ class HtmlElement(Enum):
         PRODUCT_DESCRIPTION_PARAGRAPHS: Paragraph elements within product description
         PAGINATION_DIV: Div element containing pagination
         PRODUCT_TILES: Figure elements representing product tiles
+        PRODUCTS_COLUMN: Div element containing product tiles of a collection page
     """
 
     INFORMATION_SECTION = {"tag": "section", "class": "product-informations"}
@@ -40,6 +57,23 @@ class HtmlElement(Enum):
     PRODUCT_DESCRIPTION_PARAGRAPHS = {"tag": "p"}
     PAGINATION_DIV = {"tag": "div", "class": "pagination"}
     PRODUCT_TILES = {"tag": "figure", "class": "product-tile"}
+    PRODUCTS_COLUMN = {"tag": "div", "class": "col-sm-9"}
+
+
+# elements read by this module on each page type, pages can be reduced to them
+# before they are parsed by BeautifulSoup
+PRODUCT_PAGE_ELEMENTS = [
+    {"tag": "h1", "class": "title"},
+    HtmlElement.INFORMATION_SECTION.value,
+    HtmlElement.PRODUCT_PARAMETER_ROWS.value,
+    HtmlElement.HIDDEN_TR.value,
+    HtmlElement.PRODUCT_DESCRIPTION.value,
+]
+# product tiles are looked up in the main products column
+COLLECTION_PAGE_ELEMENTS = [
+    HtmlElement.PRODUCTS_COLUMN.value,
+    HtmlElement.PAGINATION_DIV.value,
+]
 
 
 class ProductParameterChoice(Enum):
@@ -62,6 +96,71 @@ class ProductParameterChoice(Enum):
     ALL = [PACKAGING_WEIGHT, FLAVOUR, FOOD_TYPE, CAT_AGE]
 
 
+# attribute of a soup holding results of selector plans, stored on the soup itself
+# so they are freed together with it
+MEMO_ATTRIBUTE = "_selector_memo"
+
+
+def find_one(tag: str, class_: str, attrs: dict | None = None) -> Callable:
+    return lambda soup: soup.find(tag, class_=class_, attrs=attrs or {})
+
+
+def find_every(tag: str, class_: str | None = None) -> Callable:
+    if class_ is None:
+        return lambda soup: soup.find_all(tag)
+    return lambda soup: soup.find_all(tag, class_=class_)
+
+
+def find_within(outer: HtmlElement, find: Callable) -> Callable:
+    """Return plan applying `find` to the memoized result of the `outer` plan."""
+
+    def plan(soup: BeautifulSoup) -> Any:
+        outer_soup = find_element(soup, outer)
+        return find(outer_soup) if outer_soup is not None else None
+
+    return plan
+
+
+def compile_plan(choice: HtmlElement) -> Callable[[BeautifulSoup], Any]:
+    """Return finder callable of an HTML element choice."""
+    element = choice.value
+    match choice:
+        case HtmlElement.INFORMATION_SECTION | HtmlElement.PAGINATION_DIV:
+            return find_one(element["tag"], element["class"])
+        case HtmlElement.PRODUCT_PARAMETER_ROWS | HtmlElement.HIDDEN_TR:
+            return find_every(element["tag"], element["class"])
+        case HtmlElement.PRODUCT_DESCRIPTION:
+            return find_one(element["tag"], element["class"], element["attrs"])
+        case HtmlElement.PRODUCT_DESCRIPTION_PARAGRAPHS:
+            paragraphs = find_within(
+                HtmlElement.PRODUCT_DESCRIPTION, find_every(element["tag"])
+            )
+            return lambda soup: paragraphs(soup) or []
+        case HtmlElement.PRODUCT_TILES:
+            return find_within(
+                HtmlElement.PRODUCTS_COLUMN, find_every(element["tag"], element["class"])
+            )
+        case HtmlElement.PRODUCTS_COLUMN:
+            return find_one(element["tag"], element["class"])
+    raise ValueError(f"No selector plan for {choice}")
+
+
+def find_element(soup: BeautifulSoup, choice: HtmlElement) -> Any:
+    """Return element(s) of the soup specified by HTML element choice.
+
+    Selector plans are compiled once at import and their results are memoized per
+    soup, so every element of a page is searched for once.
+    """
+    memo = soup.__dict__.get(MEMO_ATTRIBUTE)
+    if memo is None:
+        memo = {}
+        # bypass Tag.__setattr__/__getattr__, which would search for a child tag
+        soup.__dict__[MEMO_ATTRIBUTE] = memo
+    if choice not in memo:
+        memo[choice] = SELECTOR_PLANS[choice](soup)
+    return memo[choice]
+
+
 def select(choice: HtmlElement):
     """Decorator that filters BeautifulSoup object based on HTML element choice.
 
@@ -85,55 +184,18 @@ def select(choice: HtmlElement):
     """
 
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(soup: BeautifulSoup, *args, **kwargs):
-            match choice:
-                case HtmlElement.INFORMATION_SECTION:
-                    filtered_soup = soup.find(
-                        choice.value["tag"], class_=choice.value["class"]
-                    )
-                case HtmlElement.PRODUCT_PARAMETER_ROWS:
-                    filtered_soup = soup.find_all(
-                        choice.value["tag"], class_=choice.value["class"]
-                    )
-                case HtmlElement.HIDDEN_TR:
-                    filtered_soup = soup.find_all(
-                        choice.value["tag"], class_=choice.value["class"]
-                    )
-                case HtmlElement.PRODUCT_DESCRIPTION:
-                    filtered_soup = soup.find(
-                        choice.value["tag"],
-                        class_=choice.value["class"],
-                        attrs=choice.value["attrs"],
-                    )
-                case HtmlElement.PRODUCT_DESCRIPTION_PARAGRAPHS:
-
-                    @select(HtmlElement.PRODUCT_DESCRIPTION)
-                    def get_desc_soup(soup: BeautifulSoup):
-                        return soup
-
-                    desc = get_desc_soup(soup)
-                    filtered_soup = desc.find_all(
-                        choice.value["tag"],
-                    )  # type: ignore
-                case HtmlElement.PAGINATION_DIV:
-                    filtered_soup = soup.find(
-                        choice.value["tag"], class_=choice.value["class"]
-                    )
-                case HtmlElement.PRODUCT_TILES:
-                    main_products_div = soup.find("div", class_="col-sm-9")
-                    filtered_soup = (
-                        main_products_div.find_all("figure", class_="product-tile")  # type: ignore
-                        if main_products_div
-                        else None
-                    )
-
-            return func(filtered_soup, *args, **kwargs)
+            return func(find_element(soup, choice), *args, **kwargs)
 
         return wrapper
 
     return decorator
 
 
+SELECTOR_PLANS = {choice: compile_plan(choice) for choice in HtmlElement}
+
+
 """Product related functions"""
 
 
@@ -151,18 +213,28 @@ def get_product_manufacturer(soup: BeautifulSoup) -> str | None:
     return extract_info_from_name(prod_name)[0] if prod_name else None
 
 
+def parse_price(text: str) -> float:
+    """Return value of a price text like "12.99 zł" or "1 299,99 zł".
+
+    Raises ValueError when the text is not a price.
+    """
+    return float("".join(text.lower().replace("zł", "").replace(",", ".").split()))
+
+
 @select(HtmlElement.INFORMATION_SECTION)
 def get_product_price(soup: BeautifulSoup) -> float | None:
-    product_price_divs = soup.find_all("div", class_="product-price")
+    product_price_divs = soup.find_all("div", class_=PRICE_CLASS)
     try:
         prices = (
             list(map(lambda x: x.text.strip().lower(), product_price_divs))
             if product_price_divs
             else None
         )
-        prices = list(filter(lambda x: x != "brak towaru", prices)) if prices else None
+        prices = (
+            list(filter(lambda x: x != UNAVAILABLE_PRICE, prices)) if prices else None
+        )
         if prices is not None and len(prices) == 1:
-            return float(prices[0].replace("zł", ""))
+            return parse_price(prices[0])
         else:
             print(f"Many prices in {soup}")
     except Exception as e:
@@ -187,36 +259,35 @@ def get_product_parameters(
     return parameters
 
 
+def get_parameter(
+    parameters: dict[str, str | int],
+    par_choice: ProductParameterChoice,
+    default: str | None = "not found",
+) -> str | None:
+    value = parameters.get(par_choice.value, None)
+    if value is None:
+        return default
+    return str(value)
+
+
 def get_product_weight(soup: BeautifulSoup) -> str | None:
     parameters = get_product_parameters(soup)
-    size = parameters.get(ProductParameterChoice.PACKAGING_WEIGHT.value, None)
-    if size is None:
-        return None
-    return str(size)
+    return get_parameter(parameters, ProductParameterChoice.PACKAGING_WEIGHT, None)
 
 
 def get_product_flavour(soup: BeautifulSoup) -> str:
     parameters = get_product_parameters(soup)
-    flavour = parameters.get(ProductParameterChoice.FLAVOUR.value, None)
-    if flavour is None:
-        return "not found"
-    return str(flavour)
+    return get_parameter(parameters, ProductParameterChoice.FLAVOUR)  # type: ignore
 
 
 def get_product_age_group(soup: BeautifulSoup) -> str:
     parameters = get_product_parameters(soup)
-    age_group = parameters.get(ProductParameterChoice.CAT_AGE.value, None)
-    if age_group is None:
-        return "not found"
-    return str(age_group)
+    return get_parameter(parameters, ProductParameterChoice.CAT_AGE)  # type: ignore
 
 
 def get_product_type(soup: BeautifulSoup) -> str:
     parameters = get_product_parameters(soup)
-    product_type = parameters.get(ProductParameterChoice.FOOD_TYPE.value, None)
-    if product_type is None:
-        return "not found"
-    return str(product_type)
+    return get_parameter(parameters, ProductParameterChoice.FOOD_TYPE)  # type: ignore
 
 
 @select(HtmlElement.HIDDEN_TR)
@@ -238,6 +309,15 @@ def get_product_ean_code(soup: BeautifulSoup | ResultSet[Any]) -> int | None:
     return None
 
 
+def find_paragraph(texts: list[str], *markers: str) -> str | None:
+    """Return first stripped paragraph text containing a marker, markers are tried in order."""
+    for marker in markers:
+        text = next((text for text in texts if marker in text), None)
+        if text is not None:
+            return text.strip()
+    return None
+
+
 @select(HtmlElement.PRODUCT_DESCRIPTION)
 def get_product_description(soup: BeautifulSoup) -> BeautifulSoup | ResultSet[Any]:
     return soup
@@ -255,10 +335,7 @@ def get_product_composition(soup: BeautifulSoup | ResultSet[Any]) -> str | None:
     if type(soup) is BeautifulSoup:
         raise Exception("Expected ResultSet, got BeautifulSoup")
 
-    composition = next((p.text.strip() for p in soup if "Skład:" in p.text), None)
-    if composition is None:
-        composition = next((p.text.strip() for p in soup if "Skład" in p.text), None)
-    return composition
+    return find_paragraph([p.text for p in soup], *COMPOSITION_MARKERS)
 
 
 @select(HtmlElement.PRODUCT_DESCRIPTION_PARAGRAPHS)
@@ -268,22 +345,92 @@ def get_product_analytical_composition(
     if type(soup) is BeautifulSoup:
         raise Exception("Expected ResultSet, got BeautifulSoup")
 
-    analytical_composition = next(
-        (p.text.strip() for p in soup if "Składniki analityczne" in p.text),  # type: ignore
-        None,
-    )
-    return analytical_composition
+    return find_paragraph([p.text for p in soup], ANALYTICAL_COMPOSITION_MARKER)
 
 
 @select(HtmlElement.PRODUCT_DESCRIPTION_PARAGRAPHS)
 def get_product_dietary_supplements(soup: BeautifulSoup | ResultSet[Any]) -> str | None:
     if type(soup) is BeautifulSoup:
         raise Exception("Expected ResultSet, got BeautifulSoup")
-    diatairy_supplements = next(
-        (p.text.strip() for p in soup if "Dodatki dietetyczne na kg" in p.text),  # type: ignore
-        None,
-    )
-    return diatairy_supplements
+    return find_paragraph([p.text for p in soup], DIETARY_SUPPLEMENTS_MARKER)
+
+
+def find_product_elements(soup: BeautifulSoup) -> dict[str, Any]:
+    """Return elements read from a product page, found in a single walk of the DOM.
+
+    Matches the same elements as `get_product_name` and `find_element`: the first
+    title, information section and description, all parameter and hidden rows.
+    """
+    elements: dict[str, Any] = {
+        "title": None,
+        "information": None,
+        "description": None,
+        "parameter_rows": [],
+        "hidden_rows": [],
+    }
+    for tag in soup.find_all(True):
+        name = tag.name
+        if name not in ("h1", "section", "div", "tr"):
+            continue
+        classes = tag.get("class") or ()
+        if name == "div":
+            if HtmlElement.PRODUCT_PARAMETER_ROWS.value["class"] in classes:
+                elements["parameter_rows"].append(tag)
+            elif (
+                elements["description"] is None
+                and HtmlElement.PRODUCT_DESCRIPTION.value["class"] in classes
+                and tag.get("data-tab") == "description"
+            ):
+                elements["description"] = tag
+        elif name == "tr":
+            if HtmlElement.HIDDEN_TR.value["class"] in classes:
+                elements["hidden_rows"].append(tag)
+        elif name == "h1":
+            if elements["title"] is None and "title" in classes:
+                elements["title"] = tag
+        elif (
+            elements["information"] is None
+            and HtmlElement.INFORMATION_SECTION.value["class"] in classes
+        ):
+            elements["information"] = tag
+    return elements
+
+
+def extract_product(soup: BeautifulSoup) -> dict[str, Any]:
+    """Return all product information of a product page keyed by getter name.
+
+    The DOM is walked once, values are the same as returned by the
+    `get_product_*` functions.
+    """
+    elements = find_product_elements(soup)
+    name = elements["title"].text if elements["title"] is not None else None
+    information = elements["information"]
+    parameters = get_product_parameters.__wrapped__(elements["parameter_rows"])
+    description = elements["description"]
+    paragraphs = description.find_all("p") if description is not None else []
+    return {
+        "name": name,
+        "manufacturer": extract_info_from_name(name)[0] if name else None,
+        "price": (
+            get_product_price.__wrapped__(information)
+            if information is not None
+            else None
+        ),
+        "weight": get_parameter(
+            parameters, ProductParameterChoice.PACKAGING_WEIGHT, None
+        ),
+        "flavour": get_parameter(parameters, ProductParameterChoice.FLAVOUR),
+        "type": get_parameter(parameters, ProductParameterChoice.FOOD_TYPE),
+        "age_group": get_parameter(parameters, ProductParameterChoice.CAT_AGE),
+        "ean_code": get_product_ean_code.__wrapped__(elements["hidden_rows"]),
+        "composition": get_product_composition.__wrapped__(paragraphs),
+        "analytical_composition": get_product_analytical_composition.__wrapped__(
+            paragraphs
+        ),
+        "dietary_supplements": get_product_dietary_supplements.__wrapped__(
+            paragraphs
+        ),
+    }
 
 
 """collection product pages functions"""
@@ -307,6 +454,29 @@ def get_next_page_link(soup: BeautifulSoup) -> str | None:
         return None
 
 
+@select(HtmlElement.PAGINATION_DIV)
+def get_page_links(soup: BeautifulSoup) -> list[str]:
+    """Return links to collection pages 2..N, N is the highest page number in pagination.
+
+    Returns an empty list when there is no pagination or no numbered page link.
+    """
+    if soup is None:
+        return []
+    numbered_hrefs = {}
+    for link in soup.find_all("a", href=True):  # type: ignore
+        match = PAGE_NUMBER_PATTERN.search(str(link["href"]))  # type: ignore
+        if match:
+            numbered_hrefs[int(match.group(1))] = str(link["href"])  # type: ignore
+    if not numbered_hrefs:
+        return []
+    page_count = max(numbered_hrefs)
+    href = numbered_hrefs[page_count]
+    return [
+        urljoin(BASE_URL, PAGE_NUMBER_PATTERN.sub(f"/pa/{page}", href))
+        for page in range(2, page_count + 1)
+    ]
+
+
 @select(HtmlElement.PRODUCT_TILES)
 def get_product_tiles(soup: BeautifulSoup) -> list[BeautifulSoup] | None:
     if type(soup) is None:
@@ -323,3 +493,61 @@ def get_product_link(soup: BeautifulSoup) -> str | None:
 @select(HtmlElement.PRODUCT_TILES)
 def get_product_links(soup: list[BeautifulSoup] | BeautifulSoup) -> list[str]:
     return list(map(get_product_link, soup))  # type: ignore
+
+
+def get_tile_price(tile: BeautifulSoup) -> float | None:
+    """Return price shown in a product tile, None when it is missing or unavailable.
+
+    Prices are read like by `get_product_price`, only from product price divs, so old
+    prices of discounted products are skipped. A tile with more prices has none.
+    """
+    prices = [
+        div.text.strip().lower() for div in tile.find_all("div", class_=PRICE_CLASS)
+    ]
+    prices = [price for price in prices if price != UNAVAILABLE_PRICE]
+    if len(prices) != 1:
+        return None
+    try:
+        return parse_price(prices[0])
+    except ValueError:
+        return None
+
+
+@select(HtmlElement.PRODUCT_TILES)
+def get_product_prices(soup: list[BeautifulSoup] | BeautifulSoup) -> dict[str, float]:
+    """Return prices of products listed in collection page tiles keyed by product link."""
+    prices = {}
+    for tile in soup or []:  # type: ignore
+        link = get_product_link(tile)
+        price = get_tile_price(tile)
+        if link is not None and price is not None:
+            prices[link] = price
+    return prices
+
+
+def get_tile_fingerprint(tile: BeautifulSoup) -> str:
+    """Return sha256 of what a product tile shows: name, price, availability and image.
+
+    Visible text of the tile is hashed with whitespace collapsed, so markup changes
+    that do not change what the tile shows keep the fingerprint.
+    """
+    text = " ".join(tile.get_text(" ").split())
+    image = tile.find("img")
+    image_url = next(
+        (str(image[attr]) for attr in TILE_IMAGE_ATTRS if image and image.get(attr)),  # type: ignore
+        "",
+    )
+    return hashlib.sha256(f"{text}\n{image_url}".encode("utf-8")).hexdigest()
+
+
+@select(HtmlElement.PRODUCT_TILES)
+def get_product_fingerprints(
+    soup: list[BeautifulSoup] | BeautifulSoup,
+) -> dict[str, str]:
+    """Return tile fingerprints of products listed in a collection page keyed by product link."""
+    fingerprints = {}
+    for tile in soup or []:  # type: ignore
+        link = get_product_link(tile)
+        if link is not None:
+            fingerprints[link] = get_tile_fingerprint(tile)
+    return fingerprints
@@ -0,0 +1,291 @@
+"""
+DOM-free extraction of Kocie Figle product pages
+
+The fields read by `kf.extract_product` sit at stable places in the markup: the
+title, price in the information section, parameter rows, the hidden EAN row and
+description paragraphs. They are scanned from the raw bytes of a page and only their
+text is decoded. Markup the scan cannot read the same way as BeautifulSoup raises
+`AmbiguousMarkup`, such pages are left to the DOM path.
+"""
+
+import html
+import re
+from html.entities import name2codepoint
+from typing import Any
+
+from . import kf
+
+# attributes of a start tag, quoted values may contain ">"
+ATTRS = rb"""((?:[^>"']|"[^"]*"|'[^']*')*)"""
+ATTR_PATTERN = re.compile(
+    rb"""([^\s"'>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?"""
+)
+TAG_PATTERN = re.compile(rb"</?[a-zA-Z][^\s/>]*" + ATTRS + rb">")
+# strings of these elements are left out of `Tag.text` by BeautifulSoup
+UNREAD_TAG_PATTERN = re.compile(rb"<(rt|rp|template)\b", re.I)
+REFERENCE_PATTERN = re.compile(
+    r"&(?:#(\d+);|#[xX]([0-9a-fA-F]+);|([a-zA-Z][a-zA-Z0-9]*);)?"
+)
+# code points referenced the same way by html.unescape and BeautifulSoup
+READ_CODE_POINTS = [
+    (9, 10),
+    (13, 13),
+    (32, 126),
+    (160, 0xD7FF),
+    (0xE000, 0xFDCF),
+    (0xFDF0, 0xFFFD),
+]
+# start tags read from a product page, the class or attribute they are told apart by
+# must occur in their markup
+PRODUCT_START_TAGS = {
+    b"h1": (b"title",),
+    b"section": (b"product-informations",),
+    b"div": (b"product-parameter-row", b"data-tab"),
+    b"tr": (b"hidden",),
+}
+# comments, scripts and styles, their content is not markup
+OPAQUE_STARTS = (b"<!--", b"<script", b"<style")
+# whole comments, scripts and styles, unclosed ones (group 1) and start tags of
+# product elements with one of the needles (tag in group 2, attributes in group 3),
+# other tags are skipped by the pattern
+TOKEN_PATTERN = re.compile(
+    rb"<!--[^-]*+(?:-(?!->)[^-]*+)*+-->"
+    rb"|<script(?=[\s/>])[^<]*+(?:<(?!/script)[^<]*+)*+</script"
+    rb"|<style(?=[\s/>])[^<]*+(?:<(?!/style)[^<]*+)*+</style"
+    rb"|<(?:!--|script|style)()"
+    rb"|<("
+    + b"|".join(PRODUCT_START_TAGS)
+    + rb")(?=[\s/>])(?=[^>]*(?:"
+    + b"|".join(
+        re.escape(needle)
+        for needles in PRODUCT_START_TAGS.values()
+        for needle in needles
+    )
+    + rb"|&))"
+    + ATTRS
+    + rb">",
+    re.S,
+)
+
+_tag_patterns: dict[bytes, re.Pattern] = {}
+
+
+class AmbiguousMarkup(Exception):
+    """Markup the scan cannot read the same way as BeautifulSoup"""
+
+
+def get_tag_pattern(tag: bytes) -> re.Pattern:
+    """Return pattern of lowercase start and end tags, end tags have group 1 set."""
+    pattern = _tag_patterns.get(tag)
+    if pattern is None:
+        pattern = re.compile(rb"<(/?)" + tag + rb"(?=[\s/>])" + ATTRS + rb">")
+        _tag_patterns[tag] = pattern
+    return pattern
+
+
+def get_attrs(attrs: bytes) -> dict[str, str]:
+    """Return attributes of a start tag, values are unescaped like by html.parser."""
+    if attrs.rstrip().endswith(b"/"):
+        raise AmbiguousMarkup("self-closing tag")
+    parsed = {}
+    for match in ATTR_PATTERN.finditer(attrs):
+        name = match.group(1).decode().lower()
+        if name in parsed:
+            raise AmbiguousMarkup(f"duplicated attribute {name}")
+        value = next((v for v in match.group(2, 3, 4) if v is not None), b"").decode()
+        parsed[name] = html.unescape(value) if "&" in value else value
+    return parsed
+
+
+def has_class(attrs: dict[str, str], class_: str) -> bool:
+    return class_ in attrs.get("class", "").split()
+
+
+def get_inner_end(lowered: bytes, tag: bytes, start: int) -> int:
+    """Return start of the end tag of an element whose start tag ends at `start`."""
+    depth = 1
+    for match in get_tag_pattern(tag).finditer(lowered, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            return match.start()
+    raise AmbiguousMarkup(f"unclosed {tag.decode()}")
+
+
+def get_inner(content: bytes, lowered: bytes, tag: bytes, start: int) -> bytes:
+    """Return markup of an element from the end of its start tag to its end tag."""
+    end = get_inner_end(lowered, tag, start)
+    if any(lowered.find(opening, start, end) != -1 for opening in OPAQUE_STARTS):
+        raise AmbiguousMarkup(f"comment, script or style in {tag.decode()}")
+    return content[start:end]
+
+
+def iter_elements(markup: bytes, tag: bytes, class_: str | None = None):
+    """Yield markup inside elements of a tag and class, nested elements included."""
+    lowered = markup.lower()
+    needle = class_.lower().encode() if class_ is not None else b""
+    for match in get_tag_pattern(tag).finditer(lowered):
+        if match.group(1):
+            continue
+        attrs = match.group(2)
+        if attrs.rstrip().endswith(b"/"):
+            raise AmbiguousMarkup("self-closing tag")
+        if class_ is not None:
+            if needle not in attrs and b"&" not in attrs:
+                continue
+            if not has_class(get_attrs(markup[match.start(2) : match.end(2)]), class_):
+                continue
+        yield markup[match.end() : get_inner_end(lowered, tag, match.end())]
+
+
+def is_read_code_point(code_point: int) -> bool:
+    return any(low <= code_point <= high for low, high in READ_CODE_POINTS)
+
+
+def check_references(text: str) -> None:
+    """Raise AmbiguousMarkup for references BeautifulSoup may resolve differently."""
+    for match in REFERENCE_PATTERN.finditer(text):
+        decimal, hexadecimal, name = match.groups()
+        if decimal is not None or hexadecimal is not None:
+            code_point = int(decimal) if decimal is not None else int(hexadecimal, 16)
+            if is_read_code_point(code_point):
+                continue
+        elif name is not None and name in name2codepoint:
+            continue
+        elif not re.match(r"&[a-zA-Z#]", text[match.start() : match.start() + 2]):
+            continue  # a bare ampersand is text
+        raise AmbiguousMarkup(f"reference {text[match.start() : match.start() + 10]!r}")
+
+
+def get_text(markup: bytes) -> str:
+    """Return text of element markup, same as `Tag.text`."""
+    if UNREAD_TAG_PATTERN.search(markup):
+        raise AmbiguousMarkup("element with unread strings")
+    text = TAG_PATTERN.sub(b"", markup).decode()
+    if "<" in text:
+        raise AmbiguousMarkup("unparsed markup in text")
+    if "&" in text:
+        check_references(text)
+        text = html.unescape(text)
+    return text
+
+
+def get_price(information: bytes) -> float:
+    """Return price of the information section, when `kf.get_product_price` has one."""
+    prices = [
+        get_text(inner).strip().lower()
+        for inner in iter_elements(information, b"div", kf.PRICE_CLASS)
+    ]
+    prices = [price for price in prices if price != kf.UNAVAILABLE_PRICE]
+    if len(prices) != 1:
+        raise AmbiguousMarkup(f"{len(prices)} prices")
+    try:
+        return kf.parse_price(prices[0])
+    except ValueError:
+        raise AmbiguousMarkup(f"price {prices[0]!r}")
+
+
+def get_parameters(parameter_rows: list[bytes]) -> dict[str, str | int]:
+    parameters = {}
+    for row in parameter_rows:
+        name = next(iter_elements(row, b"span", "parameter-name"), None)
+        value = next(iter_elements(row, b"span", "text-field"), None)
+        if name is None or value is None:
+            raise AmbiguousMarkup("parameter row without name or value")
+        parameters[get_text(name).strip().rstrip(":").lower()] = get_text(value).strip()
+    return parameters
+
+
+def get_ean_code(hidden_rows: list[dict[str, str]]) -> str | None:
+    for attrs in hidden_rows:
+        if attrs.get("data-parameter-value") == "ean":
+            return attrs.get("data-parameter-default-value")
+    return None
+
+
+def find_product_markup(content: bytes) -> dict[str, Any]:
+    """Return markup of the elements `kf.find_product_elements` finds on a product page.
+
+    The page is scanned once, comments, scripts and styles are skipped.
+    """
+    lowered = content.lower()
+    elements: dict[str, Any] = {
+        "title": None,
+        "information": None,
+        "description": None,
+        "parameter_rows": [],
+        "hidden_rows": [],
+    }
+    for match in TOKEN_PATTERN.finditer(lowered):
+        if match.group(1) is not None:
+            raise AmbiguousMarkup("unclosed comment, script or style")
+        tag = match.group(2)
+        if tag is None:
+            continue
+        markup = match.group(3)
+        if b"&" not in markup and not any(
+            needle in markup for needle in PRODUCT_START_TAGS[tag]
+        ):
+            continue
+        attrs = get_attrs(content[match.start(3) : match.end(3)])
+        start = match.end()
+        if tag == b"div":
+            if has_class(attrs, kf.HtmlElement.PRODUCT_PARAMETER_ROWS.value["class"]):
+                elements["parameter_rows"].append(
+                    get_inner(content, lowered, tag, start)
+                )
+            elif (
+                elements["description"] is None
+                and has_class(attrs, kf.HtmlElement.PRODUCT_DESCRIPTION.value["class"])
+                and attrs.get("data-tab") == "description"
+            ):
+                elements["description"] = get_inner(content, lowered, tag, start)
+        elif tag == b"tr":
+            if has_class(attrs, kf.HtmlElement.HIDDEN_TR.value["class"]):
+                elements["hidden_rows"].append(attrs)
+        elif tag == b"h1":
+            if elements["title"] is None and has_class(attrs, "title"):
+                elements["title"] = get_inner(content, lowered, tag, start)
+        elif elements["information"] is None and has_class(
+            attrs, kf.HtmlElement.INFORMATION_SECTION.value["class"]
+        ):
+            elements["information"] = get_inner(content, lowered, tag, start)
+    return elements
+
+
+def scan_product(content: bytes | str) -> dict[str, Any]:
+    """Return all product information of a product page, same as `kf.extract_product`.
+
+    Raises AmbiguousMarkup when the page has to be parsed to read it.
+    """
+    if isinstance(content, str):
+        content = content.encode()
+    elements = find_product_markup(content)
+    title = elements["title"]
+    name = get_text(title) if title is not None else None
+    information = elements["information"]
+    parameters = get_parameters(elements["parameter_rows"])
+    description = elements["description"]
+    paragraphs = (
+        [get_text(inner) for inner in iter_elements(description, b"p")]
+        if description is not None
+        else []
+    )
+    return {
+        "name": name,
+        "manufacturer": kf.extract_info_from_name(name)[0] if name else None,
+        "price": get_price(information) if information is not None else None,
+        "weight": kf.get_parameter(
+            parameters, kf.ProductParameterChoice.PACKAGING_WEIGHT, None
+        ),
+        "flavour": kf.get_parameter(parameters, kf.ProductParameterChoice.FLAVOUR),
+        "type": kf.get_parameter(parameters, kf.ProductParameterChoice.FOOD_TYPE),
+        "age_group": kf.get_parameter(parameters, kf.ProductParameterChoice.CAT_AGE),
+        "ean_code": get_ean_code(elements["hidden_rows"]),
+        "composition": kf.find_paragraph(paragraphs, *kf.COMPOSITION_MARKERS),
+        "analytical_composition": kf.find_paragraph(
+            paragraphs, kf.ANALYTICAL_COMPOSITION_MARKER
+        ),
+        "dietary_supplements": kf.find_paragraph(
+            paragraphs, kf.DIETARY_SUPPLEMENTS_MARKER
+        ),
+    }
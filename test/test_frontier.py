@@ -0,0 +1,149 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+from lakocie_dataset import frontier
+from lakocie_dataset.database import crud, models
+from lakocie_dataset.scrap import journal
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+NOW = datetime(2025, 3, 12, 6)
+BASE = "https://kociefigle.pl"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def add_crawl_url(
+    engine, store, name, last_fetched, product=None, tile_fingerprint=None
+):
+    crud.save_crawl_urls(
+        engine,
+        [
+            models.CrawlUrl(
+                url=f"{BASE}/{name}",
+                name=name,
+                store_id=store.id,
+                product_ean=product.ean if product else None,
+                last_fetched=last_fetched,
+                content_hash="0" * 64,
+                tile_fingerprint=tile_fingerprint,
+            )
+        ],
+    )
+
+
+def test_should_fetch(engine):
+    store = crud.get_or_create_store_by_name(engine, StoreChoice.KF.value.name)
+    manufacturer = crud.create_manufacturer(engine, "Almo Nature", None)
+    unfollowed = crud.create_product(engine, 1, manufacturer)
+    crud.update_product(engine, unfollowed, is_followed=False)
+    add_crawl_url(engine, store, "due", NOW - timedelta(days=8))
+    add_crawl_url(engine, store, "fresh", NOW - timedelta(days=1))
+    add_crawl_url(engine, store, "unfollowed", NOW - timedelta(days=30), unfollowed)
+
+    store_frontier = frontier.Frontier(
+        engine, StoreChoice.KF, now=NOW, revisit_days=7, sample_rate=0, budget=None
+    )
+    assert store_frontier.should_fetch(f"{BASE}/new")
+    assert store_frontier.should_fetch(f"{BASE}/due")
+    assert not store_frontier.should_fetch(f"{BASE}/fresh")
+    assert not store_frontier.should_fetch(f"{BASE}/unfollowed")
+
+    sampling_frontier = frontier.Frontier(
+        engine, StoreChoice.KF, now=NOW, revisit_days=7, sample_rate=1, budget=None
+    )
+    assert sampling_frontier.should_fetch(f"{BASE}/fresh")
+
+
+def test_save(engine, tmp_path):
+    store = crud.get_or_create_store_by_name(engine, StoreChoice.KF.value.name)
+    add_crawl_url(engine, store, "changed", NOW - timedelta(days=8))
+    products_dir = tmp_path / "products"
+    journal_ = journal.Journal(tmp_path / "products.journal.jsonl")
+    for name, checksum in [("changed", "1" * 64), ("new", "2" * 64)]:
+        url = f"{BASE}/{name}"
+        journal_.add(url, products_dir / f"{name}.html")
+        journal_.done(url, 10, checksum)
+    journal_.add(f"{BASE}/failed", products_dir / "failed.html")
+    journal_.fail(f"{BASE}/failed", ValueError("timeout"))
+
+    store_frontier = frontier.Frontier(engine, StoreChoice.KF, now=NOW)
+    for name in ["changed", "new", "failed"]:
+        store_frontier.should_fetch(f"{BASE}/{name}")
+    store_frontier.save(journal_)
+    # saving the same journal again does not count the fetches twice
+    frontier.Frontier(engine, StoreChoice.KF, now=NOW).save(journal_)
+
+    crawl_urls = {c.name: c for c in crud.read_crawl_urls(engine, store)}
+    assert crawl_urls["changed"].change_count == 1
+    assert crawl_urls["changed"].fetch_count == 1
+    assert crawl_urls["changed"].content_hash == "1" * 64
+    assert crawl_urls["new"].last_fetched == NOW
+    assert crawl_urls["failed"].last_fetched is None
+    assert crawl_urls["failed"].last_seen == NOW
+
+    manufacturer = crud.create_manufacturer(engine, "Almo Nature", None)
+    product = crud.create_product(engine, 1, manufacturer)
+    crawl_url = crud.link_crawl_url_to_product(engine, store, "new", product)
+    assert crawl_url is not None and crawl_url.product_ean == 1
+
+
+def test_should_fetch_by_tile(engine, tmp_path):
+    store = crud.get_or_create_store_by_name(engine, StoreChoice.KF.value.name)
+    for name in ["same", "changed"]:
+        add_crawl_url(engine, store, name, NOW - timedelta(days=8), tile_fingerprint="a")
+    add_crawl_url(engine, store, "old", NOW - timedelta(days=31), tile_fingerprint="a")
+    add_crawl_url(engine, store, "untracked", NOW - timedelta(days=8))
+
+    store_frontier = frontier.Frontier(
+        engine,
+        StoreChoice.KF,
+        now=NOW,
+        revisit_days=7,
+        sample_rate=0,
+        budget=None,
+        tile_max_age_days=30,
+    )
+    assert not store_frontier.should_fetch(f"{BASE}/same", "a")
+    assert store_frontier.should_fetch(f"{BASE}/changed", "b")
+    assert store_frontier.should_fetch(f"{BASE}/old", "a")
+    assert store_frontier.should_fetch(f"{BASE}/untracked", "b")
+
+    journal_ = journal.Journal(tmp_path / "products.journal.jsonl")
+    journal_.add(f"{BASE}/untracked", tmp_path / "untracked.html")
+    journal_.done(f"{BASE}/untracked", 10, "1" * 64)
+    journal_.add(f"{BASE}/changed", tmp_path / "changed.html")
+    journal_.fail(f"{BASE}/changed", ValueError("timeout"))
+    store_frontier.save(journal_)
+
+    crawl_urls = {c.name: c for c in crud.read_crawl_urls(engine, store)}
+    assert crawl_urls["untracked"].tile_fingerprint == "b"
+    # the changed page was not fetched, it is compared with the old tile next run
+    assert crawl_urls["changed"].tile_fingerprint == "a"
+
+
+def test_tiles_within_budget(engine):
+    store = crud.get_or_create_store_by_name(engine, StoreChoice.KF.value.name)
+    for name in ["a", "b", "c", "d", "e"]:
+        add_crawl_url(engine, store, name, NOW - timedelta(days=8), tile_fingerprint="a")
+
+    store_frontier = frontier.Frontier(
+        engine, StoreChoice.KF, now=NOW, budget=2, tile_max_age_days=30
+    )
+    assert store_frontier.scheduled == {f"{BASE}/a", f"{BASE}/b"}
+    # scheduled url with an unchanged tile is not fetched and frees its slot
+    assert not store_frontier.should_fetch(f"{BASE}/a", "a")
+    assert store_frontier.should_fetch(f"{BASE}/c", "b")
+    assert not store_frontier.should_fetch(f"{BASE}/b", "a")
+    assert store_frontier.should_fetch(f"{BASE}/d", "b")
+    # budget is used up
+    assert not store_frontier.should_fetch(f"{BASE}/e", "b")
+    assert store_frontier.should_fetch(f"{BASE}/new", "b")
+    assert store_frontier.selected == {f"{BASE}/c", f"{BASE}/d"}
+    assert store_frontier.skipped == {f"{BASE}/a", f"{BASE}/b", f"{BASE}/e"}
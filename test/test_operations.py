@@ -0,0 +1,18 @@
+from sqlalchemy import inspect
+
+from lakocie_dataset import operations
+from lakocie_dataset.config import config
+from lakocie_dataset.database.models import CrawlUrl
+
+
+def test_database_is_created_on_first_use(tmp_path, monkeypatch):
+    db_path = tmp_path / "database.db"
+    monkeypatch.setattr(config, "get_database_path", lambda: db_path)
+    monkeypatch.setattr(operations, "_engine", None)
+    assert not db_path.exists()
+
+    engine = operations.get_engine()
+    assert operations.get_engine() is engine
+    assert CrawlUrl.__tablename__ in inspect(engine).get_table_names()
+    assert db_path.exists()
+    engine.dispose()
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import SQLModel, create_engine
+
+from lakocie_dataset import frontier, scheduler
+from lakocie_dataset.database import crud, models
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+NOW = datetime(2025, 3, 12, 6)
+BASE = "https://kociefigle.pl"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite:///:memory:")
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def test_count_changes():
+    assert scheduler.count_changes([5.0, 5.0, 6.0, 5.0]) == 2
+    assert scheduler.count_changes([]) == 0
+
+
+def test_expected_gain():
+    volatile = scheduler.get_change_rate(scheduler.ChangeHistory(10, 20), 1, 30)
+    stable = scheduler.get_change_rate(scheduler.ChangeHistory(0, 200), 1, 30)
+    assert volatile > stable
+    assert scheduler.get_expected_gain(volatile, 0) == 0
+    assert scheduler.get_expected_gain(volatile, 2) > scheduler.get_expected_gain(
+        stable, 2
+    )
+
+
+def test_budget_goes_to_volatile_products(engine):
+    store = crud.get_or_create_store_by_name(engine, StoreChoice.KF.value.name)
+    manufacturer = crud.create_manufacturer(engine, "Almo Nature", None)
+    crawl_urls = []
+    for ean, name in enumerate(["stable", "volatile", "unlinked"], start=1):
+        product = crud.create_product(engine, ean, manufacturer)
+        crawl_urls.append(
+            models.CrawlUrl(
+                url=f"{BASE}/{name}",
+                name=name,
+                store_id=store.id,
+                product_ean=ean if name != "unlinked" else None,
+                first_seen=NOW - timedelta(days=60),
+                last_seen=NOW - timedelta(days=1),
+                last_fetched=NOW - timedelta(days=3),
+            )
+        )
+        for day in range(60):
+            value = 10.0 + (day % 2 if name == "volatile" else 0)
+            crud.create_price(
+                engine, value, product, store, date=NOW - timedelta(days=60 - day)
+            )
+    crud.save_crawl_urls(engine, crawl_urls)
+
+    store_frontier = frontier.Frontier(engine, StoreChoice.KF, now=NOW, budget=1)
+    assert store_frontier.scheduled == {f"{BASE}/volatile"}
+    assert store_frontier.should_fetch(f"{BASE}/volatile")
+    assert not store_frontier.should_fetch(f"{BASE}/stable")
+    assert store_frontier.should_fetch(f"{BASE}/new")
@@ -0,0 +1,65 @@
+import pytest
+from lakocie_dataset.scrap import archive, io, paths
+from lakocie_dataset.scrap.compression import Compression
+
+DATE = "2025-03-12"
+
+
+@pytest.fixture
+def date_dir(monkeypatch, tmp_path):
+    """Date directory of a store in a temporary htmls directory"""
+    monkeypatch.setattr(
+        "lakocie_dataset.config.config.get_htmls_dir", lambda: tmp_path
+    )
+    date_dir = tmp_path / paths.StoreChoice.KF.value.name / DATE
+    (date_dir / "products").mkdir(parents=True)
+    (date_dir / "collections").mkdir()
+    yield date_dir
+    archive.close_archives()
+
+
+def test_snapshot_archive(tmp_path):
+    with archive.SnapshotArchive(tmp_path / "snapshot.sqlite") as snapshot_archive:
+        snapshot_archive.add("products", "b.html", b"b")
+        snapshot_archive.add("products", "a.html", b"a")
+        snapshot_archive.add("collections", "collection_1.html", b"c")
+        snapshot_archive.commit()
+
+        assert snapshot_archive.read("products", "a.html") == b"a"
+        assert snapshot_archive.read("products", "c.html") is None
+        assert ("collections", "collection_1.html") in snapshot_archive
+        assert snapshot_archive.names("products") == ["a.html", "b.html"]
+        assert list(snapshot_archive.iter_files("products")) == [
+            ("a.html", b"a"),
+            ("b.html", b"b"),
+        ]
+
+
+def test_pack_date_dir(date_dir):
+    products_dir = date_dir / "products"
+    io.save_content("<h1>a</h1>", products_dir / "a.html", compression=Compression.NONE)
+    io.save_content("<h1>b</h1>", products_dir / "b.html", compression=Compression.GZIP)
+    io.save_content(
+        "<p>c</p>", date_dir / "collections" / "collection_1.html", deduplicate=False
+    )
+
+    archive_path = io.pack_date_dir(date_dir)
+    assert archive_path == date_dir / "snapshot.sqlite"
+    assert sorted(p.name for p in date_dir.iterdir()) == ["snapshot.sqlite"]
+
+    store = paths.StoreChoice.KF
+    assert paths.get_products_dir(store, date=DATE) == products_dir
+    assert list(io.iter_html_files(products_dir)) == [
+        products_dir / "a.html",
+        products_dir / "b.html",
+    ]
+    assert io.content_exists(products_dir / "b.html")
+    assert not io.content_exists(products_dir / "c.html")
+    assert io.html_file_to_soup(products_dir / "b.html").find("h1").text == "b"  # type: ignore
+    assert list(io.iter_snapshot(products_dir)) == [
+        (products_dir / "a.html", b"<h1>a</h1>"),
+        (products_dir / "b.html", b"<h1>b</h1>"),
+    ]
+
+    with pytest.raises(FileExistsError):
+        io.pack_date_dir(date_dir)
@@ -0,0 +1,97 @@
+import pytest
+from lakocie_dataset.scrap import blobs, io, paths
+
+CONTENT = "<html><body><h1>Hello, World!</h1></body></html>"
+
+
+@pytest.fixture
+def htmls_dir(monkeypatch, tmp_path):
+    """Mock config to keep blobs in a temporary htmls directory"""
+    monkeypatch.setattr(
+        "lakocie_dataset.config.config.get_htmls_dir", lambda: tmp_path
+    )
+    return tmp_path
+
+
+def test_blob_store_put(tmp_path):
+    store = blobs.BlobStore(tmp_path)
+    digest = store.put(CONTENT.encode())
+    assert digest == blobs.get_digest(CONTENT.encode())
+    assert digest in store
+    assert store.put(CONTENT.encode()) == digest
+    assert store.get_path(digest).read_text() == CONTENT
+    assert len(list(tmp_path.rglob("*.html"))) == 1
+
+
+def test_prune_keeps_blobs_being_written(tmp_path):
+    store = blobs.BlobStore(tmp_path)
+    kept = store.put(CONTENT.encode())
+    removed = store.put(b"<html></html>")
+    tmp_file = store.get_path(kept).parent / "abc123.tmp"
+    tmp_file.write_bytes(b"<html>")
+
+    assert store.prune({kept}) == 1
+    assert kept in store and removed not in store
+    assert tmp_file.exists()
+
+
+def test_manifest_persistence(tmp_path):
+    manifest = blobs.Manifest(tmp_path / "products.manifest.jsonl")
+    manifest.add("a.html", "1" * 64)
+    manifest.add("b.html", "2" * 64)
+    manifest.add("a.html", "3" * 64)
+
+    loaded = blobs.Manifest(tmp_path / "products.manifest.jsonl")
+    assert len(loaded) == 2
+    assert loaded.get("a.html") == "3" * 64
+    assert loaded.names() == ["a.html", "b.html"]
+    assert "c.html" not in loaded
+
+
+def test_deduplicated_snapshots(htmls_dir):
+    day_1 = htmls_dir / "store" / "2025-03-12" / "products"
+    day_2 = htmls_dir / "store" / "2025-03-13" / "products"
+    day_1.mkdir(parents=True)
+    day_2.mkdir(parents=True)
+
+    io.save_content(CONTENT, day_1 / "product.html", deduplicate=True)
+    io.save_content(CONTENT, day_2 / "product.html", deduplicate=True)
+    io.save_content("<p>other</p>", day_2 / "other.html", deduplicate=True)
+
+    # content is stored once, dates keep only manifests
+    assert not (day_1 / "product.html").exists()
+    assert len(list(paths.get_blobs_dir().rglob("*.html"))) == 2
+    assert io.content_exists(day_1 / "product.html")
+    assert list(io.iter_html_files(day_2)) == [
+        day_2 / "other.html",
+        day_2 / "product.html",
+    ]
+    soup = io.html_file_to_soup(day_2 / "product.html")
+    assert soup.find("h1").text == "Hello, World!"  # type: ignore
+
+    with pytest.raises(FileExistsError):
+        io.save_content(CONTENT, day_1 / "product.html", deduplicate=True)
+
+
+def test_link_content_deduplicated(htmls_dir):
+    day_1 = htmls_dir / "2025-03-12"
+    day_2 = htmls_dir / "2025-03-13"
+    day_1.mkdir()
+    day_2.mkdir()
+
+    io.save_content(CONTENT, day_1 / "product.html", deduplicate=True)
+    io.link_content(day_1 / "product.html", day_2 / "product.html", deduplicate=True)
+
+    manifest_1 = blobs.get_manifest(day_1)
+    manifest_2 = blobs.get_manifest(day_2)
+    assert manifest_1.get("product.html") == manifest_2.get("product.html")
+
+
+def test_products_dir_from_manifest(htmls_dir):
+    date_dir = htmls_dir / "Kocie Figle" / "2025-03-12"
+    date_dir.mkdir(parents=True)
+    blobs.get_manifest(date_dir / "products").add("product.html", "0" * 64)
+
+    store = paths.StoreChoice.KF
+    assert paths.get_products_dir(store, date="2025-03-12") == date_dir / "products"
+    assert paths.get_latest_products_dir(store) == date_dir / "products"
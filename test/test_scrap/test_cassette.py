@@ -0,0 +1,78 @@
+import pytest
+import requests
+
+from lakocie_dataset.scrap import cassette, client, fetch, permissions
+from lakocie_dataset.scrap.mock_server import MockStoreServer
+
+PRODUCT_URL = "https://kociefigle.pl/Almo-Nature-p1001"
+PRODUCT_PAGE = "<html><body><h1 class='title'>Almo Nature - Kurczak</h1></body></html>"
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    recorded = cassette.Cassette(tmp_path / "recorded")
+    recorded.record(
+        PRODUCT_URL,
+        200,
+        {"Content-Type": "text/html; charset=utf-8", "Content-Encoding": "gzip"},
+        PRODUCT_PAGE.encode(),
+    )
+    return recorded
+
+
+@pytest.fixture
+def fast_config(monkeypatch):
+    monkeypatch.setattr("lakocie_dataset.config.config.get_backoff", lambda: (0.01, 1))
+    monkeypatch.setattr(
+        "lakocie_dataset.config.config.get_rate_limit", lambda host: (1000.0, 100)
+    )
+    permissions.clear_robots_policies()
+    yield
+    client.close_sessions()
+    permissions.clear_robots_policies()
+
+
+def test_cassette(recorded):
+    reopened = cassette.Cassette(recorded.path)
+    assert len(reopened) == 1
+    entry = reopened.get(PRODUCT_URL)
+    assert entry is not None
+    assert reopened.get("/Almo-Nature-p1001") == entry
+    assert reopened.read_body(entry) == PRODUCT_PAGE.encode()
+    # the body is stored decoded
+    assert "Content-Encoding" not in entry["headers"]
+    assert reopened.get("https://kociefigle.pl/missing") is None
+
+    reopened.record("https://kociefigle.pl/Łosoś-p2", 200, {}, b"")
+    assert reopened.get("/%C5%81oso%C5%9B-p2") is not None
+
+
+def test_mock_server_injects_failures(recorded):
+    with MockStoreServer(recorded, throttle_rate=1, retry_after=7) as server:
+        response = requests.get(server.url + "/Almo-Nature-p1001")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+    with MockStoreServer(recorded, error_rate=1) as server:
+        assert requests.get(server.url + "/Almo-Nature-p1001").status_code == 503
+        assert requests.get(server.url + "/robots.txt").status_code == 503
+    with MockStoreServer(recorded) as server:
+        assert requests.get(server.url + "/missing").status_code == 404
+        assert server.statuses == {404: 1}
+
+
+def test_record_replayed_store(recorded, fast_config, monkeypatch, tmp_path):
+    with MockStoreServer(recorded, throttle_rate=0.3, retry_after=0, seed=1) as server:
+        monkeypatch.setattr(
+            "lakocie_dataset.config.config.get_mock_server", lambda: server.url
+        )
+        monkeypatch.setattr(
+            "lakocie_dataset.config.config.get_cassette_path",
+            lambda: tmp_path / "rerecorded",
+        )
+        assert fetch.get_content(PRODUCT_URL) == PRODUCT_PAGE
+
+    rerecorded = cassette.Cassette(tmp_path / "rerecorded")
+    assert rerecorded.urls() == [PRODUCT_URL]
+    entry = rerecorded.get(PRODUCT_URL)
+    assert entry is not None and entry["status"] == 200
+    assert rerecorded.read_body(entry) == PRODUCT_PAGE.encode()
@@ -0,0 +1,54 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from lakocie_dataset.scrap import client
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    client_ports: set[int] = set()
+
+    def do_GET(self):
+        KeepAliveHandler.client_ports.add(self.client_address[1])
+        body = b"<html><body>ok</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_create_session():
+    session = client.create_session("example.com")
+    assert "gzip" in session.headers["Accept-Encoding"]
+    adapter = session.get_adapter("https://example.com")
+    assert adapter._pool_maxsize == client.config.get_pool_size("example.com")  # type: ignore
+
+
+def test_get_session_per_host():
+    first = client.get_session("https://example.com/a")
+    second = client.get_session("https://example.com/b")
+    other = client.get_session("https://example.org/a")
+    assert first is second
+    assert first is not other
+    client.close_sessions()
+    assert client.get_session("https://example.com/a") is not first
+    client.close_sessions()
+
+
+def test_get_reuses_connection():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        for _ in range(5):
+            response = client.get(url)
+            assert response.text == "<html><body>ok</body></html>"
+        assert len(KeepAliveHandler.client_ports) == 1
+    finally:
+        client.close_sessions()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,24 @@
+import pytest
+from lakocie_dataset.scrap import compression
+from lakocie_dataset.scrap.compression import Compression
+
+DATA = "<html><body>Zażółć gęślą jaźń</body></html>".encode()
+
+
+def test_compress_round_trip():
+    for compression_ in Compression:
+        if compression_ is Compression.ZSTD and compression.zstandard is None:
+            with pytest.raises(ImportError):
+                compression.compress(DATA, compression_)
+            continue
+        compressed = compression.compress(DATA, compression_)
+        assert compression.detect(compressed) is compression_
+        assert compression.decompress(compressed) == DATA
+
+
+def test_suffixes():
+    assert Compression.GZIP.suffix == ".gz"
+    assert compression.get_suffix("product.html.zst") == ".zst"
+    assert compression.get_suffix("product.html") == ""
+    assert compression.strip_suffix("product.html.gz") == "product.html"
+    assert compression.strip_suffix("product.html") == "product.html"
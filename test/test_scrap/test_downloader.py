@@ -0,0 +1,94 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from lakocie_dataset.scrap import client, downloader, journal
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+
+PAGES = 5
+
+
+def collection_page(page: int, port: int) -> str:
+    tiles = "".join(
+        f'<figure class="product-tile"><a href="/product-{page}-{i}">P</a></figure>'
+        for i in range(3)
+    )
+    links = "".join(
+        f'<a href="http://127.0.0.1:{port}/Karmy-Mokre/pa/{n}">{n}</a>'
+        for n in range(1, min(page + 2, PAGES) + 1)
+    ) + f'<a href="http://127.0.0.1:{port}/Karmy-Mokre/pa/{PAGES}">{PAGES}</a>'
+    return (
+        f'<html><body><div class="col-sm-9">{tiles}</div>'
+        f'<div class="pagination">{links}</div></body></html>'
+    )
+
+
+class ProductHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.startswith("/Karmy-Mokre"):
+            page = int(self.path.split("/")[-1]) if "/pa/" in self.path else 1
+            text = collection_page(page, self.server.server_address[1])
+        else:
+            text = f"<html><body><h1>{self.path}</h1></body></html>"
+        body = text.encode()
+        self.send_response(404 if self.path == "/robots.txt" else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url(monkeypatch):
+    monkeypatch.setattr(
+        "lakocie_dataset.config.config.get_rate_limit", lambda host: (1000.0, 100)
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProductHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        client.close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
+def test_product_queue(tmp_path, server_url):
+    products_dir = tmp_path / "products"
+    products_dir.mkdir()
+    journal_ = journal.Journal(tmp_path / "products.journal.jsonl")
+    links = [f"{server_url}/product-{i}" for i in range(12)]
+
+    with downloader.ProductQueue(StoreChoice.KF, journal_, workers=2) as queue:
+        for link in links + links[:3]:
+            queue.put(link, products_dir)
+
+    assert len(journal_) == len(links)
+    assert journal_.remaining() == []
+    assert sorted(p.name for p in products_dir.iterdir()) == sorted(
+        f"product-{i}.html" for i in range(12)
+    )
+
+
+def test_crawl_collection_concurrently(tmp_path, server_url, monkeypatch):
+    monkeypatch.setattr(
+        StoreChoice.KF.value, "scrap_start_url", f"{server_url}/Karmy-Mokre"
+    )
+
+    product_links = [
+        sc.get_product_links()
+        for sc in downloader.crawl_collection(StoreChoice.KF, tmp_path)
+    ]
+
+    assert len(product_links) == PAGES
+    names = sorted(link.rsplit("/", 1)[-1] for links in product_links for link in links)
+    assert names == sorted(
+        f"product-{page}-{i}" for page in range(1, PAGES + 1) for i in range(3)
+    )
+    assert len(list(tmp_path.iterdir())) == PAGES
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from lakocie_dataset.scrap import client, fetch, http_cache, paths
+
+CONTENT = b"<html><body><h1>Product</h1></body></html>"
+ETAG = '"v1"'
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    full_responses = 0
+
+    def do_GET(self):
+        if self.path == "/robots.txt":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        ETagHandler.full_responses += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(CONTENT)))
+        self.send_header("ETag", ETAG)
+        self.end_headers()
+        self.wfile.write(CONTENT)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_validator_store_persistence():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = paths.Path(tmpdir)
+        saved = root / "page.html"
+        saved.write_text("content")
+
+        store = http_cache.ValidatorStore(root / "validators.json", root)
+        assert store.request_headers("https://example.com/p") == {}
+        store.update("https://example.com/p", {"ETag": ETAG}, saved)
+        store.update("https://example.com/no-validators", {}, saved)
+        store.save()
+
+        loaded = http_cache.ValidatorStore(root / "validators.json", root)
+        assert len(loaded) == 1
+        assert loaded.get_cached_path("https://example.com/p") == saved
+        assert loaded.request_headers("https://example.com/p") == {
+            "If-None-Match": ETAG
+        }
+
+        saved.unlink()
+        assert loaded.request_headers("https://example.com/p") == {}
+
+
+def test_save_html_not_modified_links_previous_file():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/product"
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = paths.Path(tmpdir)
+            (root / "day1").mkdir()
+            (root / "day2").mkdir()
+            store = http_cache.ValidatorStore(root / "validators.json", root)
+
+            first = fetch.save_html(url, root / "day1" / "product.html", store)
+            second = fetch.save_html(url, root / "day2" / "product.html", store)
+
+            assert ETagHandler.full_responses == 1
+            assert second.read_bytes() == CONTENT
+            assert os.path.samefile(first, second)
+            assert store.get_cached_path(url) == second
+    finally:
+        client.close_sessions()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from lakocie_dataset.scrap import ingest, scrapper
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+PRODUCT_PAGE = """<html><body>
+<h1 class="title">Almo Nature - HFC Complete - Kurczak - {weight}g</h1>
+<section class="product-informations"><div class="product-price">5.85 zł</div></section>
+<div class="product-parameter-row"><span class="parameter-name">Rozmiar opakowania:</span><span class="text-field">{weight}g</span></div>
+<table><tr class="hidden" data-parameter-value="ean" data-parameter-default-value="{ean}"><td>ean</td></tr></table>
+<div class="tab" data-tab="description"><p>Skład: kurczak 55%</p></div>
+</body></html>
+"""
+
+
+def get_pages(count: int) -> list[tuple[Path, bytes]]:
+    pages = [
+        (
+            Path(f"product-{i}.html"),
+            PRODUCT_PAGE.format(weight=i + 1, ean=8001154120000 + i % 7).encode(),
+        )
+        for i in range(count)
+    ]
+    pages[5] = (Path("empty.html"), b"<html><body></body></html>")
+    return pages
+
+
+def test_records_in_page_order():
+    pages = get_pages(100)
+    sequential = list(ingest.iter_product_records(StoreChoice.KF, pages, processes=1))
+    parallel = list(ingest.iter_product_records(StoreChoice.KF, pages, processes=3))
+
+    assert [path for path, _ in parallel] == [path for path, _ in pages]
+    assert [
+        record for _, record in parallel if not isinstance(record, ValueError)
+    ] == [record for _, record in sequential if not isinstance(record, ValueError)]
+    assert isinstance(parallel[5][1], ValueError)
+    record = parallel[8][1]
+    assert isinstance(record, scrapper.ProductRecord)
+    assert record.weight == 9 and record.ean_code == 8001154120001
+
+
+def test_workers_do_not_import_operations():
+    # operations opens the database and the OpenAI client on import
+    code = (
+        "import sys, lakocie_dataset.scrap.ingest; "
+        "assert 'lakocie_dataset.operations' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
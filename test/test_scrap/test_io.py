@@ -1,4 +1,6 @@
-from lakocie_dataset.scrap import io, paths
+import os
+from lakocie_dataset.scrap import compression, io, paths
+from lakocie_dataset.scrap.compression import Compression
 import pytest
 import tempfile
 
@@ -51,3 +53,70 @@ def test_html_file_to_soup_raises():
         not_html_file.touch()
         with pytest.raises(ValueError):
             io.html_file_to_soup(not_html_file)
+
+
+def test_save_content_compressed():
+    content = "<html><body><h1>Hello, World!</h1></body></html>"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = paths.Path(tmpdir) / FILENAME
+        io.save_content(content, path, compression=Compression.GZIP)
+        assert not path.exists()
+        assert (paths.Path(tmpdir) / f"{FILENAME}.gz").exists()
+        assert io.content_exists(path)
+        assert list(io.iter_html_files(paths.Path(tmpdir))) == [path]
+        assert io.read_content(path) == content
+        assert io.html_file_to_soup(path).find("h1").text == "Hello, World!"  # type: ignore
+
+        with pytest.raises(FileExistsError):
+            io.save_content(content, path)
+
+
+def test_migrate_files_keeps_hardlinks():
+    content = "<html><body><h1>Hello, World!</h1></body></html>"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        day_1 = paths.Path(tmpdir) / "day_1"
+        day_2 = paths.Path(tmpdir) / "day_2"
+        day_1.mkdir()
+        day_2.mkdir()
+        io.save_content(content, day_1 / FILENAME, compression=Compression.NONE)
+        io.link_content(day_1 / FILENAME, day_2 / FILENAME, deduplicate=False)
+
+        count = io.migrate_files([day_1, day_2], Compression.GZIP)
+        assert count == 2
+        first = day_1 / f"{FILENAME}.gz"
+        second = day_2 / f"{FILENAME}.gz"
+        assert os.path.samefile(first, second)
+        assert io.read_content(day_2 / FILENAME) == content
+
+        assert io.migrate_files([day_1, day_2], Compression.NONE) == 2
+        assert (day_1 / FILENAME).read_text() == content
+
+
+@pytest.mark.parametrize("compression_", [Compression.GZIP, Compression.ZSTD])
+def test_save_stream(compression_):
+    if compression_ is Compression.ZSTD and compression.zstandard is None:
+        pytest.skip("zstandard is not installed")
+    chunks = [b"<html><body>", b"<h1>Hello</h1>", b"</body></html>"]
+    content = b"".join(chunks)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = paths.Path(tmpdir) / FILENAME
+        saved = io.save_stream(iter(chunks), path, compression=compression_)
+        assert saved.size == len(content)
+        assert saved == io.get_saved_file(path)
+        assert io.read_bytes(path) == content
+        assert io.read_content(path) == content.decode()
+        assert os.listdir(tmpdir) == [FILENAME + compression_.suffix]
+
+
+def test_save_stream_interrupted():
+    def chunks():
+        yield b"<html><body>"
+        raise ConnectionError("connection reset")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = paths.Path(tmpdir) / FILENAME
+        with pytest.raises(ConnectionError):
+            io.save_stream(chunks(), path, deduplicate=False)
+        # neither partial file nor temporary file is left behind
+        assert os.listdir(tmpdir) == []
+        assert not io.content_exists(path)
@@ -0,0 +1,95 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from lakocie_dataset.scrap import blobs, client, downloader, journal
+
+CONTENT = b"<html><body><h1>Product</h1></body></html>"
+
+
+class ProductHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status, body = (200, CONTENT) if self.path == "/product" else (404, b"")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProductHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        client.close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
+def test_journal_resume(tmp_path):
+    products_dir = tmp_path / "products"
+    products_dir.mkdir()
+    (products_dir / "a.html").write_text("<html></html>")
+    journal_ = journal.Journal(tmp_path / "products.journal.jsonl")
+    journal_.add("https://example.com/a", products_dir / "a.html")
+    journal_.add("https://example.com/b", products_dir / "b.html")
+    journal_.add("https://example.com/c", products_dir / "c.html")
+    journal_.mark_planned()
+    journal_.start("https://example.com/a")
+    journal_.done("https://example.com/a", 10, "0" * 64)
+    journal_.start("https://example.com/b")
+    journal_.fail("https://example.com/b", ValueError("timeout"))
+    journal_.start("https://example.com/c")
+
+    # previous run was killed while writing an entry
+    with open(journal_.path, "a") as file:
+        file.write('{"url": "https://example.com/c", "sta')
+
+    loaded = journal.Journal(journal_.path)
+    assert loaded.planned
+    assert loaded.get_state("https://example.com/a") == journal.State.DONE
+    assert loaded.get_entry("https://example.com/a")["size"] == 10  # type: ignore
+    assert loaded.remaining() == [
+        ("https://example.com/b", products_dir / "b.html"),
+        ("https://example.com/c", products_dir / "c.html"),
+    ]
+
+    # content of a done download was lost after the journal entry was written
+    (products_dir / "a.html").unlink()
+    assert loaded.remaining()[0] == ("https://example.com/a", products_dir / "a.html")
+
+    loaded.done("https://example.com/c", 5, "1" * 64)
+    reloaded = journal.Journal(journal_.path)
+    assert reloaded.get_state("https://example.com/c") == journal.State.DONE
+    assert reloaded.counts()[journal.State.FAILED] == 1
+
+
+def test_download_journaled_file(tmp_path, server_url):
+    products_dir = tmp_path / "products"
+    products_dir.mkdir()
+    journal_ = journal.Journal(tmp_path / "products.journal.jsonl")
+    journal_.add(f"{server_url}/product", products_dir / "product.html")
+    journal_.add(f"{server_url}/missing", products_dir / "missing.html")
+
+    downloader.download_journaled_file(
+        f"{server_url}/product", products_dir / "product.html", journal_
+    )
+    with pytest.raises(Exception):
+        downloader.download_journaled_file(
+            f"{server_url}/missing", products_dir / "missing.html", journal_
+        )
+
+    entry = journal_.get_entry(f"{server_url}/product")
+    assert entry["state"] == journal.State.DONE  # type: ignore
+    assert entry["size"] == len(CONTENT)  # type: ignore
+    assert entry["checksum"] == blobs.get_digest(CONTENT)  # type: ignore
+    assert journal_.get_state(f"{server_url}/missing") == journal.State.FAILED
+    assert not (products_dir / "missing.html").exists()
@@ -1,3 +1,4 @@
+import pytest
 from lakocie_dataset.scrap import fetch, permissions
 from enum import Enum
 from lakocie_dataset.scrap.stores import kf
@@ -210,6 +211,83 @@ def test_get_next_page_link():
     )
 
 
+def test_get_page_links_from_markup():
+    soup = BeautifulSoup(
+        '<div class="pagination"><a href="/Karmy-Mokre/pa/2">2</a>'
+        '<a href="/Karmy-Mokre/pa/3">3</a><span>...</span>'
+        '<a href="/Karmy-Mokre/pa/12">12</a></div>',
+        "html.parser",
+    )
+    links = kf.get_page_links(soup)
+    assert len(links) == 11
+    assert links[0] == "https://kociefigle.pl/Karmy-Mokre/pa/2"
+    assert links[-1] == "https://kociefigle.pl/Karmy-Mokre/pa/12"
+    assert kf.get_page_links(BeautifulSoup("<p>no pagination</p>", "html.parser")) == []
+
+
+@pytest.mark.parametrize(
+    "text, price",
+    [("5.85 zł", 5.85), ("12,99 zł", 12.99), (" 1 299,00\xa0zł ", 1299.0), ("7", 7.0)],
+)
+def test_parse_price(text, price):
+    assert kf.parse_price(text) == price
+
+
+def test_get_product_price_with_comma():
+    soup = BeautifulSoup(
+        '<section class="product-informations">'
+        '<div class="product-price">12,99 zł</div></section>',
+        "html.parser",
+    )
+    assert kf.get_product_price(soup) == 12.99
+
+
+def test_get_product_prices_from_markup():
+    soup = BeautifulSoup(
+        '<div class="col-sm-9">'
+        '<figure class="product-tile"><a href="/a-p1">A</a>'
+        '<div class="product-price">12,99 zł</div></figure>'
+        '<figure class="product-tile"><a href="/b-p2">B</a>'
+        '<div class="product-price">Brak towaru</div></figure>'
+        "</div>",
+        "html.parser",
+    )
+    assert kf.get_product_prices(soup) == {"https://kociefigle.pl/a-p1": 12.99}
+
+
+def test_get_product_prices_of_discounted_tile():
+    soup = BeautifulSoup(
+        '<div class="col-sm-9">'
+        '<figure class="product-tile"><a href="/a-p1">A</a>'
+        '<div class="price-box"><s class="old-price">14,99 zł</s>'
+        '<div class="product-price">12,99 zł</div></div></figure>'
+        '<figure class="product-tile"><a href="/b-p2">B</a>'
+        '<div class="product-price">9,99 zł</div>'
+        '<div class="product-price">8,99 zł</div></figure>'
+        "</div>",
+        "html.parser",
+    )
+    assert kf.get_product_prices(soup) == {"https://kociefigle.pl/a-p1": 12.99}
+
+
+def test_get_product_fingerprints_from_markup():
+    def fingerprints(price, image="/a.jpg", spacing=""):
+        soup = BeautifulSoup(
+            '<div class="col-sm-9"><figure class="product-tile">'
+            f'<a href="/a-p1">A</a>{spacing}<img data-src="{image}">'
+            f'<div class="product-price">{price}</div></figure></div>',
+            "html.parser",
+        )
+        return kf.get_product_fingerprints(soup)
+
+    unchanged = fingerprints("12,99 zł")
+    assert list(unchanged) == ["https://kociefigle.pl/a-p1"]
+    assert fingerprints("12,99 zł", spacing="\n  ") == unchanged
+    assert fingerprints("11,99 zł") != unchanged
+    assert fingerprints("Brak towaru") != unchanged
+    assert fingerprints("12,99 zł", image="/b.jpg") != unchanged
+
+
 def test_get_product_tiles():
     tiles = kf.get_product_tiles(pagination_page_soup) if pagination_page_soup else None
     assert (
@@ -254,3 +332,26 @@ def test_kfscrapper():
         len(kfscrapper.get_product_links())
         == CorrectTestData.COLL_LEN_PRODUCT_LINKS.value
     )  # type: ignore
+
+
+def test_find_element_memoized_per_soup():
+    soup = BeautifulSoup(
+        '<div class="tab" data-tab="description"><p>Skład: kurczak</p>'
+        "<p>Składniki analityczne: białko</p></div>",
+        "html.parser",
+    )
+    paragraphs = kf.find_element(soup, kf.HtmlElement.PRODUCT_DESCRIPTION_PARAGRAPHS)
+    assert len(paragraphs) == 2
+    assert (
+        kf.find_element(soup, kf.HtmlElement.PRODUCT_DESCRIPTION_PARAGRAPHS)
+        is paragraphs
+    )
+    assert kf.get_product_composition(soup) == "Skład: kurczak"
+    # another soup with the same content has its own results
+    other = BeautifulSoup(str(soup), "html.parser")
+    assert (
+        kf.find_element(other, kf.HtmlElement.PRODUCT_DESCRIPTION_PARAGRAPHS)
+        is not paragraphs
+    )
+    assert kf.find_element(other, kf.HtmlElement.PRODUCT_TILES) is None
+    assert set(kf.SELECTOR_PLANS) == set(kf.HtmlElement)
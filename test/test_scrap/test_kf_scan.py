@@ -0,0 +1,117 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from lakocie_dataset.config import config
+from lakocie_dataset.scrap import io, scrapper
+from lakocie_dataset.scrap.stores import kf, kf_scan
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+PRODUCT_PAGE = """<!DOCTYPE html>
+<html lang="pl"><head><meta charset="utf-8"><title>Almo Nature</title>
+<script>var title = "<h1 class='title'>not a title</h1>";</script>
+<style>.hidden { display: none }</style></head>
+<body>
+<!-- <tr class="hidden" data-parameter-value="ean" data-parameter-default-value="1"> -->
+<div class="container product-page"><div class="row">
+<div class="col-sm-6">
+<H1 class="product title">Almo Nature - HFC Complete - Kurczak &amp; Marchew - 70g</H1>
+<section class="product-informations" data-x="a>b">
+<div class="product-price"> 5.85&nbsp;zł </div>
+<div class="product-price">Brak towaru</div>
+</section>
+<div class="product-parameters">
+<div class="product-parameter-row"><span class="parameter-name">Rozmiar opakowania:</span><span class="text-field">70g</span></div>
+<div class="product-parameter-row"><span class="parameter-name">Smak:</span><span class="text-field"><i>Kurczak</i>, Marchew</span></div>
+<div class="product-parameter-row"><span class="parameter-name">Typ karmy:</span><span class="text-field">Pełnoporcjowa</span></div>
+</div>
+<table class="parameters">
+<tr class="hidden" data-parameter-value='sku' data-parameter-default-value="SKU815"><td>sku</td></tr>
+<tr class="hidden" data-parameter-value=ean data-parameter-default-value="8001154127294"><td>ean</td></tr>
+</table>
+</div></div>
+<div class="tabs"><div class="tab" data-tab="description"><div class="text">
+<p>Kompletna karma pełnoporcjowa.</p>
+<p><strong>Skład:</strong> kurczak 55%, bulion, marchew 4%.<br/></p>
+<p>Składniki analityczne: białko surowe 13%, włókno surowe 0,5%.</p>
+<p>Dodatki dietetyczne na kg: wit.D3 200IU/kg, wit.E 48IU/kg.</p>
+</div></div><div class="tab" data-tab="reviews"><p>Skład: opinia klienta</p></div></div>
+</div>
+</body></html>
+"""
+
+
+def extract_dom(content: str) -> dict:
+    return kf.extract_product(BeautifulSoup(content, "html.parser"))
+
+
+def test_scan_product():
+    scanned = kf_scan.scan_product(PRODUCT_PAGE.encode())
+    assert scanned == extract_dom(PRODUCT_PAGE)
+    assert scanned["name"] == "Almo Nature - HFC Complete - Kurczak & Marchew - 70g"
+    assert scanned["price"] == 5.85
+    assert scanned["ean_code"] == "8001154127294"
+    assert scanned["flavour"] == "Kurczak, Marchew"
+    assert scanned["age_group"] == "not found"
+    assert scanned["composition"] == "Skład: kurczak 55%, bulion, marchew 4%."
+    assert kf_scan.scan_product(PRODUCT_PAGE) == scanned
+
+
+def test_scan_comma_price():
+    page = PRODUCT_PAGE.replace("5.85&nbsp;zł", "1 205,85&nbsp;zł")
+    scanned = kf_scan.scan_product(page)
+    assert scanned["price"] == 1205.85
+    assert scanned == extract_dom(page)
+
+
+def test_scan_product_without_elements():
+    page = "<html><body><h1>Almo Nature</h1><p>Skład: kurczak</p></body></html>"
+    assert kf_scan.scan_product(page) == extract_dom(page)
+    assert kf_scan.scan_product(page)["name"] is None
+
+
+def test_scanned_record():
+    soup = BeautifulSoup(PRODUCT_PAGE, "html.parser")
+    record = scrapper.KFScrapper.to_record(kf_scan.scan_product(PRODUCT_PAGE))
+    assert record == scrapper.KFScrapper(soup).extract()
+    assert record.ean_code == 8001154127294 and record.weight == 70
+
+
+@pytest.mark.parametrize(
+    "old, new",
+    [
+        ("Kurczak &amp; Marchew", "Kurczak &amp Marchew"),
+        ("Kurczak &amp; Marchew", "Kurczak <!-- i --> Marchew"),
+        ("<div class=\"product-price\">Brak towaru</div>", "<div class=\"product-price\">6 zł</div>"),
+        ("<span class=\"parameter-name\">Smak:</span>", ""),
+        ("</p>\n<p>Składniki", "\n<p>Składniki"),
+        ("</body>", "<script>var unclosed;</body>"),
+        ("class=\"product-parameter-row\">", "class=\"product-parameter-row\" class=\"x\">"),
+    ],
+)
+def test_ambiguous_markup(old, new):
+    page = PRODUCT_PAGE.replace(old, new, 1)
+    assert page != PRODUCT_PAGE
+    with pytest.raises(kf_scan.AmbiguousMarkup):
+        kf_scan.scan_product(page)
+
+
+def saved_product_pages(limit: int = 200) -> list:
+    store_dir = config.get_htmls_dir() / StoreChoice.KF.value.name
+    if not store_dir.exists():
+        return []
+    for date_dir in sorted(store_dir.iterdir(), reverse=True):
+        if (date_dir / "products").is_dir():
+            return list(io.iter_snapshot(date_dir / "products"))[:limit]
+    return []
+
+
+def test_scan_on_saved_pages():
+    pages = saved_product_pages()
+    if not pages:
+        pytest.skip("No saved Kocie Figle product pages")
+    for path, content in pages:
+        try:
+            scanned = kf_scan.scan_product(content)
+        except kf_scan.AmbiguousMarkup:
+            continue
+        assert scanned == extract_dom(content.decode()), path
@@ -0,0 +1,179 @@
+import pytest
+
+from lakocie_dataset.config import config
+from lakocie_dataset.scrap import io, parsers, scrapper
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+PRODUCT_PAGE = """<!DOCTYPE html>
+<html lang="pl"><head><meta charset="utf-8"><title>Almo Nature</title>
+<script>var title = "<h1 class='title'>not a title</h1>";</script></head>
+<body>
+<nav><ul class="menu"><li><a href="/Karmy-Mokre">Karmy mokre</a><li><a href="/Karmy-Suche">Karmy suche</a></ul></nav>
+<div class="container product-page"><div class="row">
+<div class="col-sm-6"><img src="/img/815/0.jpg" alt="Almo Nature"></div>
+<div class="col-sm-6">
+<h1 class="title">Almo Nature - HFC Complete - Kurczak i Marchew - 70g</h1>
+<section class="product-informations">
+<div class="product-price"> 5.85 zł </div>
+<div class="availability">Dostępny</div>
+</section>
+<div class="product-parameters">
+<div class="product-parameter-row"><span class="parameter-name">Rozmiar opakowania:</span><span class="text-field">70g</span></div>
+<div class="product-parameter-row"><span class="parameter-name">Smak:</span><span class="text-field">Kurczak, Marchew</span></div>
+<div class="product-parameter-row"><span class="parameter-name">Typ karmy:</span><span class="text-field">Pełnoporcjowa</span></div>
+<div class="product-parameter-row"><span class="parameter-name">Wiek kota:</span><span class="text-field">Dorosłe koty</span></div>
+</div>
+<table class="parameters">
+<tr class="hidden" data-parameter-value="sku" data-parameter-default-value="SKU815"><td>sku</td></tr>
+<tr class="hidden" data-parameter-value="ean" data-parameter-default-value="8001154127294"><td>ean</td></tr>
+</table>
+</div></div>
+<div class="tabs"><div class="tab" data-tab="description">
+<p>Kompletna karma pełnoporcjowa.</p>
+<p>Skład: kurczak 55%, bulion, marchew 4%, skrobia z tapioki.</p>
+<p>Składniki analityczne: białko surowe 13%, włókno surowe 0,5%, wilgotność 80%.</p>
+<p>Dodatki dietetyczne na kg: wit.D3 200IU/kg, wit.E 48IU/kg.</p>
+</div><div class="tab" data-tab="reviews"><p>Skład: opinia klienta</p></div></div>
+</div>
+<footer><p>Kocie Figle &copy; 2025</p></footer>
+</body></html>
+"""
+
+COLLECTION_PAGE = """<!DOCTYPE html>
+<html lang="pl"><head><meta charset="utf-8"><title>Karmy Mokre</title></head>
+<body>
+<div class="container"><div class="row">
+<div class="col-sm-3 filters"><label><input type="checkbox"> Filtr</label></div>
+<div class="col-sm-9">
+<figure class="product-tile"><a href="/Almo-Nature-p815"><img data-src="/img/815/0.jpg"></a>
+<figcaption><a href="/Almo-Nature-p815">Almo Nature</a><div class="product-price">5,85 zł</div></figcaption></figure>
+<figure class="product-tile"><a href="/Animonda-p816"><img src="/img/816/0.jpg"></a>
+<figcaption><a href="/Animonda-p816">Animonda</a><div class="product-price">Brak towaru</div></figcaption></figure>
+<div class="pagination"><a href="/Karmy-Mokre/pa/3">3</a><a href="/Karmy-Mokre/pa/4">4</a>
+<a href="/Karmy-Mokre/pa/5"><i class="fa fa-chevron-right"></i></a><a href="/Karmy-Mokre/pa/12">12</a></div>
+</div></div></div>
+</body></html>
+"""
+
+
+def extract_product(
+    content: str, parser: parsers.Parser, page_type: parsers.PageType | None = None
+) -> tuple:
+    sc = scrapper.KFScrapper(parsers.parse(content, parser, page_type))
+    return (
+        sc.get_product_name(),
+        sc.get_product_manufacturer(),
+        sc.get_product_price(),
+        sc.get_product_weight(),
+        sc.get_product_flavour(),
+        sc.get_product_type(),
+        sc.get_product_age_group(),
+        sc.get_product_ean_code(),
+        sc.get_product_composition(),
+        sc.get_product_analytical_composition(),
+        sc.get_product_dietary_supplements(),
+    )
+
+
+def extract_collection(
+    content: str, parser: parsers.Parser, page_type: parsers.PageType | None = None
+) -> tuple:
+    sc = scrapper.KFScrapper(parsers.parse(content, parser, page_type))
+    return (
+        sc.get_product_links(),
+        sc.get_product_prices(),
+        sc.get_product_fingerprints(),
+        sc.get_next_page_link(),
+        sc.get_page_links(),
+    )
+
+
+def get_parser(parser: parsers.Parser) -> parsers.Parser:
+    if not parsers.is_available(parser):
+        pytest.skip(f"{parser.value} parser is not installed")
+    return parser
+
+
+@pytest.mark.parametrize("parser", list(parsers.Parser))
+def test_backends_extract_same_data(parser):
+    parser = get_parser(parser)
+    baseline = parsers.Parser.HTML_PARSER
+    assert extract_product(PRODUCT_PAGE, parser) == extract_product(
+        PRODUCT_PAGE, baseline
+    )
+    assert extract_collection(COLLECTION_PAGE, parser) == extract_collection(
+        COLLECTION_PAGE, baseline
+    )
+    assert extract_product(PRODUCT_PAGE, parser)[7] == 8001154127294
+
+
+@pytest.mark.parametrize("parser", list(parsers.Parser))
+def test_partial_parsing_extracts_same_data(parser):
+    parser = get_parser(parser)
+    baseline = parsers.Parser.HTML_PARSER
+    assert extract_product(
+        PRODUCT_PAGE, parser, parsers.PageType.PRODUCT
+    ) == extract_product(PRODUCT_PAGE, baseline)
+    assert extract_collection(
+        COLLECTION_PAGE, parser, parsers.PageType.COLLECTION
+    ) == extract_collection(COLLECTION_PAGE, baseline)
+
+
+def test_partial_parsing_skips_other_elements():
+    soup = parsers.parse(
+        PRODUCT_PAGE, parsers.Parser.HTML_PARSER, parsers.PageType.PRODUCT
+    )
+    assert soup.find("nav") is None and soup.find("footer") is None
+    assert soup.find("script") is None
+    assert soup.find("div", class_="tab", attrs={"data-tab": "reviews"}) is None
+    soup = parsers.parse(
+        COLLECTION_PAGE, parsers.Parser.HTML_PARSER, parsers.PageType.COLLECTION
+    )
+    assert soup.find("div", class_="filters") is None
+
+
+def test_prefilter():
+    get_parser(parsers.Parser.SELECTOLAX)
+    reduced = parsers.prefilter(COLLECTION_PAGE)
+    assert "filters" not in reduced
+    # pagination nested in the kept tiles column is not repeated
+    assert reduced.count('class="pagination"') == 1
+
+
+def test_missing_backend(monkeypatch):
+    monkeypatch.setattr(parsers, "lxml", None)
+    with pytest.raises(ImportError):
+        parsers.parse(PRODUCT_PAGE, parsers.Parser.LXML)
+
+
+def saved_pages(limit: int = 20) -> list:
+    store_dir = config.get_htmls_dir() / StoreChoice.KF.value.name
+    if not store_dir.exists():
+        return []
+    pages = []
+    for date_dir in sorted(store_dir.iterdir(), reverse=True):
+        for kind in ["products", "collections"]:
+            if (date_dir / kind).is_dir():
+                files = list(io.iter_html_files(date_dir / kind))[:limit]
+                pages += [(kind, path) for path in files]
+        if pages:
+            break
+    return pages
+
+
+@pytest.mark.parametrize("parser", list(parsers.Parser))
+def test_backends_on_saved_pages(parser):
+    parser = get_parser(parser)
+    pages = saved_pages()
+    if not pages:
+        pytest.skip("No saved Kocie Figle pages")
+    for kind, path in pages:
+        content = io.read_content(path)
+        extract, page_type = (
+            (extract_product, parsers.PageType.PRODUCT)
+            if kind == "products"
+            else (extract_collection, parsers.PageType.COLLECTION)
+        )
+        baseline = extract(content, parsers.Parser.HTML_PARSER)
+        assert extract(content, parser) == baseline, path
+        assert extract(content, parser, page_type) == baseline, path
@@ -1,8 +1,63 @@
-from lakocie_dataset.scrap import permissions
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from lakocie_dataset.scrap import client, fetch, permissions, rate_limit
 
 ALLOWED_URL = "https://finance.yahoo.com/?guccounter=1&guce_referrer=aHR0cHM6Ly9kdWNrZHVja2dvLmNvbS8&guce_referrer_sig=AQAAAK3CHYa7WftAqrm00xvsX1tj3n_FHm5STsfby0s_6n6xhVQO25apiAGUF7CfnrRnzGIECJWYXf_c8HuBGNajgUqeV_ZgWgvi5dWde_17Vzy-rZWoD3Ksv5LSUSlteTGR4_y3HtF-DMBaLh0nMhtDbPR8Y76geLtU7DFXC_PgXXYW"
 DISALLOWED_URL = "https://www.google.com/travel/flights"
 
+ROBOTS_TXT = b"""User-agent: *
+Disallow: /private
+Crawl-delay: 4
+Request-rate: 1/2
+"""
+
+
+class RobotsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    robots_requests = 0
+    robots_status = 200
+
+    def do_GET(self):
+        status = 200
+        if self.path == "/robots.txt":
+            RobotsHandler.robots_requests += 1
+            time.sleep(getattr(self.server, "robots_delay", 0))
+            status = self.robots_status
+            body = ROBOTS_TXT
+        else:
+            body = b"<html><body>page</body></html>"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RobotsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def get_url(server: ThreadingHTTPServer) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@pytest.fixture
+def robots_server():
+    RobotsHandler.robots_requests = 0
+    server = start_server()
+    yield get_url(server)
+    permissions.clear_robots_policies()
+    client.close_sessions()
+    server.shutdown()
+    server.server_close()
+
 
 def test_webscrapping_allowed():
     assert permissions.webscrapping_allowed(ALLOWED_URL) is True
@@ -10,3 +65,65 @@ def test_webscrapping_allowed():
 
 def test_webscrapping_disallowed():
     assert permissions.webscrapping_allowed(DISALLOWED_URL) is False
+
+
+def test_robots_policy_is_cached(robots_server):
+    assert permissions.webscrapping_allowed(f"{robots_server}/product-1")
+    assert permissions.webscrapping_allowed(f"{robots_server}/product-2")
+    assert not permissions.webscrapping_allowed(f"{robots_server}/private/page")
+    assert RobotsHandler.robots_requests == 1
+
+
+def test_get_crawl_delay(robots_server):
+    rp = permissions.get_robots_policy(f"{robots_server}/product")
+    assert permissions.get_crawl_delay(rp) == 4
+
+
+def test_fetch_respects_robots_policy(robots_server):
+    with pytest.raises(PermissionError):
+        fetch.get_content(f"{robots_server}/private/page")
+
+    # bucket of the host is slowed down to the crawl delay
+    assert "page" in fetch.get_content(f"{robots_server}/product")
+    bucket = rate_limit.get_bucket(robots_server)
+    assert bucket.rate <= 1 / 4
+    assert bucket.capacity == 1
+
+
+def test_failed_robots_download_disallows_until_ttl(robots_server, monkeypatch):
+    monkeypatch.setattr(RobotsHandler, "robots_status", 503)
+    assert not permissions.webscrapping_allowed(f"{robots_server}/product-1")
+    assert not permissions.webscrapping_allowed(f"{robots_server}/product-2")
+    assert RobotsHandler.robots_requests == 1
+
+    # robots.txt is downloaded again after the ttl
+    monkeypatch.setattr(RobotsHandler, "robots_status", 200)
+    rp = permissions.get_robots_policy(f"{robots_server}/product", ttl=0)
+    assert rp.can_fetch(permissions.USER_AGENT, f"{robots_server}/product")
+    assert RobotsHandler.robots_requests == 2
+
+
+def test_unreachable_robots_disallows(robots_server):
+    server = start_server()
+    url = get_url(server)
+    server.shutdown()
+    server.server_close()
+    assert not permissions.webscrapping_allowed(f"{url}/product")
+
+
+def test_slow_robots_download_does_not_block_other_hosts(robots_server):
+    slow_server = start_server()
+    slow_server.robots_delay = 1  # type: ignore
+    try:
+        thread = threading.Thread(
+            target=permissions.get_robots_policy, args=(f"{get_url(slow_server)}/a",)
+        )
+        thread.start()
+        time.sleep(0.2)
+        start = time.monotonic()
+        assert permissions.webscrapping_allowed(f"{robots_server}/product")
+        assert time.monotonic() - start < 0.5
+        thread.join()
+    finally:
+        slow_server.shutdown()
+        slow_server.server_close()
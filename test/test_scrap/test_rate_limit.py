@@ -0,0 +1,59 @@
+import threading
+import time
+import pytest
+from lakocie_dataset.config import config
+from lakocie_dataset.scrap import rate_limit
+
+
+def test_token_bucket_raises():
+    with pytest.raises(ValueError):
+        rate_limit.TokenBucket(0)
+    with pytest.raises(ValueError):
+        rate_limit.TokenBucket(1, capacity=0)
+
+
+def test_token_bucket_burst():
+    bucket = rate_limit.TokenBucket(rate=1, capacity=3)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_token_bucket_reserve_spaces_requests():
+    bucket = rate_limit.TokenBucket(rate=10, capacity=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
+
+
+def test_token_bucket_concurrent_acquire():
+    bucket = rate_limit.TokenBucket(rate=50, capacity=1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # first token is available immediately, the other five are spaced by 1/50 s
+    assert time.monotonic() - start >= 0.09
+
+
+def test_get_bucket_per_host():
+    first = rate_limit.get_bucket("https://example.com/a")
+    second = rate_limit.get_bucket("https://example.com/b")
+    other = rate_limit.get_bucket("https://example.org/a")
+    assert first is second
+    assert first is not other
+
+
+def test_default_rate_limit_keeps_sleep_time():
+    # shipped settings send requests no faster than one per sleep_time
+    rate, burst = config.get_rate_limit("kociefigle.pl")
+    assert rate == 1 / config.get_sleep_time()
+    assert burst == 1
+
+
+def test_adaptive_rate_is_opt_in():
+    assert not config.get_adaptive_rate()
+    assert config.get_adaptive_rate_bounds()[1] == 1 / config.get_sleep_time()
@@ -0,0 +1,98 @@
+from pathlib import Path
+
+import pytest
+
+from lakocie_dataset.config import config
+from lakocie_dataset.scrap import ingest, record_cache
+from lakocie_dataset.scrap.stores.store_definitions import StoreChoice
+
+PRODUCT_PAGE = """<html><body>
+<h1 class="title">Almo Nature - HFC Complete - Kurczak - {weight}g</h1>
+<section class="product-informations"><div class="product-price">5.85 zł</div></section>
+<div class="product-parameter-row"><span class="parameter-name">Rozmiar opakowania:</span><span class="text-field">{weight}g</span></div>
+<table><tr class="hidden" data-parameter-value="ean" data-parameter-default-value="{ean}"><td>ean</td></tr></table>
+<div class="tab" data-tab="description"><p>Skład: kurczak 55%</p></div>
+</body></html>
+"""
+
+
+def get_pages(count: int) -> list[tuple[Path, bytes]]:
+    return [
+        (
+            Path(f"product-{i}.html"),
+            PRODUCT_PAGE.format(weight=i + 1, ean=8001154120000 + i).encode(),
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with record_cache.RecordCache(tmp_path / "records.sqlite", 1, 90) as cache:
+        yield cache
+
+
+def test_cached_records_are_not_parsed(cache, monkeypatch):
+    pages = get_pages(20) + [(Path("empty.html"), b"<html><body></body></html>")]
+    parsed = list(ingest.iter_product_records(StoreChoice.KF, pages, 1, cache))
+    assert len(cache) == 20
+
+    def fail(*args):
+        raise AssertionError("cached page parsed")
+
+    monkeypatch.setattr(ingest, "get_product_record", fail)
+    cached = list(ingest.iter_product_records(StoreChoice.KF, pages[:20], 1, cache))
+    assert cached == parsed[:20]
+    assert cached[3][1].weight == 4 and cached[3][1].ean_code == 8001154120003
+
+
+def test_cache_with_process_pool(cache):
+    pages = get_pages(50)
+    sequential = list(ingest.iter_product_records(StoreChoice.KF, pages[::2], 1, cache))
+    parallel = list(ingest.iter_product_records(StoreChoice.KF, pages, 2, cache))
+    assert [path for path, _ in parallel] == [path for path, _ in pages]
+    assert parallel[::2] == sequential
+    assert len(cache) == 50
+
+
+def test_changed_extraction_is_not_read(cache, monkeypatch):
+    pages = get_pages(5)
+    list(ingest.iter_product_records(StoreChoice.KF, pages, 1, cache))
+    digests = [ingest.blobs.get_digest(content) for _, content in pages]
+    assert len(cache.get_many(StoreChoice.KF, digests)) == 5
+
+    monkeypatch.setattr(record_cache, "get_extraction_version", lambda store: "next")
+    cache._versions.clear()
+    assert cache.get_many(StoreChoice.KF, digests) == {}
+    assert cache.evict() == 5 and len(cache) == 0
+
+
+def test_evict_least_recently_used(tmp_path):
+    pages = get_pages(10)
+    with record_cache.RecordCache(tmp_path / "records.sqlite", 0.001, 90) as cache:
+        list(ingest.iter_product_records(StoreChoice.KF, pages, 1, cache))
+        digest = ingest.blobs.get_digest(pages[0][1])
+        assert cache.get_many(StoreChoice.KF, [digest])
+        cache.evict()
+        assert 0 < len(cache) < 10
+        assert cache.get_many(StoreChoice.KF, [digest])
+
+        cache.max_age = -1
+        cache.evict()
+        assert len(cache) == 0
+
+
+@pytest.mark.parametrize("partial", [True, False])
+def test_partial_parsing_is_not_read(tmp_path, monkeypatch, partial):
+    pages = get_pages(3)
+    path = tmp_path / "records.sqlite"
+    monkeypatch.setattr(config, "partial_parsing", partial)
+    with record_cache.RecordCache(path, 1, 90) as cache:
+        list(ingest.iter_product_records(StoreChoice.KF, pages, 1, cache))
+    digests = [ingest.blobs.get_digest(content) for _, content in pages]
+    with record_cache.RecordCache(path, 1, 90) as cache:
+        assert len(cache.get_many(StoreChoice.KF, digests)) == 3
+
+    monkeypatch.setattr(config, "partial_parsing", not partial)
+    with record_cache.RecordCache(path, 1, 90) as cache:
+        assert cache.get_many(StoreChoice.KF, digests) == {}
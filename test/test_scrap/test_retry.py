@@ -0,0 +1,175 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from lakocie_dataset.scrap import client, fetch, paths, rate_limit, retry
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Answers 503 with Retry-After twice before serving the page"""
+
+    protocol_version = "HTTP/1.1"
+    requests = 0
+
+    def do_GET(self):
+        if self.path == "/robots.txt":
+            status = 404
+        else:
+            FlakyHandler.requests += 1
+            status = 503 if FlakyHandler.requests <= 2 else 200
+        self.send_response(status)
+        if status == 503:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DroppingHandler(BaseHTTPRequestHandler):
+    """Drops the connection in the middle of the first page body"""
+
+    protocol_version = "HTTP/1.1"
+    requests = 0
+
+    def do_GET(self):
+        body = b"<html>" + b"x" * 1000 + b"</html>"
+        if self.path == "/robots.txt":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        DroppingHandler.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if DroppingHandler.requests == 1:
+            self.wfile.write(body[:100])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fast_config(monkeypatch):
+    monkeypatch.setattr("lakocie_dataset.config.config.get_backoff", lambda: (0.01, 1))
+    monkeypatch.setattr(
+        "lakocie_dataset.config.config.get_rate_limit", lambda host: (1000.0, 100)
+    )
+
+
+def test_circuit_breaker():
+    breaker = retry.CircuitBreaker(failures=2, reset_after=0.05)
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.is_open
+    with pytest.raises(retry.CircuitOpenError):
+        breaker.check()
+
+    time.sleep(0.06)
+    breaker.check()  # trial request
+    with pytest.raises(retry.CircuitOpenError):
+        breaker.check()
+    breaker.record_failure()
+    assert breaker.is_open
+
+    time.sleep(0.06)
+    breaker.check()
+    breaker.record_success()
+    assert not breaker.is_open
+    breaker.check()
+
+
+def test_parse_retry_after():
+    assert retry.parse_retry_after("120") == 120
+    assert retry.parse_retry_after(None) is None
+    assert retry.parse_retry_after("soon") is None
+    assert retry.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert retry.parse_retry_after("Wed, 21 Oct 2015 07:28:00 -0000") == 0
+    in_an_hour = datetime.now(timezone.utc) + timedelta(hours=1)
+    assert 3500 < retry.parse_retry_after(format_datetime(in_an_hour, True)) <= 3600
+
+
+def test_get_backoff(fast_config):
+    assert all(0 <= retry.get_backoff(10) <= 1 for _ in range(100))
+
+
+def test_adaptive_rate(monkeypatch):
+    monkeypatch.setattr("lakocie_dataset.config.config.get_adaptive_rate", lambda: True)
+    monkeypatch.setattr(
+        "lakocie_dataset.config.config.get_adaptive_rate_bounds", lambda: (0.1, 1.0)
+    )
+    monkeypatch.setattr(
+        "lakocie_dataset.config.config.get_rate_limit", lambda host: (0.5, 1)
+    )
+    url = "https://adaptive.example.com/page"
+    bucket = rate_limit.get_bucket(url)
+
+    rate_limit.record_response(url, latency=0.1)
+    assert bucket.rate > 0.5
+    rate_limit.record_response(url, overloaded=True)
+    assert bucket.rate < 0.5
+    rate_limit.record_response(url, latency=60)
+    for _ in range(5):
+        rate_limit.record_response(url, overloaded=True)
+    assert bucket.rate == 0.1
+
+
+def test_get_response_retries(fast_config):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/product"
+        response = fetch.get_response(url)
+        assert response.status_code == 200
+        assert FlakyHandler.requests == 3
+        assert not retry.get_breaker(url).is_open
+    finally:
+        client.close_sessions()
+        server.shutdown()
+        server.server_close()
+
+
+def test_unretried_error_closes_trial(fast_config, monkeypatch):
+    url = "http://127.0.0.1:1/product"
+    monkeypatch.setattr(fetch.permissions, "webscrapping_allowed", lambda url: True)
+    breaker = retry.get_breaker(url)
+    breaker.reset_after = 0
+    breaker._opened_at = time.monotonic()
+
+    def get(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError("connection dropped")
+
+    monkeypatch.setattr(fetch.client, "get", get)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        fetch.get_response(url)
+    # the failed trial opened the circuit again, the next trial is let through
+    breaker.check()
+    assert breaker.is_open
+
+
+def test_dropped_body_is_retried(fast_config, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DroppingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/collection"
+        content = fetch.download_html(url, paths.Path(tmp_path) / "collection.html")
+        assert content == "<html>" + "x" * 1000 + "</html>"
+        assert DroppingHandler.requests == 2
+        assert [path.name for path in tmp_path.iterdir()] == ["collection.html"]
+    finally:
+        client.close_sessions()
+        server.shutdown()
+        server.server_close()
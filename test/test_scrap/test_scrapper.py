@@ -1,6 +1,7 @@
 from bs4 import BeautifulSoup
 import pytest
 from lakocie_dataset.scrap import scrapper
+from lakocie_dataset.scrap.stores import kf
 
 
 def test_KFScrapper_params():
@@ -71,3 +72,53 @@ def test_KFScrapper_params():
 
     with pytest.raises(TypeError):
         kfscrapper.get_product_name(1)  # type: ignore
+
+
+PRODUCT_HTML = """
+<html><body>
+<h1 class="title">Almo Nature - HFC Complete - Kurczak i Marchew - 70g</h1>
+<section class="product-informations"><div class="product-price">5.85 zł</div></section>
+<div class="product-parameter-row"><span class="parameter-name">Rozmiar opakowania:</span><span class="text-field">70g</span></div>
+<div class="product-parameter-row"><span class="parameter-name">Smak:</span><span class="text-field">Kurczak, Marchew</span></div>
+<table><tr class="hidden" data-parameter-value="ean" data-parameter-default-value="8001154127294"></tr></table>
+<div class="tab" data-tab="description">
+<p>Skład: kurczak 55%, marchew 4%.</p>
+<p>Składniki analityczne: białko surowe 13%.</p>
+</div>
+</body></html>
+"""
+
+
+def test_KFScrapper_extract():
+    soup = BeautifulSoup(PRODUCT_HTML, "html.parser")
+    kfscrapper = scrapper.KFScrapper(soup)
+    record = kfscrapper.extract()
+    assert record == scrapper.ProductRecord(
+        name="Almo Nature - HFC Complete - Kurczak i Marchew - 70g",
+        manufacturer="Almo nature",
+        price=5.85,
+        weight=70,
+        flavour="Kurczak, Marchew",
+        type="not found",
+        age_group="not found",
+        ean_code=8001154127294,
+        composition="Skład: kurczak 55%, marchew 4%.",
+        analytical_composition="Składniki analityczne: białko surowe 13%.",
+        dietary_supplements="not found",
+    )
+    # record is compact and immutable
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.price = 1.0  # type: ignore
+
+    # getters read the same values as the single pass extraction
+    assert kf.get_product_name(soup) == record.name
+    assert kf.get_product_price(soup) == record.price
+    assert kf.get_product_flavour(soup) == record.flavour
+    assert kf.get_product_composition(soup) == record.composition
+    assert kfscrapper.get_product_ean_code() == record.ean_code
+    assert kfscrapper.get_product_weight() == record.weight
+
+    kfscrapper.change_soup(BeautifulSoup("<h1 class='title'>Other</h1>", "html.parser"))
+    assert kfscrapper.get_product_name() == "Other"
+    assert kfscrapper.get_product_composition() == "not found"